@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+"""Compares in-place saves with atomic saves, with and without a directory fsync.
+
+Usage: ./benchmarks/bench_atomic_save.py [objects] [saves]
+"""
+import json
+from common import arg, timed
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+objects = arg(1, 10000)
+saves = arg(2, 50)
+users = [User() for _ in range(objects)]
+storage.save()
+
+
+def in_place():
+    """The old save: truncate the file and dump into it."""
+    users[0].first_name = "Betty"
+    with open("file.json", "w") as f:
+        json.dump({k: v.to_dict() for k, v in storage.all().items()}, f)
+
+
+def in_place_same_bytes():
+    """Truncate and rewrite the current file contents without any fsync."""
+    with open("file.json") as f:
+        text = f.read()
+    with open("file.json", "w") as f:
+        f.write(text)
+
+
+def atomic(store):
+    """Return a save touching one object through the given storage."""
+    def run():
+        users[0].first_name = "Betty"
+        store.save()
+    return run
+
+
+print("{} objects, mean of {} saves".format(objects, saves))
+timed("in place, full serialization", in_place, saves)
+timed("in place, same bytes, no fsync", in_place_same_bytes, saves)
+timed("atomic replace", atomic(FileStorage()), saves)
+timed("atomic replace + directory fsync", atomic(FileStorage(fsync_dir=True)), saves)
@@ -0,0 +1,36 @@
+#!/usr/bin/python3
+"""Compares creating and saving objects one by one with storage.batch().
+
+Usage: ./benchmarks/bench_batch_save.py [objects]
+"""
+from common import arg, timed
+from models import storage
+from models.place import Place
+
+objects = arg(1, 5000)
+
+
+def create():
+    """Create and save objects the way a script calling save() would."""
+    for i in range(objects):
+        place = Place()
+        place.name = "Place {}".format(i)
+        place.save()
+
+
+def create_batched():
+    """The same script inside one batch."""
+    with storage.batch():
+        create()
+
+
+def create_auto_flushed():
+    """The same script inside a batch writing every 1000 saves."""
+    with storage.batch(max_pending=1000):
+        create()
+
+
+print("{} objects".format(objects))
+timed("save() per object", create)
+timed("inside storage.batch()", create_batched)
+timed("batch(max_pending=1000)", create_auto_flushed)
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""Compares the size and decode time of JSON and binary storage files.
+
+Usage: ./benchmarks/bench_binary_format.py [objects]
+"""
+import os
+from common import arg, timed
+from models import storage
+from models.engine import binary_format
+from models.engine.file_storage import FileStorage
+from models.engine.json_stream import iter_items
+from models.place import Place
+
+objects = arg(1, 200000)
+for i in range(objects):
+    place = Place()
+    place.name = "Place {}".format(i)
+    place.price_by_night = i % 500
+    place.latitude = 37.0 + i / objects
+FileStorage().save()
+binary_format.convert("file.json", "file.bin")
+print("{} objects".format(objects))
+for path in ("file.json", "file.bin"):
+    print("{:<40} {:>10.1f} MiB".format(path + " size",
+                                        os.path.getsize(path) / 2 ** 20))
+
+
+def decode_json():
+    """Decode every record of the JSON file without building objects."""
+    with open("file.json") as f:
+        return sum(1 for _ in iter_items(f))
+
+
+def decode_binary():
+    """Decode every record of the binary file without building objects."""
+    with open("file.bin", 'rb') as f:
+        return sum(1 for _ in binary_format.iter_records(f))
+
+
+timed("decode JSON", decode_json)
+timed("decode binary", decode_binary)
+FileStorage._FileStorage__objects = {}
+timed("reload JSON", storage.reload)
+os.replace("file.bin", "file.json")
+FileStorage._FileStorage__objects = {}
+timed("reload binary", storage.reload)
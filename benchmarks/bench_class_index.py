@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+"""Compares listing and counting one class by scanning with the class index.
+
+The dataset is skewed the way a real site is: almost every object is a
+Review, with a few Places and only a handful of States.
+
+Usage: ./benchmarks/bench_class_index.py [objects] [repeat]
+"""
+from common import arg, timed
+from models import storage
+from models.place import Place
+from models.review import Review
+from models.state import State
+
+objects = arg(1, 200000)
+repeat = arg(2, 20)
+
+for i in range(objects):
+    if i % 1000 == 0:
+        State()
+    elif i % 50 == 0:
+        Place()
+    else:
+        Review()
+
+
+def scan(name):
+    """List a class the way all(cls) did before the index."""
+    return {k: v for k, v in storage.all().items()
+            if v.__class__.__name__ == name}
+
+
+for name in ("State", "Place", "Review"):
+    count = len(storage.all(name))
+    print("{} {} of {} objects".format(count, name, objects))
+    timed("  scan all objects", lambda: scan(name), repeat)
+    timed("  storage.all({})".format(name), lambda: storage.all(name), repeat)
@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+"""Compares building reloaded objects with cls(**data) and cls.from_dict().
+
+Usage: ./benchmarks/bench_from_dict.py [objects]
+"""
+from common import arg, timed
+from models import storage
+from models.engine import file_storage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+objects = arg(1, 1000000)
+kinds = (User, Place)
+records = [kinds[i % 2]().to_dict() for i in range(objects)]
+for record in records:
+    del record["__class__"]
+classes = [kinds[i % 2] for i in range(objects)]
+print("{} records".format(objects))
+
+old = timed("cls(**data)", lambda: [
+    cls(**record) for cls, record in zip(classes, records)])
+new = timed("cls.from_dict(data)", lambda: [
+    cls.from_dict(record) for cls, record in zip(classes, records)])
+assert [o.to_dict() for o in old[:1000]] == [o.to_dict() for o in new[:1000]]
+del old, new, records
+
+storage.save()
+
+
+def old_build(obj):
+    """How records were built before from_dict()."""
+    return file_storage.classes[obj.pop('__class__')](**obj)
+
+
+def reload():
+    """Reload the file into empty storage."""
+    FileStorage._FileStorage__objects = {}
+    storage.reload()
+    assert len(storage.all()) == objects
+
+
+new_build = file_storage._build
+file_storage._build = old_build
+timed("reload with cls(**data)", reload)
+file_storage._build = new_build
+timed("reload with cls.from_dict(data)", reload)
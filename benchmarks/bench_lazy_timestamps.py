@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+"""Times reloads and full saves with timestamps parsed lazily or eagerly.
+
+Usage: ./benchmarks/bench_lazy_timestamps.py [objects]
+"""
+from datetime import datetime
+from common import arg, timed
+from models import storage
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+objects = arg(1, 200000)
+for _ in range(objects):
+    User()
+storage.save()
+print("{} objects".format(objects))
+lazy_from_dict = BaseModel.from_dict.__func__
+
+
+def eager_from_dict(cls, data):
+    """from_dict() parsing both timestamps right away."""
+    obj = lazy_from_dict(cls, data)
+    for name in ("created_at", "updated_at"):
+        obj.__dict__[name] = datetime.fromisoformat(obj.__dict__[name])
+    return obj
+
+
+def reload():
+    """Reload the file into empty storage and count it."""
+    FileStorage._FileStorage__objects = {}
+    storage.reload()
+    assert storage.count(User) == objects
+
+
+for label, from_dict in (("eager", eager_from_dict),
+                         ("lazy", lazy_from_dict)):
+    BaseModel.from_dict = classmethod(from_dict)
+    timed("reload, {} timestamps".format(label), reload)
+    timed("full save, {} timestamps".format(label), storage.compact)
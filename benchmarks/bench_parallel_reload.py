@@ -0,0 +1,25 @@
+#!/usr/bin/python3
+"""Compares serial reloads with reloads spread over a process pool.
+
+Usage: ./benchmarks/bench_parallel_reload.py [objects] [max workers]
+"""
+import os
+from common import arg, timed
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+objects = arg(1, 500000)
+max_workers = arg(2, os.cpu_count())
+for i in range(objects):
+    Place().name = "Place {}".format(i)
+storage.save()
+print("{} objects, {:.1f} MiB file".format(
+    objects, os.path.getsize("file.json") / 2 ** 20))
+
+workers = 1
+while workers <= max_workers:
+    FileStorage._FileStorage__objects = {}
+    timed("{} worker(s)".format(workers), FileStorage(workers=workers).reload)
+    assert len(storage.all()) == objects
+    workers *= 2
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""Compares range and top-N queries on Place prices: scans against indexes.
+
+Writes a storage file of Places with random prices and room counts, reloads
+it (which builds the sorted indexes in one pass), then times the queries
+and the cost of keeping the indexes current while prices change.
+
+Usage: ./benchmarks/bench_range_index.py [places] [repeat]
+"""
+import json
+import random
+from common import arg, timed
+from models import storage
+from models.place import Place
+
+places = arg(1, 1000000)
+repeat = arg(2, 10)
+random.seed(0)
+with open("file.json", "w") as f:
+    f.write("{\n" + ",\n".join(
+        json.dumps("Place.{}".format(i)) + ": " + json.dumps({
+            "__class__": "Place", "id": str(i),
+            "created_at": "2024-01-01T00:00:00.000000",
+            "updated_at": "2024-01-01T00:00:00.000000",
+            "price_by_night": random.randrange(20, 1000),
+            "number_rooms": random.randrange(1, 8)})
+        for i in range(places)) + "\n}")
+timed("reload() and build indexes", storage.reload)
+print("{} places".format(len(storage.all(Place))))
+
+
+def scan_range():
+    """100 <= price_by_night < 200 by looking at every Place."""
+    return {k: v for k, v in storage.all(Place).items()
+            if 100 <= v.price_by_night < 200}
+
+
+def scan_top():
+    """The ten cheapest Places by sorting every Place."""
+    return sorted(storage.all(Place).values(),
+                  key=lambda place: place.price_by_night)[:10]
+
+
+found = timed("scan 100 <= price < 200", scan_range, repeat)
+assert len(storage.find_range(Place, "price_by_night", 100, 200)) == len(found)
+timed("find_range(100, 200)", lambda: storage.find_range(
+    Place, "price_by_night", 100, 200), repeat)
+timed("find_range(500, 501)", lambda: storage.find_range(
+    Place, "price_by_night", 500, 501), repeat)
+timed("scan and sort for 10 cheapest", scan_top, repeat)
+timed("find_range(limit=10)", lambda: storage.find_range(
+    Place, "price_by_night", limit=10), repeat)
+
+changed = list(storage.all(Place).values())[:10000]
+
+
+def update():
+    """Change the price of 10000 Places, moving them in the index."""
+    for place in changed:
+        place.price_by_night = random.randrange(20, 1000)
+
+
+timed("10000 price updates", update)
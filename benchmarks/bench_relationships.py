@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+"""Compares building a State -> City -> Place tree by scans and by accessors.
+
+Usage: ./benchmarks/bench_relationships.py [states] [cities per state]
+       [places per city] [reviews]
+"""
+import random
+from common import arg, timed
+from models import storage
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+
+states = arg(1, 50)
+cities = arg(2, 20)
+places = arg(3, 20)
+reviews = arg(4, 100000)
+random.seed(0)
+with storage.batch():
+    for _ in range(states):
+        state = State()
+        for _ in range(cities):
+            city = City()
+            city.state_id = state.id
+            for _ in range(places):
+                Place().city_id = city.id
+    for _ in range(reviews):
+        Review()
+print("{} objects".format(len(storage.all())))
+
+
+def scan_tree():
+    """Find the children of every object by looking at every object."""
+    tree = {}
+    for state in storage.all(State).values():
+        tree[state.id] = {
+            city.id: [place.id for place in storage.all().values()
+                      if isinstance(place, Place) and
+                      place.city_id == city.id]
+            for city in storage.all().values()
+            if isinstance(city, City) and city.state_id == state.id}
+    return tree
+
+
+def index_tree():
+    """Follow state.cities and city.places."""
+    return {state.id: {city.id: [place.id for place in city.places]
+                       for city in state.cities}
+            for state in storage.all(State).values()}
+
+
+tree = timed("tree by scanning all objects", scan_tree)
+assert timed("tree by state.cities/city.places", index_tree) == tree
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""Compares peak memory of json.load reloads with streaming reloads.
+
+Each reload runs in its own process and reports how far its peak resident
+set grew above the size it had before loading, next to the size it keeps
+once loading is done.
+
+Usage: ./benchmarks/bench_reload_memory.py [objects]
+"""
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+from common import arg, timed
+
+
+def rss_mib():
+    """Current resident set size of this process in MiB (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def child(mode, directory):
+    """Reload the file in directory one way and print the memory used."""
+    from models import storage
+    from models.place import Place
+    os.chdir(directory)
+
+    def load_whole_document():
+        """The old reload: decode the whole file, then build the objects."""
+        with open("file.json") as f:
+            for obj in json.load(f).values():
+                del obj["__class__"]
+                storage.new(Place(**obj))
+
+    gc.collect()
+    before = rss_mib()
+    if mode == "stream":
+        timed("streaming reload", storage.reload)
+    else:
+        timed("json.load then build", load_whole_document)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    gc.collect()
+    print("{:<40} {:>10.1f} MiB peak, {:.1f} MiB retained".format(
+        "", peak - before, rss_mib() - before))
+
+
+if len(sys.argv) > 2 and sys.argv[1] == "--child":
+    child(sys.argv[2], sys.argv[3])
+    sys.exit()
+
+objects = arg(1, 1000000)
+stamp = "2024-05-20T20:30:00.000000"
+os.makedirs("data")
+with open("data/file.json", "w") as f:
+    f.write("{")
+    for i in range(objects):
+        key = "Place.{:036d}".format(i)
+        record = {"id": key[6:], "created_at": stamp, "updated_at": stamp,
+                  "name": "Place {}".format(i), "price_by_night": i % 500,
+                  "__class__": "Place"}
+        f.write("{}{}: {}".format(", " if i else "", json.dumps(key),
+                                  json.dumps(record)))
+    f.write("}")
+
+print("{} objects".format(objects))
+for mode in ("document", "stream"):
+    sys.stdout.flush()
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--child",
+                    mode, os.path.abspath("data")], check=True)
@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+"""Compares text search by substring scans with the inverted index.
+
+Also times reload() with and without the index file written by close().
+
+Usage: ./benchmarks/bench_text_index.py [reviews] [repeat]
+"""
+import os
+import random
+from common import arg, timed
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.review import Review
+
+reviews = arg(1, 100000)
+repeat = arg(2, 20)
+random.seed(0)
+words = ["word{}".format(i) for i in range(5000)] + \
+    ["quiet", "sunny", "clean", "noisy", "cozy"]
+with storage.batch():
+    for _ in range(reviews):
+        Review().text = " ".join(random.choices(words, k=30))
+storage.close()
+print("{} reviews".format(reviews))
+
+
+def scan(*terms):
+    """Reviews holding every term, by substring matching each text."""
+    return [review for review in storage.all(Review).values()
+            if all(term in review.text.split() for term in terms)]
+
+
+timed("scan for 'quiet sunny'", lambda: scan("quiet", "sunny"), repeat)
+timed("search('quiet sunny')", lambda: storage.search(
+    Review, "quiet sunny"), repeat)
+timed("search('quiet sunny', mode='or')", lambda: storage.search(
+    Review, "quiet sunny", mode="or"), repeat)
+
+
+def reload():
+    """Reload every review from scratch."""
+    FileStorage._FileStorage__objects = {}
+    storage.reload()
+
+
+timed("reload() with file.json.idx", reload)
+os.remove("file.json.idx")
+timed("reload() rebuilding the index", reload)
@@ -0,0 +1,31 @@
+#!/usr/bin/python3
+"""Helpers shared by the storage benchmarks.
+
+Importing this module puts the repository root on sys.path and moves into a
+fresh temporary directory, so the benchmarks never touch a real file.json.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp(prefix="hbnb-bench-"))
+
+
+def arg(position, default):
+    """Return the integer command line argument at position, or default."""
+    try:
+        return int(sys.argv[position])
+    except IndexError:
+        return default
+
+
+def timed(label, func, repeat=1):
+    """Run func repeat times and print the mean wall time in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print("{:<40} {:>10.2f} ms".format(label, elapsed))
+    return result
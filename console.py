@@ -1,16 +1,12 @@
 #!/usr/bin/python3
 """This module sets up the AirBnB clone console."""
+import ast
 import cmd
+import inspect
 import re
 from shlex import split
 from models import storage
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.place import Place
-from models.amenity import Amenity
-from models.review import Review
+from models.registry import classes
 
 
 def extract_arguments(argument):
@@ -28,6 +24,95 @@ def extract_arguments(argument):
         return [item.strip(",") for item in pre_curly_args] + [curly_braces_content.group()]
 
 
+def literal(text):
+    """Reads a Python literal, or gives back None if text is not one."""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return None
+
+
+def is_descriptor(cls, name):
+    """Tells whether name is a property, method or other descriptor of cls.
+
+    Such names are computed or managed by the class, so they cannot be
+    updated from the console.
+    """
+    return hasattr(inspect.getattr_static(cls, name, None), "__get__")
+
+
+def split_options(line):
+    """Splits "--name value" options off the end of a command line.
+
+    Returns:
+        tuple: The text before the first option, and a dict of
+            option name -> value with surrounding quotes removed.
+    """
+    parts = re.split(r"(?:^|\s)--(\w+)", line)
+    options = {}
+    for name, value in zip(parts[1::2], parts[2::2]):
+        value = value.strip()
+        if len(value) > 1 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        options[name] = value
+    return parts[0], options
+
+
+CONDITION = re.compile(
+    r"\s*(\w+)\s*(<=|>=|!=|==|=|<|>)\s*(\"[^\"]*\"|'[^']*'|[^,]*?)\s*(?:,|$)")
+OPERATORS = {"<": "lt", "<=": "le", ">": "gt", ">=": "ge", "=": "eq",
+             "==": "eq", "!=": "ne"}
+
+
+def parse_value(text, default):
+    """Reads a condition value, typed like the class attribute default.
+
+    Quoted text is always a string. Otherwise numeric attributes need a
+    number, string attributes take the text as is, and the type of other
+    attributes is guessed.
+    """
+    if len(text) > 1 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if isinstance(default, str):
+        return text
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    if isinstance(default, (int, float)):
+        raise ValueError(text)
+    return text
+
+
+def parse_conditions(text, cls):
+    """Turns "attr<op>value, ..." into (lookup, value) pairs for a Query.
+
+    Args:
+        text (str): Conditions separated by commas; op is one of
+            <, <=, >, >=, =, == and !=.
+        cls (type): Class queried, whose attributes type the values.
+
+    Raises:
+        ValueError: With the part of text that could not be read.
+    """
+    conditions = []
+    text = text.strip()
+    position = 0
+    while position < len(text):
+        match = CONDITION.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(text[position:].strip())
+        attr, op, raw = match.groups()
+        try:
+            value = parse_value(raw, getattr(cls, attr, None))
+        except ValueError:
+            raise ValueError(match.group().strip(" ,"))
+        conditions.append(("{}__{}".format(attr, OPERATORS[op]), value))
+        position = match.end()
+    return conditions
+
+
 class HBNBCommand(cmd.Cmd):
     """Represents the command interpreter for HBNB clone.
 
@@ -36,15 +121,7 @@ class HBNBCommand(cmd.Cmd):
     """
 
     prompt = "(hbnb) "
-    __models = {
-        "BaseModel",
-        "User",
-        "State",
-        "City",
-        "Place",
-        "Amenity",
-        "Review"
-    }
+    __models = classes
 
     def emptyline(self):
         """Ignores empty lines."""
@@ -57,12 +134,15 @@ class HBNBCommand(cmd.Cmd):
             "show": self.do_show,
             "destroy": self.do_destroy,
             "count": self.do_count,
-            "update": self.do_update
+            "update": self.do_update,
+            "near": self.do_near,
+            "where": self.do_where,
+            "group_by": self.do_group_by
         }
         dot_search = re.search(r"\.", line)
         if dot_search:
             args = [line[:dot_search.span()[0]], line[dot_search.span()[1]:]]
-            parentheses_search = re.search(r"\((.*?)\)", args[1])
+            parentheses_search = re.search(r"\((.*)\)", args[1])
             if parentheses_search:
                 command = [args[1][:parentheses_search.span()[0]], parentheses_search.group()[1:-1]]
                 if command[0] in commands_dict:
@@ -73,11 +153,13 @@ class HBNBCommand(cmd.Cmd):
 
     def do_quit(self, line):
         """Exits the console."""
+        storage.close()
         return True
 
     def do_EOF(self, line):
         """Ends the console session."""
         print("")
+        storage.close()
         return True
 
     def do_create(self, line):
@@ -88,64 +170,224 @@ class HBNBCommand(cmd.Cmd):
         elif args[0] not in HBNBCommand.__models:
             print("** Model does not exist **")
         else:
-            print(eval(args[0])().id)
+            print(HBNBCommand.__models[args[0]]().id)
             storage.save()
 
     def do_show(self, line):
         """Displays the details of a specific model instance."""
         args = extract_arguments(line)
-        all_objects = storage.all()
         if not args:
             print("** Missing model name **")
         elif args[0] not in HBNBCommand.__models:
             print("** Model does not exist **")
         elif len(args) == 1:
             print("** Missing instance ID **")
-        elif "{}.{}".format(args[0], args[1]) not in all_objects:
+        elif storage.get(args[0], args[1]) is None:
             print("** Instance not found **")
         else:
-            print(all_objects["{}.{}".format(args[0], args[1])])
+            print(storage.get(args[0], args[1]))
 
     def do_destroy(self, line):
         """Deletes a specific model instance."""
         args = extract_arguments(line)
-        all_objects = storage.all()
         if not args:
             print("** Missing model name **")
         elif args[0] not in HBNBCommand.__models:
             print("** Model does not exist **")
         elif len(args) == 1:
             print("** Missing instance ID **")
-        elif "{}.{}".format(args[0], args[1]) not in all_objects.keys():
+        elif storage.get(args[0], args[1]) is None:
             print("** Instance not found **")
         else:
-            del all_objects["{}.{}".format(args[0], args[1])]
+            storage.delete(storage.get(args[0], args[1]))
             storage.save()
 
     def do_all(self, line):
-        """Displays all instances of a specified model or all instantiated objects."""
-        args = extract_arguments(line)
+        """Displays all instances of a specified model or all instantiated objects.
+
+        Usage: all [<class>] [--where <conditions>] [--sort <attrs>]
+                   [--limit <count>] [--offset <count>] [--after <id>]
+                   [--lines]
+        Conditions look like price_by_night<100, max_guest>=4 and need a
+        class, as does sort, which takes attributes separated by commas,
+        each prefixed by - to sort it descending. After resumes behind the
+        instance with the given id, such as the last one of a page; without
+        sort, instances then come in id order. Lines
+        prints one instance per line instead of a list.
+        """
+        text, options = split_options(line)
+        args = extract_arguments(text)
         if args and args[0] not in HBNBCommand.__models:
             print("** Model does not exist **")
+        elif not args and ("where" in options or "sort" in options):
+            print("** Missing model name **")
         else:
-            object_list = []
-            for obj in storage.all().values():
-                if args and args[0] == obj.__class__.__name__:
-                    object_list.append(obj.__str__())
-                elif not args:
-                    object_list.append(obj.__str__())
-            print(object_list)
+            query = self.__query(args[0] if args else None, options)
+            if query is not None:
+                try:
+                    objects = iter(query)
+                except ValueError as error:
+                    print("** {} **".format(error))
+                else:
+                    self.__print_all(objects, "lines" in options)
+
+    @staticmethod
+    def __print_all(objects, lines=False):
+        """Prints objects as they come, as a list or one per line.
+
+        The list is written piece by piece, so the output never has to be
+        held in memory whatever the number of objects.
+        """
+        if lines:
+            for obj in objects:
+                print(obj)
+            return
+        separator = ""
+        print("[", end="")
+        for obj in objects:
+            print(separator + repr(obj.__str__()), end="")
+            separator = ", "
+        print("]")
+
+    def do_where(self, line):
+        """Displays the instances of a model meeting some conditions.
+
+        Usage: where <class> <conditions>
+        Same as all <class> --where <conditions>.
+        """
+        name, _, conditions = line.strip().partition(" ")
+        if not name:
+            print("** Missing model name **")
+            return False
+        self.do_all("{} --where {}".format(name, conditions))
+
+    def do_group_by(self, line):
+        """Displays aggregates over the instances of a model, per value.
+
+        Usage: group_by <class> <attribute> [<aggregate> ...]
+                   [--where <conditions>]
+        Aggregates are count, count(<attr>), sum(<attr>), avg(<attr>),
+        min(<attr>) and max(<attr>); count when none is given.
+        """
+        text, options = split_options(line)
+        name, _, rest = text.strip().partition(" ")
+        terms = re.findall(r"\w+\s*\([^)]*\)|[^\s,]+", rest)
+        if not name:
+            print("** Missing model name **")
+            return False
+        if name not in HBNBCommand.__models:
+            print("** Model does not exist **")
+            return False
+        if not terms:
+            print("** Missing attribute name **")
+            return False
+        query = self.__query(name, options)
+        if query is None:
+            return False
+        try:
+            groups = query.group_by(*terms)
+        except ValueError as error:
+            print("** {} **".format(error))
+            return False
+        print(groups)
+
+    @staticmethod
+    def __query(name, options):
+        """Builds the storage query described by the options of all.
+
+        Prints the problem and gives back None if an option is wrong.
+        """
+        query = storage.query(name)
+        for option in options:
+            if option not in ("where", "sort", "limit", "offset", "after",
+                              "lines"):
+                print("** Unknown option: --{} **".format(option))
+                return None
+        if "where" in options:
+            try:
+                conditions = parse_conditions(options["where"],
+                                              HBNBCommand.__models[name])
+            except ValueError as error:
+                print("** Invalid condition: {} **".format(error))
+                return None
+            for lookup, value in conditions:
+                query = query.where(**{lookup: value})
+        if options.get("sort"):
+            query = query.order_by(*(attr.strip() for attr in
+                                     options["sort"].split(",")))
+        for option in ("limit", "offset"):
+            if option in options:
+                try:
+                    query = getattr(query, option)(int(options[option]))
+                except ValueError:
+                    print("** Invalid {} **".format(option))
+                    return None
+        if options.get("after"):
+            query = query.after(options["after"])
+        return query
 
     def do_count(self, line):
-        """Counts the number of instances of a specified model."""
+        """Counts the number of instances of a specified model.
+
+        Usage: count [<class>]
+        Without a class, prints the number of instances of every model.
+        Counts are kept by storage, so no instance is looked at.
+        """
+        args = extract_arguments(line)
+        if args:
+            print(storage.count(args[0]))
+        else:
+            print({name: storage.count(name)
+                   for name in sorted(HBNBCommand.__models)})
+
+    def do_email(self, line):
+        """Shows the user with a given email address.
+
+        Usage: email <address>
+        """
         args = extract_arguments(line)
-        count = sum(1 for obj in storage.all().values() if args[0] == obj.__class__.__name__)
-        print(count)
+        if not args:
+            print("** Missing email address **")
+            return False
+        user = storage.get_user_by_email(args[0])
+        if user is None:
+            print("** No user with that email **")
+        else:
+            print(user)
+
+    def do_near(self, line):
+        """Lists the instances nearest to a point, nearest first.
+
+        Usage: near <class> <latitude> <longitude> [km=<radius>] [n=<count>]
+        Without km or n, the 10 nearest instances are listed.
+        """
+        args = extract_arguments(line)
+        if not args:
+            print("** Missing model name **")
+            return False
+        if args[0] not in HBNBCommand.__models:
+            print("** Model does not exist **")
+            return False
+        if "latitude" not in dir(HBNBCommand.__models[args[0]]):
+            print("** Model has no coordinates **")
+            return False
+        try:
+            lat, lon = float(args[1]), float(args[2])
+            options = dict(arg.split("=", 1) for arg in args[3:])
+            km = float(options.pop("km")) if "km" in options else None
+            n = int(options.pop("n")) if "n" in options else None
+            assert not options
+        except (IndexError, ValueError, AssertionError):
+            print("** Missing coordinates **")
+            return False
+        if km is None and n is None:
+            n = 10
+        objects = storage.find_near(args[0], lat, lon, km, n)
+        print([obj.__str__() for obj in objects.values()])
 
     def do_update(self, line):
         """Updates an instance based on its ID with new attribute values."""
         args = extract_arguments(line)
-        all_objects = storage.all()
 
         if not args:
             print("** Missing model name **")
@@ -156,35 +398,41 @@ class HBNBCommand(cmd.Cmd):
         if len(args) == 1:
             print("** Missing instance ID **")
             return False
-        if "{}.{}".format(args[0], args[1]) not in all_objects.keys():
+        obj = storage.get(args[0], args[1])
+        if obj is None:
             print("** Instance not found **")
             return False
         if len(args) == 2:
             print("** Missing attribute name **")
             return False
         if len(args) == 3:
-            try:
-                assert type(eval(args[2])) != dict
-            except (NameError, AssertionError):
+            if not isinstance(literal(args[2]), dict):
                 print("** Missing value **")
                 return False
+        names = literal(args[2]) if len(args) == 3 else [args[2]]
+        for name in names:
+            if is_descriptor(obj.__class__, name):
+                print("** Attribute {} cannot be updated **".format(name))
+                return False
 
-        if len(args) == 4:
-            obj = all_objects["{}.{}".format(args[0], args[1])]
-            if args[2] in obj.__class__.__dict__:
-                valtype = type(obj.__class__.__dict__[args[2]])
-                obj.__dict__[args[2]] = valtype(args[3])
-            else:
-                obj.__dict__[args[2]] = args[3]
-        elif isinstance(eval(args[2]), dict):
-            obj = all_objects["{}.{}".format(args[0], args[1])]
-            for key, value in eval(args[2]).items():
-                if (key in obj.__class__.__dict__ and
-                        isinstance(obj.__class__.__dict__[key], (str, int, float))):
-                    valtype = type(obj.__class__.__dict__[key])
-                    obj.__dict__[key] = valtype(value)
+        try:
+            if len(args) == 4:
+                if (args[2] in obj.__class__.__dict__ and
+                        isinstance(obj.__class__.__dict__[args[2]], (str, int, float))):
+                    valtype = type(obj.__class__.__dict__[args[2]])
+                    setattr(obj, args[2], valtype(args[3]))
                 else:
-                    obj.__dict__[key] = value
+                    setattr(obj, args[2], args[3])
+            elif isinstance(literal(args[2]), dict):
+                for key, value in literal(args[2]).items():
+                    if (key in obj.__class__.__dict__ and
+                            isinstance(obj.__class__.__dict__[key], (str, int, float))):
+                        valtype = type(obj.__class__.__dict__[key])
+                        setattr(obj, key, valtype(value))
+                    else:
+                        setattr(obj, key, value)
+        except ValueError as error:
+            print("** {} **".format(error))
         storage.save()
 
 
@@ -1,8 +1,52 @@
 #!/usr/bin/python3
 """Initializes the models package."""
-from models.engine.file_storage import FileStorage
+import os
+from models.registry import classes  # Class name -> model class
 
-# Create a FileStorage instance to interface with the filesystem.
-storage = FileStorage()
-# Load existing objects from the storage file, if any.
+if os.getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    # Keep objects as rows of an SQLite database (HBNB_SQLITE_PATH).
+    storage = DBStorage(os.getenv("HBNB_SQLITE_PATH", "hbnb.db"))
+else:
+    from models.engine.file_storage import FileStorage
+    # Create a FileStorage instance to interface with the filesystem.
+    # Set HBNB_FILE_JOURNAL=1 to append changes to a journal instead of
+    # rewriting the whole file on every save, and HBNB_FSYNC_DIR=1 to also
+    # flush the directory entry after each atomic file replacement.
+    # HBNB_FILE_SHARDED=1 keeps one lazily loaded file per class instead.
+    # HBNB_RELOAD_WORKERS=<n> builds large files in n worker processes.
+    # HBNB_FILE_FORMAT=binary writes the compact binary format instead of JSON.
+    # HBNB_ASYNC_WRITES=1 writes saves from a background thread.
+    storage = FileStorage(journal=os.getenv("HBNB_FILE_JOURNAL") == "1",
+                          fsync_dir=os.getenv("HBNB_FSYNC_DIR") == "1",
+                          sharded=os.getenv("HBNB_FILE_SHARDED") == "1",
+                          workers=int(os.getenv("HBNB_RELOAD_WORKERS", "1")),
+                          fmt=os.getenv("HBNB_FILE_FORMAT", "json"),
+                          async_writes=os.getenv("HBNB_ASYNC_WRITES") == "1")
+    from models.engine.indexes import GridIndex, SortedIndex, UniqueIndex
+    from models.engine.text_index import TextIndex
+    from models.city import City
+    from models.place import Place
+    from models.review import Review
+    from models.user import User
+    # Keep the numeric filters of the listing page ordered, so ranges such
+    # as storage.find_range(Place, "price_by_night", 100, 200) use bisection.
+    for attr in ("price_by_night", "number_rooms", "number_bathrooms",
+                 "max_guest"):
+        storage.add_index(Place, attr, SortedIndex)
+    # File Places on a coordinate grid for storage.find_near() and find_box().
+    storage.add_index(Place, GridIndex.COORDINATES, GridIndex)
+    # Index the words of Place names and descriptions and of Review texts
+    # for storage.search(); close() keeps them in file.json.idx.
+    storage.add_index(Place, ("name", "description"), TextIndex)
+    storage.add_index(Review, "text", TextIndex)
+    # Serve state.cities, city.places, place.reviews, user.places and
+    # user.reviews from the foreign keys pointing back at their owner.
+    for cls, attr in ((City, "state_id"), (Place, "city_id"),
+                      (Place, "user_id"), (Review, "place_id"),
+                      (Review, "user_id")):
+        storage.add_index(cls, attr)
+    # No two Users may share an email; storage.get_user_by_email() is O(1).
+    storage.add_index(User, "email", UniqueIndex)
+# Load existing objects from storage, if any.
 storage.reload()
@@ -4,9 +4,44 @@ import models
 from uuid import uuid4
 from datetime import datetime
 
+_missing = object()  # Stands for an attribute not set on the instance
+
+
+class Timestamp:
+    """Attribute holding a datetime that may still be stored as text.
+
+    Objects built by from_dict() keep created_at and updated_at as the
+    ISO 8601 strings they were saved as, since most are never read. The
+    first read parses the string and keeps the datetime in its place.
+    """
+
+    def __set_name__(self, owner, name):
+        """Remembers the name of the attribute."""
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        """Gives back the datetime, parsing it first if it is still text."""
+        if obj is None:
+            return self
+        try:
+            value = obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+        if isinstance(value, str):
+            value = obj.__dict__[self.name] = datetime.fromisoformat(value)
+        return value
+
+    def __set__(self, obj, value):
+        """Stores value in the instance dictionary."""
+        obj.__dict__[self.name] = value
+
+
 class BaseModel:
     """Defines the base model for the AirBnB Clone project."""
 
+    created_at = Timestamp()
+    updated_at = Timestamp()
+
     def __init__(self, *args, **kwargs):
         """Initializes a new instance of BaseModel.
 
@@ -27,6 +62,52 @@ class BaseModel:
         else:
             models.storage.new(self)
 
+    @classmethod
+    def from_dict(cls, data):
+        """Builds an instance from a dictionary made by to_dict().
+
+        This is the constructor storage uses to reload objects. Unlike
+        cls(**data) it does not generate an id and timestamps only to
+        overwrite them, and sets attributes straight into __dict__ without
+        telling storage. Timestamps are kept as given; text is parsed by
+        datetime.fromisoformat() only when the attribute is first read,
+        and to_dict() hands text that was never read back unchanged. The
+        instance is not added to storage.
+
+        Args:
+            data (dict): Attributes by name; "__class__" is ignored.
+        """
+        obj = cls.__new__(cls)
+        attrs = obj.__dict__
+        attrs.update(data)
+        attrs.pop("__class__", None)
+        for name in ("created_at", "updated_at"):
+            if attrs.get(name) is None:
+                attrs[name] = datetime.now()
+        if "id" not in attrs:
+            attrs["id"] = str(uuid4())
+        return obj
+
+    def __setattr__(self, name, value):
+        """Sets an attribute and marks the instance as changed in storage.
+
+        Storage is told whether the value changed, so constraints on the
+        attribute are only checked for a new value. If storage refuses the
+        new value, or fails to index it, the old one is put back.
+        """
+        old = self.__dict__.get(name, _missing)
+        super().__setattr__(name, value)
+        changed = old is _missing or type(old) is not type(value) or \
+            old != value
+        try:
+            models.storage.touch(self, (name,) if changed else ())
+        except Exception:
+            if old is _missing:
+                super().__delattr__(name)
+            else:
+                super().__setattr__(name, old)
+            raise
+
     def save(self):
         """Records the current time as updated_at and saves to storage."""
         self.updated_at = datetime.now()
@@ -36,14 +117,19 @@ class BaseModel:
         """Converts the BaseModel instance into a dictionary.
 
         This includes the special key '__class__' to note the object's class name.
+        Timestamps that were never read are still text and are copied as is.
         """
         dict_representation = self.__dict__.copy()
-        dict_representation["created_at"] = self.created_at.isoformat()
-        dict_representation["updated_at"] = self.updated_at.isoformat()
+        for name in ("created_at", "updated_at"):
+            value = dict_representation[name]
+            if not isinstance(value, str):
+                dict_representation[name] = value.isoformat()
         dict_representation["__class__"] = type(self).__name__
         return dict_representation
 
     def __str__(self):
         """Generates a string representation of the BaseModel instance."""
         class_name = type(self).__name__
+        for name in ("created_at", "updated_at"):
+            getattr(self, name, None)  # Parse timestamps still held as text
         return "[{}] ({}) {}".format(class_name, self.id, self.__dict__)
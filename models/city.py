@@ -1,6 +1,8 @@
 #!/usr/bin/python3
 """Module for City class definition."""
+import models
 from models.base_model import BaseModel
+from models.place import Place
 
 class City(BaseModel):
     """Defines the attributes of a city.
@@ -12,3 +14,8 @@ class City(BaseModel):
 
     state_id = ""
     name = ""
+
+    @property
+    def places(self):
+        """List the places in this city."""
+        return list(models.storage.find(Place, "city_id", self.id).values())
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""Batching class setup."""
+
+from contextlib import contextmanager
+from time import monotonic
+
+
+class Batching:
+    """Mixin letting a storage coalesce many save() calls into one write.
+
+    Inside a batch() block save() only counts the call. The changes are
+    written once when the outermost block exits, or earlier when one of
+    the auto-flush limits is reached. The time limit is checked whenever
+    save() is called, so no write ever runs behind the caller's back.
+
+    Parts:
+        __depth (int): Number of batch() blocks currently open.
+        __pending (int): save() calls deferred since the last write.
+        __limits (tuple): Deferred saves and milliseconds allowed before
+            an automatic write, None meaning no limit.
+        __since (float): Time of the last write, from time.monotonic().
+    """
+    __depth = 0
+    __pending = 0
+    __limits = (None, None)
+    __since = 0.0
+
+    @contextmanager
+    def batch(self, max_pending=None, max_delay_ms=None):
+        """Defer save() calls made inside the block to a single write.
+
+        Args:
+            max_pending (int): Write as soon as this many saves are deferred.
+            max_delay_ms (float): Write once this many milliseconds have
+                passed since the last write.
+        """
+        outer = self.__depth == 0
+        if outer:
+            self.__limits = (max_pending, max_delay_ms)
+            self.__pending = 0
+            self.__since = monotonic()
+        self.__depth += 1
+        try:
+            yield self
+        finally:
+            self.__depth -= 1
+            if outer and self.__pending:
+                self.flush()
+
+    def _deferred(self):
+        """Tell save() whether to only record the call, flushing on a limit."""
+        if not self.__depth:
+            return False
+        self.__pending += 1
+        max_pending, max_delay_ms = self.__limits
+        if (max_pending is not None and self.__pending >= max_pending) or \
+                (max_delay_ms is not None and
+                 (monotonic() - self.__since) * 1000 >= max_delay_ms):
+            self.flush()
+        return True
+
+    def flush(self):
+        """Write everything deferred by batch() right away."""
+        depth, self.__depth = self.__depth, 0
+        try:
+            self.save()
+        finally:
+            self.__depth = depth
+        self.__pending = 0
+        self.__since = monotonic()
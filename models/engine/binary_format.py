@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+"""Compact binary storage format and converters to and from JSON.
+
+A binary storage file starts with MAGIC and is followed by frames. Each
+frame is a one byte tag, a four byte little-endian payload length and the
+payload:
+
+    S  schema:  JSON ["ClassName", ["field", ...]], numbered from 0 in
+                the order schemas appear in the file.
+    B  block:   four byte schema number, then a JSON array with one row
+                per record, each row holding the values of that schema's
+                fields in order.
+
+Field names are written once per schema instead of once per record, and
+a schema always appears before the first block that uses it, so a file
+can be read front to back in a single pass. Grouping up to BLOCK records
+per frame lets a whole block be decoded by a single json.loads() call.
+"""
+import json
+import struct
+import sys
+from models.engine.json_stream import iter_items
+
+MAGIC = b"\x89HBNB\x01\r\n"
+_frame = struct.Struct("<cI")
+_number = struct.Struct("<I")
+BLOCK = 512  # Most records in one block frame
+
+
+def encode(record):
+    """Encode a stored dictionary as a (schema, payload) pair.
+
+    Args:
+        record (dict): Dictionary from to_dict(), with its '__class__'.
+
+    Returns:
+        tuple: ((class name, field names), JSON array of the values).
+    """
+    fields = tuple(k for k in record if k != "__class__")
+    payload = json.dumps([record[k] for k in fields], separators=(",", ":"))
+    return (record["__class__"], fields), payload.encode()
+
+
+def document(segments):
+    """Join encoded (schema, payload) pairs into the bytes of a file."""
+    schemas = {}
+    parts = [MAGIC]
+    run, run_schema = [], None
+
+    def flush():
+        """Write the pending run of same-schema rows as one block."""
+        number = schemas.get(run_schema)
+        if number is None:
+            number = schemas[run_schema] = len(schemas)
+            text = json.dumps([run_schema[0], list(run_schema[1])]).encode()
+            parts.append(_frame.pack(b"S", len(text)))
+            parts.append(text)
+        block = b"[" + b",".join(run) + b"]"
+        parts.append(_frame.pack(b"B", len(block) + 4))
+        parts.append(_number.pack(number))
+        parts.append(block)
+        run.clear()
+
+    for schema, payload in segments:
+        if run and (schema != run_schema or len(run) == BLOCK):
+            flush()
+        run_schema = schema
+        run.append(payload)
+    if run:
+        flush()
+    return b"".join(parts)
+
+
+def is_binary(path):
+    """Tell whether the file at path starts with the binary MAGIC."""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def iter_records(f, chunk_size=1 << 20):
+    """Yield the stored dictionaries of a binary file one at a time.
+
+    Args:
+        f (file): Binary file positioned at the start of the file.
+        chunk_size (int): Bytes to read at a time.
+
+    Raises:
+        ValueError: If the file is not a complete binary storage file.
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a binary storage file")
+    schemas = []
+    buf, pos = b"", 0
+    while True:
+        end = pos + _frame.size
+        if end <= len(buf):
+            tag, size = _frame.unpack_from(buf, pos)
+            end += size
+        if end > len(buf):
+            chunk = f.read(max(chunk_size, end - len(buf)))
+            if not chunk:
+                if pos == len(buf):
+                    return
+                raise ValueError("Binary storage file is truncated")
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        start, pos = pos + _frame.size, end
+        if tag == b"B":
+            name, fields = schemas[_number.unpack_from(buf, start)[0]]
+            for row in json.loads(buf[start + 4:end]):
+                record = dict(zip(fields, row))
+                record["__class__"] = name
+                yield record
+        elif tag == b"S":
+            schemas.append(json.loads(buf[start:end]))
+        else:
+            raise ValueError("Unknown frame {!r}".format(tag))
+
+
+def convert(src, dst):
+    """Convert a storage file between the JSON and binary formats.
+
+    The format of src is detected from its first bytes, and dst is written
+    in the other one.
+
+    Returns:
+        str: The format written, "json" or "binary".
+    """
+    if is_binary(src):
+        with open(src, 'rb') as f, open(dst, 'w') as out:
+            out.write("{")
+            for i, record in enumerate(iter_records(f)):
+                key = "{}.{}".format(record["__class__"], record["id"])
+                out.write("{}\n{}: {}".format("," if i else "", json.dumps(key),
+                                               json.dumps(record)))
+            out.write("\n}")
+        return "json"
+    with open(src) as f, open(dst, 'wb') as out:
+        out.write(document(encode(record) for _, record in iter_items(f)))
+    return "binary"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python3 -m models.engine.binary_format <src> <dst>")
+        sys.exit(1)
+    print("Wrote {} file {}".format(convert(sys.argv[1], sys.argv[2]),
+                                    sys.argv[2]))
@@ -0,0 +1,334 @@
+#!/usr/bin/python3
+"""DBStorage class setup."""
+
+import json
+import sqlite3
+import warnings
+from models.engine.batching import Batching
+from models.engine.indexes import GridIndex, SortedIndex, UniqueIndex
+from models.engine.query import Query
+from models.registry import classes
+from models.user import User
+
+class DBStorage(Batching):
+    """Class for saving and loading objects in an SQLite database.
+
+    Every object is one row keyed by (class, id), so saving writes only the
+    rows that changed, inside one transaction, and looking up a single
+    object reads a single row. Rows are turned into objects the first time
+    their class, or the object itself, is asked for.
+
+    No two Users may share an email. A unique expression index on the
+    email of User rows answers lookups and checks with a single indexed
+    SELECT, and a UniqueIndex covers the Users held in memory.
+
+    Parts:
+        __path (str): Database file.
+        __connection (sqlite3.Connection): Open database connection.
+        __objects (dict): Objects loaded or created so far.
+        __dirty (dict): Keys changed since the last save, mapped to
+            "set" or "del".
+        __loaded (set): Classes whose rows are all in __objects.
+        __counts (dict): Class name -> number of its objects in __objects.
+        __emails (UniqueIndex): The Users in __objects, by email.
+    """
+    __path = None
+    __connection = None
+    __objects = None
+    __dirty = None
+    __loaded = None
+    __counts = None
+    __emails = None
+    EMAIL = "NULLIF(json_extract(data, '$.email'), '')"  # Indexed in SQL
+
+    def __init__(self, path="hbnb.db"):
+        """Set up the storage.
+
+        Args:
+            path (str): Database file, created if it does not exist.
+        """
+        self.__path = path
+        self.__objects = {}
+        self.__dirty = {}
+        self.__loaded = set()
+        self.__counts = {}
+        self.__emails = UniqueIndex("email")
+
+    def all(self, cls=None):
+        """Give back all objects, or only those of the class cls.
+
+        Args:
+            cls (type or str): Class, or class name, to restrict to.
+        """
+        if cls is None:
+            loaded = list(self.__loaded)
+            rows = self.__connection.execute(
+                "SELECT cls, id, data FROM objects WHERE cls NOT IN ({})"
+                .format(", ".join("?" * len(loaded))), loaded)
+            for name, id, data in rows:
+                self.__adopt(name, id, data)
+                self.__loaded.add(name)
+            return self.__objects
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name not in self.__loaded:
+            rows = self.__connection.execute(
+                "SELECT id, data FROM objects WHERE cls = ?", (name,))
+            for id, data in rows:
+                self.__adopt(name, id, data)
+            self.__loaded.add(name)
+        return {k: v for k, v in self.__objects.items()
+                if v.__class__.__name__ == name}
+
+    def count(self, cls=None):
+        """Number of objects stored, or of objects of the class cls.
+
+        A loaded class is counted from a running total. Otherwise the
+        database counts the rows, unless the class has unsaved changes,
+        in which case its rows are loaded first.
+        """
+        if cls is None:
+            names = {row[0] for row in self.__connection.execute(
+                "SELECT DISTINCT cls FROM objects")}
+            return sum(self.count(name) for name in names | set(self.__counts))
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name not in self.__loaded:
+            prefix = name + "."
+            if not any(key.startswith(prefix) for key in self.__dirty):
+                return self.__connection.execute(
+                    "SELECT COUNT(*) FROM objects WHERE cls = ?",
+                    (name,)).fetchone()[0]
+            self.all(name)
+        return self.__counts.get(name, 0)
+
+    def find(self, cls, attr, value):
+        """Give back the objects of class cls whose attr equals value."""
+        return {k: v for k, v in self.all(cls).items()
+                if getattr(v, attr, None) == value}
+
+    def find_range(self, cls, attr, lo=None, hi=None, **options):
+        """Give back the objects of class cls with attr between lo and hi.
+
+        The objects of the class are scanned and sorted on every call. The
+        options are those of SortedIndex.range().
+
+        Returns:
+            dict: key -> object, ordered by attr.
+        """
+        return self.__build(cls, attr, SortedIndex).range(lo, hi, **options)
+
+    def find_box(self, cls, south, west, north, east):
+        """Give back the objects of class cls inside a bounding box.
+
+        Positions are read from latitude and longitude by scanning the
+        objects of the class. See GridIndex.box().
+        """
+        return self.__build(cls, GridIndex.COORDINATES, GridIndex) \
+            .box(south, west, north, east)
+
+    def find_near(self, cls, lat, lon, km=None, n=None):
+        """Give back the objects of class cls within km of a point.
+
+        The objects of the class are scanned; see GridIndex.near() for the
+        arguments.
+
+        Returns:
+            dict: key -> object, nearest first.
+        """
+        return self.__build(cls, GridIndex.COORDINATES, GridIndex) \
+            .near(lat, lon, km, n)
+
+    def get_user_by_email(self, email):
+        """Give back the User whose email is email, or None.
+
+        Users in memory are looked up in __emails, and other Users through
+        the email index of the database.
+        """
+        if not email:
+            return None
+        user = self.__emails.get(email)
+        if user is None:
+            id = self.__email_row(email)
+            if id is not None:
+                user = self.get(User, id)
+        return user
+
+    def query(self, cls):
+        """Start a Query over the objects of class cls, read by scanning."""
+        return Query(self, cls)
+
+    def get(self, cls, id):
+        """Give back the object of class cls with the given id, or None."""
+        name = cls if isinstance(cls, str) else cls.__name__
+        key = f"{name}.{id}"
+        if key in self.__objects or name in self.__loaded or \
+                self.__dirty.get(key) == "del":
+            return self.__objects.get(key)
+        row = self.__connection.execute(
+            "SELECT data FROM objects WHERE cls = ? AND id = ?",
+            (name, id)).fetchone()
+        if row is not None:
+            self.__adopt(name, id, row[0])
+        return self.__objects.get(key)
+
+    def new(self, obj):
+        """Add new object with its key.
+
+        Raises:
+            ValueError: If another User already has its email.
+        """
+        name = obj.__class__.__name__
+        key = f"{name}.{obj.id}"
+        if isinstance(obj, User):
+            self.__check_email(key, obj)
+            self.__emails.add(key, obj)
+        if key not in self.__objects:
+            self.__counts[name] = self.__counts.get(name, 0) + 1
+        self.__objects[key] = obj
+        self.__dirty[key] = "set"
+
+    def touch(self, obj, attrs=None):
+        """Mark a stored object as changed since the last save.
+
+        Args:
+            obj (BaseModel): The changed object.
+            attrs (iterable): Names of the attributes given a new value, or
+                None if not known. The email of a User is only checked when
+                it is one of them.
+
+        Raises:
+            ValueError: If another User already has its new email; nothing
+                is marked then.
+        """
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        if self.__objects.get(key) is obj:
+            if isinstance(obj, User) and (attrs is None or "email" in attrs):
+                self.__check_email(key, obj)
+                self.__emails.add(key, obj)
+            self.__dirty[key] = "set"
+
+    def delete(self, obj):
+        """Remove an object from storage if it is there."""
+        name = obj.__class__.__name__
+        key = f"{name}.{obj.id}"
+        if self.__objects.pop(key, None) is not None:
+            self.__counts[name] -= 1
+        self.__emails.discard(key)
+        self.__dirty[key] = "del"
+
+    def save(self):
+        """Write the changed objects' rows in a single transaction.
+
+        The old rows of every changed key are deleted before the new ones
+        are inserted, so Users may swap emails within one save. If the
+        database refuses the rows, the changes stay pending. Nothing is
+        written when nothing changed.
+        """
+        if self._deferred() or not self.__dirty:
+            return
+        dirty, self.__dirty = self.__dirty, {}
+        upserts, keys = [], []
+        for key, op in dirty.items():
+            name, id = key.split(".", 1)
+            obj = self.__objects.get(key)
+            if op == "set" and obj is not None:
+                upserts.append((name, id, json.dumps(obj.to_dict())))
+            keys.append((name, id))
+        try:
+            with self.__connection:
+                self.__connection.executemany(
+                    "DELETE FROM objects WHERE cls = ? AND id = ?", keys)
+                self.__connection.executemany(
+                    "INSERT INTO objects VALUES (?, ?, ?)", upserts)
+        except sqlite3.IntegrityError:
+            dirty.update(self.__dirty)
+            self.__dirty = dirty
+            raise
+
+    def reload(self):
+        """Open the database, creating its table, and forget loaded rows."""
+        if self.__connection is None:
+            self.__connection = sqlite3.connect(self.__path)
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS objects (cls TEXT NOT NULL, "
+                "id TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (cls, id)) "
+                "WITHOUT ROWID")
+            self.__index_emails()
+        self.__objects = {}
+        self.__dirty = {}
+        self.__loaded = set()
+        self.__counts = {}
+        self.__emails = UniqueIndex("email")
+
+    def close(self):
+        """Write pending changes and close the database connection."""
+        if self.__connection is not None:
+            if self.__dirty:
+                self.flush()
+            self.__connection.close()
+            self.__connection = None
+
+    def __adopt(self, name, id, data):
+        """Build a row's object unless it is already loaded or deleted."""
+        key = f"{name}.{id}"
+        if key not in self.__objects and self.__dirty.get(key) != "del":
+            obj = classes[name].from_dict(json.loads(data))
+            self.__objects[key] = obj
+            self.__counts[name] = self.__counts.get(name, 0) + 1
+            if name == "User":
+                try:
+                    self.__emails.add(key, obj)
+                except ValueError as error:
+                    warnings.warn("{}; {} is left out of the index".format(
+                        error, key))
+
+    def __build(self, cls, attr, kind):
+        """Give back a throwaway index of the given kind over cls."""
+        index = kind(attr)
+        index.rebuild(self.all(cls).items())
+        return index
+
+    def __check_email(self, key, obj):
+        """Refuse a User whose email another User already has.
+
+        Users in memory are checked by __emails; a row counts only when its
+        User is not in memory, where its email may have changed since.
+        """
+        self.__emails.check(key, obj)
+        email = getattr(obj, "email", None)
+        id = self.__email_row(email)
+        if id is not None and "User." + id != key:
+            raise ValueError("email {!r} is already used by User.{}".format(
+                email, id))
+
+    def __email_row(self, email):
+        """Give back the id of the User row holding email, or None.
+
+        Rows whose User is in memory, or deleted, are skipped: __emails
+        answers for those.
+        """
+        if not isinstance(email, str) or not email:
+            return None
+        rows = self.__connection.execute(
+            "SELECT id FROM objects WHERE cls = 'User' AND {} = ?"
+            .format(self.EMAIL), (email,))
+        for id, in rows:
+            key = "User." + id
+            if key not in self.__objects and key not in self.__dirty:
+                return id
+        return None
+
+    def __index_emails(self):
+        """Create the unique index on the email of User rows.
+
+        A database already holding two Users with one email gets a plain
+        index instead, and a warning.
+        """
+        sql = "CREATE {} INDEX IF NOT EXISTS user_email ON objects ({}) " \
+            "WHERE cls = 'User'"
+        try:
+            self.__connection.execute(sql.format("UNIQUE", self.EMAIL))
+        except sqlite3.IntegrityError:
+            warnings.warn("{} holds Users sharing an email; their emails "
+                          "are not unique".format(self.__path))
+            self.__connection.execute(sql.format("", self.EMAIL))
@@ -1,46 +1,961 @@
 #!/usr/bin/python3
 """FileStorage class setup."""
 
+import atexit
 import json
-from models.base_model import BaseModel
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from models.engine import binary_format
+from models.engine.batching import Batching
+from models.engine.indexes import GridIndex, HashIndex, SortedIndex, \
+    UniqueIndex
+from models.engine.json_stream import iter_items
+from models.engine.query import Query
+from models.engine.text_index import TextIndex
+from models.registry import classes
 from models.user import User
-from models.state import State
-from models.city import City
-from models.place import Place
-from models.amenity import Amenity
-from models.review import Review
 
-class FileStorage:
+
+def _build(obj):
+    """Create the model instance described by a stored dictionary."""
+    name = obj.pop('__class__')
+    cls = classes.get(name)
+    if cls is None:
+        raise ValueError("Unknown class {} in stored record".format(name))
+    return cls.from_dict(obj)
+
+
+def _is_record(line):
+    """Tell whether a line of a file holds one whole "key": {...} record."""
+    try:
+        record = json.loads(b"{" + line.strip().rstrip(b",") + b"}")
+    except ValueError:
+        return False
+    return len(record) == 1 and isinstance(next(iter(record.values())), dict)
+
+
+def _load_chunk(path, start, end, lines=False):
+    """Build the objects whose lines start between two offsets of a file.
+
+    Runs in a worker process during a parallel reload. Every record must sit
+    on its own line, as FileStorage writes them.
+
+    Returns:
+        list: (key, object) pairs in file order, or with lines (key, object,
+            line) triples, line being the record without its comma.
+    """
+    objects = []
+    with open(path, 'rb') as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline().strip().rstrip(b",")
+            if line in (b"", b"{", b"}", b"{}"):
+                continue
+            (key, obj), = json.loads(b"{" + line + b"}").items()
+            if key != "{}.{}".format(obj.get('__class__'), obj.get('id')):
+                raise ValueError("Record {} does not match its key".format(key))
+            if lines:
+                objects.append((key, _build(obj), line.decode()))
+            else:
+                objects.append((key, _build(obj)))
+    return objects
+
+
+class FileStorage(Batching):
     """Class for saving and loading objects.
 
+    Storage keeps track of which keys changed since the last save, so a
+    save only serializes those objects. In the default mode the file is
+    rebuilt from cached per-key segments, which reload() fills with the
+    records it reads; in journal mode the changes are appended to a log
+    next to the file instead, and the log is folded back into the file
+    once it grows past the size of the store.
+
+    In sharded mode every class is kept in its own file inside a directory
+    next to the file. A shard is only read the first time its class is
+    asked for, and a save only rewrites the shards of changed classes.
+
+    Files are never truncated in place: they are written to a temporary file
+    in the same directory, flushed to disk and renamed over the old one, so
+    a crash or a concurrent reload sees either the old or the new version.
+    Each record is written on its own line, which lets a reload split a
+    large file into chunks and build them in a pool of worker processes.
+
+    The file can also be kept in the compact binary format of
+    models.engine.binary_format; reload() recognizes it by its header, so
+    either format can be read whatever the storage is set to write.
+
+    With async_writes, save() only snapshots the changed objects and queues
+    them; a writer thread encodes and writes them in the background. Call
+    flush() to wait for the writes, and close() before exiting.
+
     Parts:
         __file_path (str): File to keep objects in.
         __objects (dict): All objects made.
+        __dirty (dict): Keys changed since the last save, mapped to
+            "set" or "del".
+        __segments (dict): Encoded form of every saved key, grouped by
+            class name.
+        __unloaded (set): Classes whose shard has not been read yet.
+        __classes (dict): The objects grouped by class name, so a class
+            is listed without looking at the others.
+        __indexes (dict): Secondary indexes declared with add_index(), by
+            class name and then by (index type, attribute).
+        __saved (dict): Index contents read from the index file, by class
+            name, with the size and mtime of the files they describe.
+        __encoded (set): Classes whose segments the writer holds in full.
+        __queue (Queue): Saves waiting for the writer thread, if any.
     """
     __file_path = "file.json"  # Where to save objects
     __objects = {}  # Holds all created objects
+    __dirty = {}  # Changes not yet written
+    __segments = {}  # Class name -> encoded record per key
+    __segments_of = None  # The objects dict the segments match, if any
+    __segments_fmt = None  # The format the segments are encoded in
+    __unloaded = set()  # Shards still on disk only
+    __classes = {}  # Class name -> {key: object}
+    __classes_of = None  # The objects dict the class index matches
+    __indexes = {}  # Class name -> {(index type, attribute): index}
+    __saved = {}  # Class name -> {"source": ..., "indexes": {label: dump}}
+    __journal_size = 0  # Records currently in the journal
+    __encoded = set()  # Classes fully present in __segments
+    __queue = None  # Saves handed to the writer thread
+    __writer = None  # The writer thread
+    __error = None  # Last error the writer ran into
+    JOURNAL_MIN = 1000  # Journal records allowed before compaction
+    CHUNK_MIN = 1 << 20  # Smallest part of a file handed to one worker
 
-    def all(self):
-        """Give back all objects."""
-        return FileStorage.__objects
+    def __init__(self, *, journal=False, fsync_dir=False, sharded=False,
+                 workers=1, fmt="json", async_writes=False):
+        """Set up the storage.
+
+        Args:
+            journal (bool): Append mutations to a log instead of rewriting
+                the whole file on each save.
+            fsync_dir (bool): Also flush the directory after renaming the
+                file, so the rename itself survives a power loss.
+            sharded (bool): Keep one lazily loaded file per class.
+            workers (int): Processes used to build objects when reloading a
+                large file; 1 reloads in this process.
+            fmt (str): Format to write, "json" or "binary".
+            async_writes (bool): Write saves from a background thread.
+        """
+        if journal and sharded:
+            raise ValueError("journal mode needs a single storage file")
+        if fmt not in ("json", "binary"):
+            raise ValueError("unknown storage format: {}".format(fmt))
+        if fmt == "binary" and sharded:
+            raise ValueError("sharded storage is written as JSON")
+        self.fmt = fmt
+        self.journal = journal
+        self.fsync_dir = fsync_dir
+        self.sharded = sharded
+        self.workers = workers
+        if async_writes:
+            self.__queue = queue.Queue()
+            self.__writer = threading.Thread(target=self.__run, daemon=True,
+                                             name="hbnb-writer")
+            self.__writer.start()
+            atexit.register(self.__stop_writer)
+
+    @property
+    def journal_path(self):
+        """Path of the append-only journal."""
+        return FileStorage.__file_path + ".log"
+
+    @property
+    def shard_dir(self):
+        """Directory holding one file per class in sharded mode."""
+        return FileStorage.__file_path + ".d"
+
+    def shard_path(self, name):
+        """Path of the shard for the class called name."""
+        return os.path.join(self.shard_dir, name + ".json")
+
+    @property
+    def index_path(self):
+        """Path of the file keeping the contents of dumpable indexes."""
+        return FileStorage.__file_path + ".idx"
+
+    def all(self, cls=None):
+        """Give back all objects, or only those of the class cls.
+
+        Args:
+            cls (type or str): Class, or class name, to restrict to.
+        """
+        if cls is None:
+            for name in list(FileStorage.__unloaded):
+                self.__load_shard(name)
+            return FileStorage.__objects
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name in FileStorage.__unloaded:
+            self.__load_shard(name)
+        return dict(self.__class_index().get(name, ()))
+
+    def count(self, cls=None):
+        """Number of objects stored, or of objects of the class cls.
+
+        Takes constant time: the class index holds the objects of each
+        class and follows every new(), delete() and reload(). Only the
+        first count of a class whose shard is not read yet reads it.
+        """
+        if cls is None:
+            return len(self.all())
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name in FileStorage.__unloaded:
+            self.__load_shard(name)
+        return len(self.__class_index().get(name, ()))
+
+    def get(self, cls, id):
+        """Give back the object of class cls with the given id, or None."""
+        name = cls if isinstance(cls, str) else cls.__name__
+        if name in FileStorage.__unloaded:
+            self.__load_shard(name)
+        return FileStorage.__objects.get(f"{name}.{id}")
 
     def new(self, obj):
-        """Add new object with its key."""
+        """Add new object with its key.
+
+        Raises:
+            ValueError: If a unique index already holds one of its values.
+        """
+        name = obj.__class__.__name__
+        if name in FileStorage.__unloaded:
+            self.__load_shard(name)
+        key = f"{name}.{obj.id}"
+        self.__add(key, obj)
+        FileStorage.__dirty[key] = "set"
+
+    def touch(self, obj, attrs=None):
+        """Mark a stored object as changed since the last save.
+
+        Args:
+            obj (BaseModel): The changed object.
+            attrs (iterable): Names of the attributes given a new value, or
+                None if not known. Only the indexes on those attributes are
+                checked and updated.
+
+        Raises:
+            ValueError: If a unique index already holds one of its new
+                values; nothing is marked or re-indexed then.
+        """
+        name = obj.__class__.__name__
+        key = f"{name}.{obj.id}"
+        if FileStorage.__objects.get(key) is obj:
+            indexes = [index for index in
+                       FileStorage.__indexes.get(name, {}).values()
+                       if attrs is None or self.__covers(index, attrs)]
+            self.__check(key, obj, indexes)
+            FileStorage.__dirty[key] = "set"
+            for index in indexes:
+                index.add(key, obj)
+
+    def delete(self, obj):
+        """Remove an object from storage if it is there."""
         key = f"{obj.__class__.__name__}.{obj.id}"
+        if self.__remove(key):
+            FileStorage.__dirty[key] = "del"
+
+    def add_index(self, cls, attr, kind=HashIndex):
+        """Declare an index on one attribute of a class and fill it.
+
+        The index is kept up to date as objects are added, changed and
+        deleted. Declaring the same index twice gives back the first one.
+
+        Args:
+            cls (type or str): Class, or class name, to index.
+            attr (str): Attribute to index.
+            kind (type): Index class, HashIndex unless given.
+        """
+        name = cls if isinstance(cls, str) else cls.__name__
+        indexes = FileStorage.__indexes.setdefault(name, {})
+        if (kind, attr) not in indexes:
+            index = kind(attr)
+            index.rebuild(self.all(name).items())
+            indexes[(kind, attr)] = index
+        return indexes[(kind, attr)]
+
+    def drop_index(self, cls, attr, kind=HashIndex):
+        """Stop maintaining an index declared with add_index()."""
+        name = cls if isinstance(cls, str) else cls.__name__
+        FileStorage.__indexes.get(name, {}).pop((kind, attr), None)
+
+    def index(self, cls, attr, kind=HashIndex):
+        """Give back the index declared on cls and attr, or None."""
+        name = cls if isinstance(cls, str) else cls.__name__
+        index = FileStorage.__indexes.get(name, {}).get((kind, attr))
+        if index is not None:
+            self.__class_index()
+            if name in FileStorage.__unloaded:
+                self.__load_shard(name)
+        return index
+
+    def find(self, cls, attr, value):
+        """Give back the objects of class cls whose attr equals value.
+
+        Uses the hash index on cls and attr when one is declared, and
+        scans the objects of the class otherwise.
+
+        Returns:
+            dict: key -> object.
+        """
+        index = self.index(cls, attr)
+        if index is not None:
+            return index.find(value)
+        return {k: v for k, v in self.all(cls).items()
+                if getattr(v, attr, None) == value}
+
+    def find_range(self, cls, attr, lo=None, hi=None, **options):
+        """Give back the objects of class cls with attr between lo and hi.
+
+        Uses the SortedIndex on cls and attr when one is declared, and
+        scans and sorts the objects of the class otherwise. The options
+        are those of SortedIndex.range().
+
+        Returns:
+            dict: key -> object, ordered by attr.
+        """
+        return self.__index_or_build(cls, attr, SortedIndex).range(
+            lo, hi, **options)
+
+    def find_box(self, cls, south, west, north, east):
+        """Give back the objects of class cls inside a bounding box.
+
+        Positions are read from latitude and longitude, through the
+        GridIndex on them when one is declared. See GridIndex.box().
+        """
+        return self.__index_or_build(cls, GridIndex.COORDINATES, GridIndex) \
+            .box(south, west, north, east)
+
+    def find_near(self, cls, lat, lon, km=None, n=None):
+        """Give back the objects of class cls within km of a point.
+
+        With n, only the n nearest are given back, and km may be left out
+        to get the n nearest at any distance. See GridIndex.near().
+
+        Returns:
+            dict: key -> object, nearest first.
+        """
+        return self.__index_or_build(cls, GridIndex.COORDINATES, GridIndex) \
+            .near(lat, lon, km, n)
+
+    def get_user_by_email(self, email):
+        """Give back the User whose email is email, or None.
+
+        Uses the UniqueIndex on User.email when one is declared, so the
+        lookup takes constant time however many objects are stored.
+        """
+        index = self.index(User, "email", UniqueIndex)
+        if index is not None:
+            return index.get(email)
+        found = self.find(User, "email", email) if email else {}
+        return next(iter(found.values()), None)
+
+    def search(self, cls, query, mode="and", limit=None):
+        """Give back the objects of class cls whose text matches query.
+
+        Uses the TextIndex declared on cls; see TextIndex.search() for the
+        arguments.
+
+        Returns:
+            dict: key -> object, best match first.
+        """
+        name = cls if isinstance(cls, str) else cls.__name__
+        for kind, attr in FileStorage.__indexes.get(name, {}):
+            if kind is TextIndex:
+                return self.index(name, attr, TextIndex).search(
+                    query, mode, limit)
+        raise ValueError("no text index on {}".format(name))
+
+    def query(self, cls):
+        """Start a Query over the objects of class cls.
+
+        The query reads through the indexes declared with add_index()
+        when they make it cheaper; see models.engine.query.
+        """
+        return Query(self, cls)
+
+    def __index_or_build(self, cls, attr, kind):
+        """Give back the declared index, or a throwaway one over cls."""
+        index = self.index(cls, attr, kind)
+        if index is None:
+            index = kind(attr)
+            index.rebuild(self.all(cls).items())
+        return index
+
+    def __class_index(self):
+        """Give back the class index, rebuilt if __objects was replaced."""
+        if FileStorage.__classes_of is not FileStorage.__objects:
+            groups = {}
+            for key, obj in FileStorage.__objects.items():
+                groups.setdefault(key.split(".", 1)[0], {})[key] = obj
+            FileStorage.__classes = groups
+            FileStorage.__classes_of = FileStorage.__objects
+            for name in FileStorage.__indexes:
+                self.__rebuild_indexes(name)
+        return FileStorage.__classes
+
+    def __rebuild_indexes(self, name, source=None):
+        """Refill the secondary indexes of one class from scratch.
+
+        Indexes that can load() take their contents from the index file
+        instead when it was written for the same source files.
+        """
+        items = self.__class_index().get(name, {}).items()
+        saved = FileStorage.__saved.get(name)
+        if source is None or saved is None or saved["source"] != source:
+            saved = {"indexes": {}}
+        for (kind, attr), index in FileStorage.__indexes.get(name, {}).items():
+            dump = saved["indexes"].get(self.__label(kind, attr))
+            if dump is not None and hasattr(index, "load"):
+                index.load(dump, items)
+            else:
+                index.rebuild(items)
+
+    @staticmethod
+    def __label(kind, attr):
+        """Name an index by its type and attributes in the index file."""
+        attrs = (attr,) if isinstance(attr, str) else attr
+        return "{}:{}".format(kind.__name__, ",".join(attrs))
+
+    def __source(self, name=None):
+        """Size and mtime of the files the objects of a class load from."""
+        if self.sharded:
+            paths = [self.shard_path(name)]
+        else:
+            paths = [FileStorage.__file_path, self.journal_path]
+        source = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                source.append([stat.st_size, stat.st_mtime_ns])
+            except FileNotFoundError:
+                source.append(None)
+        return source
+
+    def __dumps(self, name):
+        """Dumps of the non-empty indexes of one class that can be saved."""
+        return {self.__label(kind, attr): index.dump()
+                for (kind, attr), index in
+                FileStorage.__indexes.get(name, {}).items()
+                if hasattr(index, "dump") and len(index)}
+
+    def __save_indexes(self):
+        """Write the dumpable indexes next to the storage file.
+
+        Must run when storage holds no unsaved change, so each dump is
+        stored with the size and mtime of the files holding the same
+        objects. The file is left alone when it already says the same.
+        """
+        saved = {}
+        for name in FileStorage.__indexes:
+            if name in FileStorage.__unloaded:
+                if name in FileStorage.__saved:
+                    saved[name] = FileStorage.__saved[name]
+                continue
+            dumps = self.__dumps(name)
+            if dumps:
+                saved[name] = {"source": self.__source(name),
+                               "indexes": dumps}
+        if saved == FileStorage.__saved:
+            return
+        if saved:
+            self.__replace(self.index_path, json.dumps(saved))
+        elif os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        FileStorage.__saved = saved
+
+    def __read_saved_indexes(self):
+        """Read the index file written by an earlier close(), if any."""
+        try:
+            with open(self.index_path) as f:
+                FileStorage.__saved = json.load(f)
+        except (OSError, ValueError):
+            FileStorage.__saved = {}
+
+    @contextmanager
+    def __bulk(self, names=None, source=None):
+        """Leave secondary indexes alone inside the block, then refill them.
+
+        Adding objects one by one costs a SortedIndex O(n) each, so loads
+        rebuild every index in one pass at the end instead.
+
+        Args:
+            names (list): Classes to refill, None for all of them.
+            source (list): What __source() gave for the files being loaded,
+                so saved index contents for them can be used.
+        """
+        indexes, FileStorage.__indexes = FileStorage.__indexes, {}
+        try:
+            yield
+        finally:
+            FileStorage.__indexes = indexes
+            for name in indexes if names is None else names:
+                self.__rebuild_indexes(name, source)
+
+    @staticmethod
+    def __covers(index, attrs):
+        """Tell whether index reads one of the attributes named in attrs."""
+        indexed = getattr(index, "attr", None)
+        if indexed is None:
+            return True
+        indexed = (indexed,) if isinstance(indexed, str) else indexed
+        return any(attr in indexed for attr in attrs)
+
+    @staticmethod
+    def __check(key, obj, indexes):
+        """Let the indexes that enforce a constraint refuse obj."""
+        for index in indexes:
+            if hasattr(index, "check"):
+                index.check(key, obj)
+
+    def __add(self, key, obj):
+        """Store obj under key and in the indexes of its class."""
+        groups = self.__class_index()
+        name = key.split(".", 1)[0]
+        self.__check(key, obj, FileStorage.__indexes.get(name, {}).values())
         FileStorage.__objects[key] = obj
+        groups.setdefault(name, {})[key] = obj
+        for index in FileStorage.__indexes.get(name, {}).values():
+            index.add(key, obj)
+
+    def __remove(self, key):
+        """Drop key from storage and its indexes; tell if it was there."""
+        groups = self.__class_index()
+        if FileStorage.__objects.pop(key, None) is None:
+            return False
+        name = key.split(".", 1)[0]
+        group = groups.get(name, {})
+        group.pop(key, None)
+        if not group:
+            groups.pop(name, None)
+        for index in FileStorage.__indexes.get(name, {}).values():
+            index.discard(key)
+        return True
+
+    def __changes(self):
+        """Take the dirty keys as (key, dict or None for a delete) pairs."""
+        dirty, FileStorage.__dirty = FileStorage.__dirty, {}
+        for key, op in dirty.items():
+            obj = FileStorage.__objects.get(key)
+            if op == "set" and obj is not None:
+                yield key, obj.to_dict()
+            else:
+                yield key, None
 
     def save(self):
-        """Turn objects into JSON and save."""
-        with open(FileStorage.__file_path, 'w') as f:
-            json.dump({k: v.to_dict() for k, v in FileStorage.__objects.items()}, f)
+        """Snapshot the changed objects and write them.
 
-    def reload(self):
-        """Load objects from JSON file if it's there."""
+        Only the dirty objects are turned into dictionaries here. Encoding
+        and writing them happens right away, or on the writer thread when
+        the storage writes asynchronously. Nothing is written when nothing
+        changed since the last save, unless the file no longer matches the
+        objects held, as after they are replaced.
+        """
+        if self._deferred():
+            return
+        reset = FileStorage.__segments_of is not FileStorage.__objects or \
+            FileStorage.__segments_fmt != self.fmt
+        if not FileStorage.__dirty and \
+                (not reset or self.journal or self.sharded):
+            return
+        if reset:
+            FileStorage.__segments_of = FileStorage.__objects
+            FileStorage.__segments_fmt = self.fmt
+            FileStorage.__encoded = set()
+        changes = list(self.__changes())
+        if self.journal:
+            FileStorage.__journal_size += len(changes)
+            limit = max(FileStorage.JOURNAL_MIN, len(FileStorage.__objects))
+            self.__submit(reset, FileStorage.__journal_size > limit, changes)
+            # Appends leave the cached segments behind the journal.
+            FileStorage.__segments_of = None
+        else:
+            self.__submit(reset, reset and not self.sharded, changes)
+
+    def compact(self):
+        """Serialize every object to storage and empty the journal."""
+        FileStorage.__dirty = {}
+        FileStorage.__segments_of = FileStorage.__objects
+        FileStorage.__segments_fmt = self.fmt
+        self.__submit(True, True, [])
+
+    def __submit(self, reset, compact, changes):
+        """Add the dictionaries the writer lacks to a save and hand it over.
+
+        The writer keeps the encoded segments of the classes listed in
+        __encoded. A compaction needs every object; otherwise only classes
+        touched by this save and missing from the writer are snapshotted.
+        """
+        if compact:
+            full = {}
+            for key, obj in self.all().items():
+                full.setdefault(obj.__class__.__name__, {})[key] = obj.to_dict()
+            FileStorage.__encoded = set(full)
+            FileStorage.__journal_size = 0
+            changes = []
+        elif self.journal:
+            full = {}
+        else:
+            missing = {key.split(".", 1)[0] for key, _ in changes} - \
+                FileStorage.__encoded
+            full = {name: {k: v.to_dict() for k, v in self.all(name).items()}
+                    for name in missing}
+            FileStorage.__encoded |= missing
+        job = (reset or compact, compact, full, changes)
+        if self.__queue is None:
+            result = self.__apply(*job)
+            if result is not None:
+                self.__persist(*result)
+        else:
+            self.__raise_writer_error()
+            self.__queue.put(job)
+
+    def __apply(self, reset, compact, full, changes):
+        """Bring the cached segments up to date with one save.
+
+        Returns:
+            tuple: (class names whose files must be rewritten, whether this
+            is a compaction), or None when the save went to the journal.
+        """
+        if reset:
+            FileStorage.__segments = {}
+        segments = FileStorage.__segments
+        for name, values in full.items():
+            segments[name] = {k: self.__segment(k, v) for k, v in values.items()}
+        if self.journal and not compact:
+            self.__append_journal(changes)
+            return None
+        names = set(full)
+        for key, value in changes:
+            name = key.split(".", 1)[0]
+            if name in full:
+                continue
+            group = segments.setdefault(name, {})
+            if value is None:
+                group.pop(key, None)
+            else:
+                group[key] = self.__segment(key, value)
+            names.add(name)
+        return names, compact
+
+    def __persist(self, names, compact):
+        """Write the storage files affected by one or more saves."""
+        if not self.sharded:
+            self.__write_file()
+            return
+        if compact and os.path.isdir(self.shard_dir):
+            for entry in os.listdir(self.shard_dir):
+                if entry.endswith(".json") and \
+                        entry[:-5] not in FileStorage.__segments:
+                    os.remove(os.path.join(self.shard_dir, entry))
+        for name in names:
+            self.__write_shard(name)
+
+    def __run(self):
+        """Write queued saves until close() asks the writer to stop.
+
+        Saves queued while a write is in progress are folded into the next
+        write, so a slow disk costs one write per batch of saves.
+        """
+        pending = self.__queue
+        while True:
+            jobs = [pending.get()]
+            while not pending.empty():
+                jobs.append(pending.get_nowait())
+            try:
+                names, compact, write = set(), False, False
+                for job in jobs:
+                    if job is None:
+                        continue
+                    result = self.__apply(*job)
+                    if result is not None:
+                        names |= result[0]
+                        compact = compact or result[1]
+                        write = True
+                if write:
+                    self.__persist(names, compact)
+            except Exception as error:
+                self.__error = error
+            finally:
+                for _ in jobs:
+                    pending.task_done()
+            if None in jobs:
+                return
+
+    def __raise_writer_error(self):
+        """Re-raise, once, an error the writer thread ran into."""
+        error, self.__error = self.__error, None
+        if error is not None:
+            raise error
+
+    def flush(self):
+        """Write everything saved so far and wait until it is on disk."""
+        super().flush()
+        if self.__queue is not None:
+            self.__queue.join()
+            self.__raise_writer_error()
+
+    def close(self):
+        """Write pending changes and stop the writer thread, if any.
+
+        Nothing is written when nothing changed. The contents of dumpable
+        indexes, such as text indexes, are written next to the storage
+        file as well, for the next reload() to use.
+        """
+        if FileStorage.__dirty:
+            self.flush()
+        elif self.__queue is not None:
+            self.__queue.join()
+        self.__stop_writer()
+        atexit.unregister(self.__stop_writer)
+        self.__raise_writer_error()
+        dumpable = any(self.__dumps(name) for name in FileStorage.__indexes
+                       if name not in FileStorage.__unloaded)
+        if dumpable or FileStorage.__saved:
+            self.__save_indexes()
+
+    def __stop_writer(self):
+        """Let the writer thread finish the saves queued so far and stop.
+
+        Also runs at exit for storages never closed; saves that were never
+        asked for are not written then.
+        """
+        if self.__queue is not None:
+            self.__queue.put(None)
+            self.__writer.join()
+            self.__queue = self.__writer = None
+
+    def __append_journal(self, changes):
+        """Append one record per changed key to the journal."""
+        with open(self.journal_path, 'a') as f:
+            for key, value in changes:
+                if value is None:
+                    record = {"op": "del", "key": key}
+                else:
+                    record = {"op": "set", "key": key, "obj": value}
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __segment(self, key, value):
+        """Encode one key/value pair the way it appears in the file."""
+        if self.fmt == "binary":
+            return binary_format.encode(value)
+        return json.dumps(key) + ": " + json.dumps(value)
+
+    @staticmethod
+    def __document(segments):
+        """Join segments into a JSON object with one record per line."""
+        text = ",\n".join(segments)
+        return "{\n" + text + "\n}" if text else "{}"
+
+    def __write_file(self):
+        """Write the cached segments to the file and empty the journal."""
+        document = binary_format.document if self.fmt == "binary" \
+            else self.__document
+        self.__replace(FileStorage.__file_path, document(
+            segment for segments in FileStorage.__segments.values()
+            for segment in segments.values()))
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def __write_shard(self, name):
+        """Write the cached segments of one class to its shard."""
+        os.makedirs(self.shard_dir, exist_ok=True)
+        segments = FileStorage.__segments[name]
+        self.__replace(self.shard_path(name),
+                       self.__document(segments.values()))
+
+    def __replace(self, path, text):
+        """Atomically replace the file at path with text or bytes."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".hbnb-",
+                                        suffix=".tmp")
+        try:
+            try:
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+            except FileNotFoundError:
+                os.chmod(tmp_path, 0o644)
+            with os.fdopen(fd, 'wb' if isinstance(text, bytes) else 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        if self.fsync_dir:
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def __read(self, path, segments=None):
+        """Yield the objects stored in the file at path.
+
+        Large files written one record per line are split into chunks that
+        a process pool builds in parallel; anything else is streamed here.
+
+        Args:
+            path (str): File to read.
+            segments (dict): If given, filled with the encoded form of every
+                record read, by class name and key.
+        """
+        size = os.path.getsize(path)
+        if binary_format.is_binary(path):
+            with open(path, 'rb') as f:
+                for obj in binary_format.iter_records(f):
+                    yield self.__built(obj, segments)
+            return
+        with open(path, 'rb') as f:
+            line_per_record = f.readline().strip() == b"{" and \
+                _is_record(f.readline())
+        parts = min(self.workers * 4, size // FileStorage.CHUNK_MIN)
+        if self.workers <= 1 or parts <= 1 or not line_per_record or \
+                "fork" not in multiprocessing.get_all_start_methods():
+            with open(path) as f:
+                for _, obj, text in iter_items(f, raw=True):
+                    yield self.__built(obj, segments, text)
+            return
+        # Forked workers already have the models imported, instead of
+        # importing the package again and reloading storage in each one.
+        bounds = [size * i // parts for i in range(parts + 1)]
+        with ProcessPoolExecutor(self.workers,
+                                 multiprocessing.get_context("fork")) as pool:
+            for chunk in pool.map(_load_chunk, [path] * parts,
+                                  bounds[:-1], bounds[1:],
+                                  [segments is not None] * parts):
+                for key, obj, *line in chunk:
+                    if segments is not None:
+                        segments.setdefault(key.split(".", 1)[0], {})[key] = \
+                            line[0] if self.fmt == "json" else \
+                            self.__segment(key, obj.to_dict())
+                    yield obj
+
+    def __built(self, record, segments, text=None):
+        """Build the object of one stored dictionary.
+
+        With segments, the record's encoded form is added to them as well.
+        The JSON text the record was read from, when given on one line, is
+        reused instead of encoding the record again.
+        """
+        if segments is None:
+            return _build(record)
+        obj = _build(dict(record))
+        name = obj.__class__.__name__
+        key = f"{name}.{obj.id}"
+        if text is None or "\n" in text or self.fmt != "json":
+            segment = self.__segment(key, record)
+        else:
+            segment = json.dumps(key) + ": " + text
+        segments.setdefault(name, {})[key] = segment
+        return obj
+
+    def __load_shard(self, name):
+        """Read the shard of one class into memory."""
+        FileStorage.__unloaded.discard(name)
+        with self.__bulk([name], self.__source(name)):
+            for obj in self.__read(self.shard_path(name)):
+                self.__add(f"{name}.{obj.id}", obj)
+
+    def __load_file(self, segments=None):
+        """Read the file and replay the journal; tell if the log was torn.
+
+        With segments, the encoded form of every object loaded is kept in
+        them, as __read() does.
+        """
         try:
-            with open(FileStorage.__file_path) as f:
-                for obj in json.load(f).values():
-                    name = obj['__class__']
-                    del obj['__class__']
-                    self.new(eval(name)(**obj))
+            for obj in self.__read(FileStorage.__file_path, segments):
+                self.new(obj)
         except FileNotFoundError:
             pass
+        torn = False
+        try:
+            with open(self.journal_path) as f:
+                size = 0
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        torn = True  # Interrupted append, drop the tail
+                        break
+                    size += 1
+                    if record["op"] == "del":
+                        self.__remove(record["key"])
+                        if segments is not None:
+                            segments.get(record["key"].split(".", 1)[0],
+                                         {}).pop(record["key"], None)
+                    else:
+                        self.new(self.__built(record["obj"], segments))
+                FileStorage.__journal_size = size
+        except FileNotFoundError:
+            pass
+        return torn
+
+    def reload(self):
+        """Load objects from storage if it's there.
+
+        In sharded mode this only lists the shards; each one is read the
+        first time its class is needed. Otherwise the file is loaded and the
+        journal replayed on top of it. Files are decoded one record at a
+        time, so the whole decoded document is never held in memory, or by
+        a pool of workers when more than one is configured.
+        """
+        if self.__queue is not None:
+            self.__queue.join()
+        FileStorage.__unloaded = set()
+        FileStorage.__segments_of = None
+        self.__read_saved_indexes()
+        if self.sharded and os.path.isdir(self.shard_dir):
+            FileStorage.__unloaded = {entry[:-5] for entry in
+                                      os.listdir(self.shard_dir)
+                                      if entry.endswith(".json")}
+            FileStorage.__dirty = {}
+            return
+        # Keep what was read as the segments of the next save, unless that
+        # save goes to the journal or to shards anyway.
+        segments = None if self.journal or self.sharded else {}
+        with self.__bulk(source=None if self.sharded else self.__source()):
+            torn = self.__load_file(segments)
+        FileStorage.__dirty = {}
+        if torn or (self.sharded and FileStorage.__objects):
+            # Recover from a torn journal, or split a single file into shards.
+            self.compact()
+        elif segments is not None and not self.__converting():
+            self.__seed(segments)
+
+    def __converting(self):
+        """Tell whether the file is in another format than the one written.
+
+        Its objects are then left unseeded, so the next save rewrites it.
+        """
+        try:
+            binary = binary_format.is_binary(FileStorage.__file_path)
+        except FileNotFoundError:
+            return False
+        return binary != (self.fmt == "binary")
+
+    def __seed(self, segments):
+        """Take the segments of the records just read as the save cache.
+
+        The next save then only encodes the objects it changes. Objects
+        that were already in memory and not in the file are encoded here.
+        """
+        for key, obj in FileStorage.__objects.items():
+            name = key.split(".", 1)[0]
+            group = segments.setdefault(name, {})
+            if key not in group:
+                group[key] = self.__segment(key, obj.to_dict())
+        FileStorage.__segments = segments
+        FileStorage.__segments_of = FileStorage.__objects
+        FileStorage.__segments_fmt = self.fmt
+        FileStorage.__encoded = set(segments)
@@ -0,0 +1,503 @@
+#!/usr/bin/python3
+"""Secondary indexes over the objects kept by FileStorage.
+
+An index covers one attribute, or a pair of them, of one class. Storage
+calls add() when an object is stored or one of its attributes changes,
+and discard() when it is deleted, so an index never has to look at
+objects it does not cover. When many objects arrive at once, as on
+reload(), storage calls rebuild() instead. Any class with the same
+methods can be handed to FileStorage.add_index().
+"""
+import warnings
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from math import asin, cos, floor, pi, radians, sin, sqrt
+from operator import itemgetter
+
+_value = itemgetter(0)
+EARTH_RADIUS_KM = 6371.0088  # Mean radius of the Earth
+KM_PER_DEGREE = pi * EARTH_RADIUS_KM / 180  # Along a meridian
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometres between two points in degrees."""
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2) ** 2 + \
+        cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+def _hashable(value):
+    """Give back value in a form usable as a dict key.
+
+    Lists become tuples and dicts and sets become frozensets, at any depth,
+    so whatever JSON-like value an attribute holds can be indexed.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return frozenset((key, _hashable(item))
+                         for key, item in value.items())
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_hashable(item) for item in value)
+    return value
+
+
+def _is_number(value):
+    """Tell whether value can be ordered by a SortedIndex."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) \
+        and value == value
+
+
+class HashIndex:
+    """Index mapping each value of an attribute to the objects holding it.
+
+    Parts:
+        attr (str): Name of the indexed attribute.
+        __buckets (dict): Value -> {key: object}.
+        __values (dict): Key -> value the object is filed under.
+    """
+
+    def __init__(self, attr):
+        """Set up an empty index on the attribute attr."""
+        self.attr = attr
+        self.__buckets = {}
+        self.__values = {}
+
+    def __len__(self):
+        """Number of objects in the index."""
+        return len(self.__values)
+
+    def add(self, key, obj):
+        """File obj under its current value, moving it if it changed."""
+        value = _hashable(getattr(obj, self.attr, None))
+        if key in self.__values:
+            if self.__values[key] == value:
+                self.__buckets[value][key] = obj
+                return
+            self.discard(key)
+        self.__values[key] = value
+        self.__buckets.setdefault(value, {})[key] = obj
+
+    def discard(self, key):
+        """Remove the object stored under key, if it is indexed."""
+        if key not in self.__values:
+            return
+        value = self.__values.pop(key)
+        bucket = self.__buckets[value]
+        del bucket[key]
+        if not bucket:
+            del self.__buckets[value]
+
+    def clear(self):
+        """Forget every object."""
+        self.__buckets = {}
+        self.__values = {}
+
+    def rebuild(self, items):
+        """Index exactly the (key, object) pairs in items."""
+        self.clear()
+        for key, obj in items:
+            self.add(key, obj)
+
+    def find(self, value):
+        """Give back the objects whose attribute equals value.
+
+        Returns:
+            dict: key -> object, a copy the caller may change.
+        """
+        return dict(self.__buckets.get(_hashable(value), ()))
+
+    def count(self, value):
+        """Number of objects whose attribute equals value."""
+        return len(self.__buckets.get(_hashable(value), ()))
+
+    def groups(self):
+        """Yield each indexed value with a view of the objects holding it.
+
+        Lists come back as tuples, the form they are filed under. The
+        views must not be kept while the index changes.
+        """
+        for value, bucket in self.__buckets.items():
+            yield value, bucket.values()
+
+
+class UniqueIndex:
+    """Index holding at most one object per value of an attribute.
+
+    Storage calls check() before storing or changing an object, so a value
+    already held by another object is refused with a ValueError. Empty
+    values ("" or None) are not indexed, so any number of objects may lack
+    one. A rebuild keeps the first object found for a value.
+
+    Parts:
+        attr (str): Name of the indexed attribute.
+        __holders (dict): Value -> key of the object holding it.
+        __objects (dict): Key -> object for every indexed key.
+        __values (dict): Key -> value the object is filed under.
+    """
+
+    def __init__(self, attr):
+        """Set up an empty index on the attribute attr."""
+        self.attr = attr
+        self.clear()
+
+    def __len__(self):
+        """Number of objects in the index."""
+        return len(self.__values)
+
+    def check(self, key, obj):
+        """Raise ValueError if another key already holds the value of obj."""
+        value = _hashable(getattr(obj, self.attr, None))
+        if value in (None, ""):
+            return
+        holder = self.__holders.get(value)
+        if holder is not None and holder != key:
+            raise ValueError("{} {!r} is already used by {}".format(
+                self.attr, value, holder))
+
+    def add(self, key, obj):
+        """File obj under its current value, moving it if it changed."""
+        self.check(key, obj)
+        self.discard(key)
+        value = _hashable(getattr(obj, self.attr, None))
+        if value in (None, ""):
+            return
+        self.__holders[value] = key
+        self.__objects[key] = obj
+        self.__values[key] = value
+
+    def discard(self, key):
+        """Remove the object stored under key, if it is indexed."""
+        if key not in self.__values:
+            return
+        del self.__holders[self.__values.pop(key)]
+        del self.__objects[key]
+
+    def clear(self):
+        """Forget every object."""
+        self.__holders = {}
+        self.__objects = {}
+        self.__values = {}
+
+    def rebuild(self, items):
+        """Index the (key, object) pairs in items, skipping duplicates.
+
+        Duplicates can only come from data saved before the index was
+        declared, so each one is reported with a warning, and the objects
+        left out stay usable.
+        """
+        self.clear()
+        for key, obj in items:
+            try:
+                self.add(key, obj)
+            except ValueError as error:
+                warnings.warn("{}; {} is left out of the index".format(
+                    error, key))
+
+    def get(self, value):
+        """Give back the object holding value, or None."""
+        key = self.__holders.get(_hashable(value))
+        return None if key is None else self.__objects[key]
+
+    def find(self, value):
+        """Give back the object holding value as a {key: object} dict."""
+        key = self.__holders.get(_hashable(value))
+        return {} if key is None else {key: self.__objects[key]}
+
+    def count(self, value):
+        """Number of objects holding value, 0 or 1."""
+        return int(_hashable(value) in self.__holders)
+
+
+class SortedIndex:
+    """Index keeping objects ordered by a numeric attribute.
+
+    Entries are (value, key) pairs kept sorted in a list of chunks of at
+    most 2 * LOAD entries, a flat B-tree of one level. Finding a chunk and
+    a place in it is two bisections, so a range or the first n objects
+    cost O(log n + k), and an insert or delete only moves the entries of
+    one chunk. Objects whose value is not a number are left out.
+
+    Parts:
+        attr (str): Name of the indexed attribute.
+        __chunks (list): Sorted lists of (value, key) pairs, in order.
+        __maxes (list): Last pair of each chunk.
+        __objects (dict): Key -> object for every indexed key.
+        __values (dict): Key -> value the object is filed under.
+    """
+    LOAD = 1000  # Entries per chunk after a rebuild or a split
+
+    def __init__(self, attr):
+        """Set up an empty index on the attribute attr."""
+        self.attr = attr
+        self.clear()
+
+    def __len__(self):
+        """Number of objects in the index."""
+        return len(self.__values)
+
+    def add(self, key, obj):
+        """File obj under its current value, moving it if it changed."""
+        value = getattr(obj, self.attr, None)
+        # True == 1, so an unchanged value must also still be a number.
+        if key in self.__values and self.__values[key] == value and \
+                _is_number(value):
+            self.__objects[key] = obj
+            return
+        self.discard(key)
+        if not _is_number(value):
+            return
+        self.__objects[key] = obj
+        self.__values[key] = value
+        entry = (value, key)
+        chunks, maxes = self.__chunks, self.__maxes
+        if not chunks:
+            chunks.append([entry])
+            maxes.append(entry)
+            return
+        i = min(bisect_left(maxes, entry), len(chunks) - 1)
+        chunk = chunks[i]
+        insort(chunk, entry)
+        maxes[i] = chunk[-1]
+        if len(chunk) > 2 * self.LOAD:
+            chunks[i:i + 1] = [chunk[:self.LOAD], chunk[self.LOAD:]]
+            maxes[i:i + 1] = [chunk[self.LOAD - 1], chunk[-1]]
+
+    def discard(self, key):
+        """Remove the object stored under key, if it is indexed."""
+        if key not in self.__values:
+            return
+        entry = (self.__values.pop(key), key)
+        del self.__objects[key]
+        i = bisect_left(self.__maxes, entry)
+        chunk = self.__chunks[i]
+        del chunk[bisect_left(chunk, entry)]
+        if chunk:
+            self.__maxes[i] = chunk[-1]
+        else:
+            del self.__chunks[i], self.__maxes[i]
+
+    def clear(self):
+        """Forget every object."""
+        self.__chunks = []
+        self.__maxes = []
+        self.__objects = {}
+        self.__values = {}
+
+    def rebuild(self, items):
+        """Index exactly the (key, object) pairs in items, sorting once."""
+        self.clear()
+        attr, entries = self.attr, []
+        for key, obj in items:
+            value = getattr(obj, attr, None)
+            if _is_number(value):
+                entries.append((value, key))
+                self.__objects[key] = obj
+                self.__values[key] = value
+        entries.sort()
+        self.__chunks = [entries[i:i + self.LOAD]
+                         for i in range(0, len(entries), self.LOAD)]
+        self.__maxes = [chunk[-1] for chunk in self.__chunks]
+
+    def __locate(self, value, after):
+        """Position (chunk, offset) of the first entry at or after value.
+
+        With after, entries equal to value are skipped as well.
+        """
+        find = bisect_right if after else bisect_left
+        i = find(self.__maxes, value, key=_value)
+        if i == len(self.__chunks):
+            return i, 0
+        return i, find(self.__chunks[i], value, key=_value)
+
+    def __piece(self, i, start, end, reverse):
+        """Entries of chunk i that lie between two positions."""
+        chunk = self.__chunks[i]
+        piece = chunk[start[1] if i == start[0] else 0:
+                      end[1] if i == end[0] else len(chunk)]
+        return reversed(piece) if reverse else piece
+
+    def __bounds(self, lo, hi, include_lo, include_hi):
+        """Positions of the first entry in a range and of the one after it."""
+        start = (0, 0) if lo is None else self.__locate(lo, not include_lo)
+        end = (len(self.__chunks), 0) if hi is None else \
+            self.__locate(hi, include_hi)
+        return start, end
+
+    def count(self, lo=None, hi=None, include_lo=True, include_hi=False):
+        """Number of objects whose value lies between lo and hi.
+
+        Takes O(log n) plus one step per chunk the range covers.
+        """
+        start, end = self.__bounds(lo, hi, include_lo, include_hi)
+        if start >= end:
+            return 0
+        whole = sum(len(chunk) for chunk in self.__chunks[start[0]:end[0]])
+        return whole - start[1] + end[1]
+
+    def iter_range(self, lo=None, hi=None, include_lo=True, include_hi=False,
+                   reverse=False):
+        """Yield the (key, object) pairs of range() one at a time."""
+        start, end = self.__bounds(lo, hi, include_lo, include_hi)
+        chunks = range(start[0], min(end[0] + 1, len(self.__chunks)))
+        objects = self.__objects
+        for i in reversed(chunks) if reverse else chunks:
+            for _, key in self.__piece(i, start, end, reverse):
+                yield key, objects[key]
+
+    def range(self, lo=None, hi=None, *, include_lo=True, include_hi=False,
+              reverse=False, limit=None):
+        """Give back the objects whose value lies between lo and hi.
+
+        Args:
+            lo (number): Lower bound, None for no bound.
+            hi (number): Upper bound, None for no bound.
+            include_lo (bool): Keep objects whose value equals lo.
+            include_hi (bool): Keep objects whose value equals hi.
+            reverse (bool): Give the highest values first.
+            limit (int): Most objects to give back, None for all.
+
+        Returns:
+            dict: key -> object, ordered by value and then by key.
+        """
+        return dict(islice(self.iter_range(lo, hi, include_lo, include_hi,
+                                           reverse), limit))
+
+
+class GridIndex:
+    """Index filing objects by their position on a latitude/longitude grid.
+
+    The globe is cut into square cells of CELL degrees. A bounding box only
+    looks at the cells it overlaps, a radius query at the cells of the
+    box around its circle, and a nearest-n query widens its radius until
+    it holds n objects. Objects without valid coordinates are left out.
+
+    Parts:
+        attr (tuple): Names of the latitude and longitude attributes.
+        __cells (dict): (row, column) -> {key: object}.
+        __points (dict): Key -> (latitude, longitude) it is filed under.
+    """
+    CELL = 0.5  # Degrees per side of a cell
+    COORDINATES = ("latitude", "longitude")  # Attributes indexed by default
+
+    def __init__(self, attr=COORDINATES):
+        """Set up an empty index on a (latitude, longitude) attribute pair."""
+        self.attr = attr
+        self.clear()
+
+    def __len__(self):
+        """Number of objects in the index."""
+        return len(self.__points)
+
+    def __cell(self, lat, lon):
+        """Row and column of the cell holding a point."""
+        return floor(lat / self.CELL), floor(lon / self.CELL)
+
+    def add(self, key, obj):
+        """File obj under its current position, moving it if it changed."""
+        point = tuple(getattr(obj, attr, None) for attr in self.attr)
+        if self.__points.get(key) == point:
+            self.__cells[self.__cell(*point)][key] = obj
+            return
+        self.discard(key)
+        lat, lon = point
+        if not (_is_number(lat) and _is_number(lon) and
+                -90 <= lat <= 90 and -180 <= lon <= 180):
+            return
+        self.__points[key] = point
+        self.__cells.setdefault(self.__cell(lat, lon), {})[key] = obj
+
+    def discard(self, key):
+        """Remove the object stored under key, if it is indexed."""
+        if key not in self.__points:
+            return
+        cell = self.__cell(*self.__points.pop(key))
+        bucket = self.__cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self.__cells[cell]
+
+    def clear(self):
+        """Forget every object."""
+        self.__cells = {}
+        self.__points = {}
+
+    def rebuild(self, items):
+        """Index exactly the (key, object) pairs in items."""
+        self.clear()
+        for key, obj in items:
+            self.add(key, obj)
+
+    def box(self, south, west, north, east):
+        """Give back the objects inside a bounding box.
+
+        A box with west greater than east crosses the 180th meridian.
+
+        Returns:
+            dict: key -> object.
+        """
+        if west > east:
+            found = self.box(south, west, north, 180)
+            found.update(self.box(south, -180, north, east))
+            return found
+        rows = range(floor(south / self.CELL), floor(north / self.CELL) + 1)
+        cols = range(floor(west / self.CELL), floor(east / self.CELL) + 1)
+        if len(rows) * len(cols) > len(self.__cells):
+            buckets = (bucket for (row, col), bucket in self.__cells.items()
+                       if row in rows and col in cols)
+        else:
+            buckets = (self.__cells[cell] for cell in
+                       ((row, col) for row in rows for col in cols)
+                       if cell in self.__cells)
+        points = self.__points
+        return {key: obj for bucket in buckets for key, obj in bucket.items()
+                if south <= points[key][0] <= north and
+                west <= points[key][1] <= east}
+
+    def __circle(self, lat, lon, km):
+        """(distance, key) pairs of the objects within km of a point."""
+        angle = km / EARTH_RADIUS_KM
+        south, north = lat - km / KM_PER_DEGREE, lat + km / KM_PER_DEGREE
+        if south <= -90 or north >= 90 or angle >= pi / 2:
+            # The circle holds a pole, so it spans every longitude.
+            west, east = -180, 180
+        else:
+            spread = asin(min(1.0, sin(angle) / cos(radians(lat))))
+            west = (lon - spread * 180 / pi + 540) % 360 - 180
+            east = (lon + spread * 180 / pi + 540) % 360 - 180
+        points, found = self.__points, []
+        for key in self.box(max(south, -90), west, min(north, 90), east):
+            distance = distance_km(lat, lon, *points[key])
+            if distance <= km:
+                found.append((distance, key))
+        return found
+
+    def near(self, lat, lon, km=None, n=None):
+        """Give back the objects within km of a point, or its n nearest.
+
+        Args:
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+            km (float): Radius to search, None for no limit.
+            n (int): Most objects to give back, None for all.
+
+        Returns:
+            dict: key -> object, nearest first.
+        """
+        if km is None and n is None:
+            raise ValueError("near() needs a radius or a count")
+        if km is not None:
+            found = self.__circle(lat, lon, km)
+        else:
+            radius = self.CELL * KM_PER_DEGREE
+            found = self.__circle(lat, lon, radius)
+            while len(found) < n and radius < pi * EARTH_RADIUS_KM:
+                radius *= 2
+                found = self.__circle(lat, lon, radius)
+        found.sort()
+        objects = {}
+        for _, key in found[:n]:
+            cell = self.__cell(*self.__points[key])
+            objects[key] = self.__cells[cell][key]
+        return objects
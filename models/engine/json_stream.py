@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""Incremental reader for the top-level JSON object of a storage file."""
+import json
+import re
+
+# Everything in front of a value: the opening brace or a comma, then the key.
+_head = re.compile(r'[ \t\n\r]*([{,])[ \t\n\r]*"([^"\\]*(?:\\.[^"\\]*)*)"[ \t\n\r]*:[ \t\n\r]*',
+                   re.S)
+_scan = json.JSONDecoder().scan_once
+
+
+def iter_items(f, chunk_size=1 << 16, raw=False):
+    """Yield the (key, value) pairs of the JSON object in f one at a time.
+
+    Only the current chunk and the record being decoded are held in memory,
+    instead of the whole decoded document.
+
+    Args:
+        f (file): Text file positioned at the start of a JSON object.
+        chunk_size (int): Characters to read at a time.
+        raw (bool): Yield (key, value, text) instead, text being the JSON
+            the value was decoded from.
+
+    Raises:
+        ValueError: If the file does not hold a JSON object.
+    """
+    buf, pos, eof, opener = "", 0, False, "{"
+    while True:
+        match = _head.match(buf, pos)
+        if match is not None and match.group(1) == opener:
+            try:
+                value, end = _scan(buf, match.end())
+            except (StopIteration, ValueError):
+                end = None
+            # A value touching the end of the buffer may be cut short.
+            if end is not None and (end < len(buf) or eof):
+                key = match.group(2)
+                if "\\" in key:
+                    key = json.loads('"' + key + '"')
+                if raw:
+                    yield key, value, buf[match.end():end]
+                else:
+                    yield key, value
+                pos, opener = end, ","
+                continue
+        if eof:
+            rest = "".join(buf[pos:].split())
+            if rest == "}" if opener == "," else rest in ("", "{}"):
+                return
+            raise ValueError("Invalid storage file near: {!r}".format(rest[:40]))
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
@@ -0,0 +1,610 @@
+#!/usr/bin/python3
+"""Queries over the objects of one class, planned around storage indexes.
+
+    storage.query(Place).where(price_by_night__lt=100, city_id=city.id) \\
+        .order_by("price_by_night").limit(20).all()
+
+A condition is attr=value, or attr__op=value with op one of OPERATORS.
+When a query runs, a small planner prices every way the storage offers to
+read the class -- a hash index lookup for = and in, a sorted index range
+for comparisons or ordering, or a scan of every object of the class -- and
+reads from the cheapest. Conditions the chosen index does not answer are
+checked on each object read. explain() shows the plan without running it.
+
+aggregate() and group_by() fold the objects a query gives back into
+counts, sums, averages, minimums and maximums in a single pass:
+
+    storage.query(Place).group_by("city_id", "avg(price_by_night)")
+"""
+import operator
+import re
+from heapq import nlargest, nsmallest
+from itertools import dropwhile, islice
+from numbers import Real
+from models.engine.indexes import HashIndex, SortedIndex, UniqueIndex
+
+OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "in": lambda value, values: value in values,
+}
+SYMBOLS = {"eq": "=", "ne": "!=", "lt": "<", "le": "<=", "gt": ">",
+           "ge": ">=", "in": "in"}
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+_aggregate = re.compile(r"\s*(\w+)\s*(?:\(\s*(\w*)\s*\))?\s*$")
+
+
+def matches(obj, conditions):
+    """Tell whether obj meets every (attr, op, value) condition.
+
+    A missing attribute reads as None, and values that cannot be compared
+    do not match.
+    """
+    for attr, op, value in conditions:
+        try:
+            if not OPERATORS[op](getattr(obj, attr, None), value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def sort_key(value):
+    """Key ordering values with None after everything else.
+
+    Values of different types are ordered by type name, all numbers
+    counting as one type, so that a mix of them can be sorted.
+    """
+    kind = "" if isinstance(value, Real) else type(value).__name__
+    return (value is None, kind, value)
+
+
+def text_sort_key(value):
+    """Like sort_key(), for values of one type that cannot be ordered.
+
+    Such values, dicts for instance, are ordered by their repr().
+    """
+    key = sort_key(value)
+    if key[1] in ("", "str", "datetime"):
+        return key
+    return key[:2] + (repr(value),)
+
+
+def parse_aggregate(text):
+    """Read "count", "count(attr)" or "sum(attr)" and the like.
+
+    Returns:
+        tuple: (function, attr), attr being None for a bare count.
+
+    Raises:
+        ValueError: If text is not an aggregate.
+    """
+    match = _aggregate.match(text)
+    if match is None or match.group(1) not in AGGREGATES:
+        raise ValueError("unknown aggregate: {}".format(text.strip()))
+    func, attr = match.group(1), match.group(2) or None
+    if attr is None and func != "count":
+        raise ValueError("{} needs an attribute".format(func))
+    return func, attr
+
+
+class Totals:
+    """Running aggregates over the objects handed to add().
+
+    count(attr) counts the objects where attr is set and not None; sum,
+    avg, min and max only look at numbers, like SQL skipping NULL.
+
+    Parts:
+        specs (list): (function, attr) pairs from parse_aggregate().
+        labels (list): Name of each aggregate in results().
+        __states (list): [count, total, min, max] for each aggregate.
+    """
+
+    def __init__(self, specs):
+        """Start every aggregate in specs from nothing."""
+        self.specs = specs
+        self.labels = [func if attr is None else "{}({})".format(func, attr)
+                       for func, attr in specs]
+        self.__states = [[0, 0, None, None] for _ in specs]
+
+    def add(self, obj):
+        """Count obj in every aggregate."""
+        for state, (func, attr) in zip(self.__states, self.specs):
+            if attr is None:
+                state[0] += 1
+                continue
+            value = getattr(obj, attr, None)
+            if func == "count":
+                state[0] += value is not None
+            elif _is_number(value):
+                state[0] += 1
+                state[1] += value
+                if state[2] is None or value < state[2]:
+                    state[2] = value
+                if state[3] is None or value > state[3]:
+                    state[3] = value
+
+    def add_count(self, count):
+        """Count count more objects, for bare counts only."""
+        for state in self.__states:
+            state[0] += count
+
+    def results(self):
+        """Give back label -> value for every aggregate.
+
+        Averages, minimums and maximums of no numbers are None.
+        """
+        results = {}
+        for label, (func, _), state in zip(self.labels, self.specs,
+                                           self.__states):
+            count, total, low, high = state
+            results[label] = {
+                "count": count, "sum": total,
+                "avg": total / count if count else None,
+                "min": low, "max": high}[func]
+        return results
+
+
+def _describe(condition):
+    """Write a condition the way explain() shows it."""
+    attr, op, value = condition
+    return "{} {} {!r}".format(attr, SYMBOLS[op], value)
+
+
+def _is_number(value):
+    """Tell whether value is a real number but no bool.
+
+    SortedIndex holds these values only, and aggregates only add them up.
+    """
+    return isinstance(value, Real) and not isinstance(value, bool)
+
+
+class Plan:
+    """One way of reading the objects a query asks for.
+
+    Parts:
+        access (str): How objects are read, for explain().
+        rows (int): Number of objects the access reads at most.
+        cost (int): Estimated work, the planner picks the lowest.
+        covers (tuple): Conditions every object read already meets.
+        ordered (bool): Whether objects come out in the query's order.
+        fetch (callable): Gives back an iterator of (key, object) pairs.
+    """
+
+    def __init__(self, access, rows, fetch, covers=(), ordered=False):
+        """Describe an access path reading rows objects through fetch."""
+        self.access = access
+        self.rows = rows
+        self.cost = rows
+        self.fetch = fetch
+        self.covers = tuple(covers)
+        self.ordered = ordered
+
+
+class Query:
+    """Conditions, order and limit on the objects of one class.
+
+    Every method building the query gives back a new Query, so a query can
+    be kept and refined without changing it. Nothing is read from storage
+    until the query is iterated, or all(), first() or count() is called.
+    Iterating yields one object at a time, so a query can be printed or
+    paged through without building a list of its results.
+
+    Parts:
+        __storage: Storage to read from.
+        __cls (type or str): Class, or class name, to read.
+        __conditions (tuple): (attr, op, value) conditions to meet.
+        __order (tuple): (attr, descending) pairs to sort by.
+        __limit (int): Most objects to give back, None for all.
+        __offset (int): Matching objects to skip first.
+        __after (str): Id of the object to resume after, None to start at
+            the first.
+    """
+
+    def __init__(self, storage, cls):
+        """Start a query over every object of cls in storage.
+
+        With cls None the query reads the objects of every class; no
+        index helps then.
+        """
+        self.__storage = storage
+        self.__cls = cls
+        self.__conditions = ()
+        self.__order = ()
+        self.__limit = None
+        self.__offset = 0
+        self.__after = None
+
+    def __copy(self, **changes):
+        """Give back a copy of the query with some parts replaced."""
+        query = Query(self.__storage, self.__cls)
+        query.__conditions = self.__conditions
+        query.__order = self.__order
+        query.__limit = self.__limit
+        query.__offset = self.__offset
+        query.__after = self.__after
+        for part, value in changes.items():
+            setattr(query, "_Query__" + part, value)
+        return query
+
+    @property
+    def name(self):
+        """Name of the class queried."""
+        cls = self.__cls
+        if cls is None:
+            return "every class"
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def where(self, **conditions):
+        """Add conditions every object given back must meet.
+
+        Args:
+            **conditions: attr=value, or attr__op=value with op one of
+                eq, ne, lt, le, gt, ge and in.
+
+        Raises:
+            ValueError: If an operator is not known.
+        """
+        added = []
+        for lookup, value in conditions.items():
+            attr, _, op = lookup.rpartition("__")
+            if not attr:
+                attr, op = lookup, "eq"
+            elif op not in OPERATORS:
+                raise ValueError("unknown operator: {}".format(op))
+            added.append((attr, op, value))
+        return self.__copy(conditions=self.__conditions + tuple(added))
+
+    def order_by(self, *attrs):
+        """Sort by attrs, the first one first; "-attr" sorts descending.
+
+        Objects lacking an attribute, or holding None, come last when
+        sorting ascending. Ties are broken by key, in the direction of the
+        first attribute, so the order is the same from one run to the next.
+        """
+        order = tuple((attr.lstrip("-"), attr.startswith("-"))
+                      for attr in attrs)
+        return self.__copy(order=order)
+
+    def limit(self, count):
+        """Give back at most count objects."""
+        if count is not None and count < 0:
+            raise ValueError("limit must not be negative")
+        return self.__copy(limit=count)
+
+    def offset(self, count):
+        """Skip the first count matching objects."""
+        if count < 0:
+            raise ValueError("offset must not be negative")
+        return self.__copy(offset=count)
+
+    def after(self, id):
+        """Resume after the object with the given id, as a cursor.
+
+        The cursor is looked up in storage and the query gives back the
+        objects that come after it in its order, before offset and limit
+        apply, so paging with the id of the last object of a page keeps
+        going where that page stopped. The cursor need not match the
+        conditions any more; a sorted index is read from its value on. A
+        query with no order_by() is ordered by key when it has a cursor, so
+        page it with order_by("id") from the first page on.
+
+        Running the query raises ValueError if storage holds no object
+        with the id.
+        """
+        return self.__copy(after=id)
+
+    def __index(self, attr, kind):
+        """Give back the index the storage keeps on attr, or None."""
+        index = getattr(self.__storage, "index", None)
+        if index is None or self.__cls is None:
+            return None
+        return index(self.__cls, attr, kind)
+
+    def __size(self):
+        """Number of objects of the class queried."""
+        count = getattr(self.__storage, "count", None)
+        if count is not None:
+            return count(self.__cls)
+        return len(self.__storage.all(self.__cls))
+
+    def __hash_plans(self):
+        """Plans reading one = or in condition from a hash index."""
+        for condition in self.__conditions:
+            attr, op, value = condition
+            if op not in ("eq", "in"):
+                continue
+            values = [value] if op == "eq" else value
+            for kind in (UniqueIndex, HashIndex):
+                index = self.__index(attr, kind)
+                # A UniqueIndex leaves out empty values, so it cannot
+                # answer for them.
+                if index is None or (kind is UniqueIndex and any(
+                        v is None or v == "" for v in values)):
+                    continue
+                try:
+                    rows = sum(index.count(v) for v in values)
+                except TypeError:
+                    break
+                yield Plan(
+                    "{} on {}".format(kind.__name__, _describe(condition)),
+                    rows, self.__hash_fetch(index, values), (condition,))
+                break
+
+    @staticmethod
+    def __hash_fetch(index, values):
+        """Fetch for the objects of index holding any of values."""
+        def fetch():
+            found = {}
+            for value in values:
+                found.update(index.find(value))
+            return iter(found.items())
+        return fetch
+
+    def __range_plans(self):
+        """Plans reading a range, or the query's order, from sorted indexes."""
+        order = self.__order
+        sort_attr = order[0][0] if len(order) == 1 else None
+        attrs = {attr for attr, op, value in self.__conditions
+                 if op in ("eq", "lt", "le", "gt", "ge") and _is_number(value)}
+        if sort_attr is not None:
+            attrs.add(sort_attr)
+        for attr in sorted(attrs):
+            index = self.__index(attr, SortedIndex)
+            if index is None:
+                continue
+            covers = [c for c in self.__conditions if c[0] == attr and
+                      c[1] in ("eq", "lt", "le", "gt", "ge") and
+                      _is_number(c[2])]
+            ordered = attr == sort_attr
+            if not covers and len(index) < self.__size():
+                # Objects without a number would be missed.
+                continue
+            reverse = ordered and order[0][1]
+            bounds = self.__bounds(covers)
+            if ordered and self.__after is not None:
+                # Start reading at the cursor instead of skipping up to it.
+                value = self.__cursor()[0][0]
+                if _is_number(value):
+                    bounds = self.__bounds(
+                        covers + [(attr, "le" if reverse else "ge", value)])
+            rows = index.count(*bounds)
+            plan = Plan(
+                "SortedIndex on {}".format(
+                    " and ".join(map(_describe, covers)) or
+                    "{} (whole index)".format(attr)),
+                rows, self.__range_fetch(index, bounds, reverse), covers,
+                ordered)
+            if ordered and self.__limit is not None and \
+                    len(covers) == len(self.__conditions):
+                plan.cost = min(rows, self.__offset + self.__limit)
+            yield plan
+
+    @staticmethod
+    def __bounds(conditions):
+        """Narrowest (lo, hi, include_lo, include_hi) meeting conditions."""
+        lo = hi = None
+        include_lo = include_hi = True
+        for _, op, value in conditions:
+            if op in ("eq", "gt", "ge"):
+                inclusive = op != "gt"
+                if lo is None or value > lo or \
+                        (value == lo and not inclusive):
+                    lo, include_lo = value, inclusive
+            if op in ("eq", "lt", "le"):
+                inclusive = op != "lt"
+                if hi is None or value < hi or \
+                        (value == hi and not inclusive):
+                    hi, include_hi = value, inclusive
+        return lo, hi, include_lo, include_hi
+
+    @staticmethod
+    def __range_fetch(index, bounds, reverse):
+        """Fetch for the objects of index within bounds."""
+        return lambda: index.iter_range(*bounds, reverse=reverse)
+
+    def plans(self):
+        """Give back every plan considered, the one chosen first."""
+        storage, cls = self.__storage, self.__cls
+        plans = [Plan("scan of {}".format(self.name), self.__size(),
+                      lambda: iter(storage.all(cls).items()))]
+        plans.extend(self.__hash_plans())
+        plans.extend(self.__range_plans())
+        # Ties go to the plan already in order, then to the most selective.
+        plans.sort(key=lambda plan: (plan.cost, not plan.ordered,
+                                     -len(plan.covers)))
+        return plans
+
+    def plan(self):
+        """Give back the plan the query runs with."""
+        return self.plans()[0]
+
+    def explain(self):
+        """Describe how the query would run, without running it."""
+        plans = self.plans()
+        plan = plans[0]
+        residual = [c for c in self.__conditions if c not in plan.covers]
+        lines = ["Query on {}".format(self.name),
+                 "  read:   {} (~{} objects)".format(plan.access, plan.rows)]
+        if residual:
+            lines.append("  filter: {}".format(
+                " and ".join(map(_describe, residual))))
+        if self.__order:
+            lines.append("  order:  {}{}".format(
+                ", ".join(("-" if desc else "") + attr
+                          for attr, desc in self.__order),
+                " (from the index)" if plan.ordered else ""))
+        if self.__after is not None:
+            lines.append("  after:  {}".format(self.__after))
+        if self.__offset:
+            lines.append("  offset: {}".format(self.__offset))
+        if self.__limit is not None:
+            lines.append("  limit:  {}".format(self.__limit))
+        for other in plans[1:]:
+            lines.append("  skipped: {} (~{} objects)".format(
+                other.access, other.rows))
+        return "\n".join(lines)
+
+    def __sorted(self, pairs, cursor):
+        """Sort (key, object) pairs in the query's order, as far as needed.
+
+        Pairs up to the cursor, if any, are dropped first. Values are
+        compared with sort_key(), and with text_sort_key() when some of
+        them cannot be ordered that way.
+        """
+        pairs = list(pairs)
+        try:
+            return self.__sort(pairs, cursor, sort_key)
+        except TypeError:
+            return self.__sort(pairs, cursor, text_sort_key)
+
+    def __sort(self, pairs, cursor, key):
+        """Sort the list pairs in the query's order using key."""
+        order = self.__order
+        if cursor is not None:
+            pairs = [pair for pair in pairs
+                     if self.__follows(pair, cursor, key)]
+        desc = bool(order) and order[0][1]
+        if len(order) <= 1 and self.__limit is not None:
+            attr = order[0][0] if order else None
+            pick = nlargest if desc else nsmallest
+            return pick(self.__offset + self.__limit, pairs,
+                        key=lambda pair: (key(getattr(pair[1], attr, None)),
+                                          pair[0]))
+        pairs.sort(key=lambda pair: pair[0], reverse=desc)
+        for attr, desc in reversed(order):
+            pairs.sort(key=lambda pair: key(getattr(pair[1], attr, None)),
+                       reverse=desc)
+        return pairs
+
+    def __cursor(self):
+        """Give back the values of the cursor object and its key.
+
+        Returns:
+            tuple: (values of the order attributes, key).
+
+        Raises:
+            ValueError: If storage holds no object with the cursor's id.
+        """
+        if self.__cls is not None:
+            names = [self.name]
+        else:
+            # Imported here: the registry imports the models, which import
+            # the storage that imports this module.
+            from models.registry import classes
+            names = list(classes)
+        for name in names:
+            obj = self.__storage.get(name, self.__after)
+            if obj is not None:
+                values = tuple(getattr(obj, attr, None)
+                               for attr, _ in self.__order)
+                return values, "{}.{}".format(obj.__class__.__name__,
+                                              self.__after)
+        raise ValueError("no {} with id {} to resume after".format(
+            self.name, self.__after))
+
+    def __follows(self, pair, cursor, key=sort_key):
+        """Tell whether a (key, object) pair comes after the cursor."""
+        values, cursor_key = cursor
+        for (attr, desc), value in zip(self.__order, values):
+            mine, theirs = key(getattr(pair[1], attr, None)), key(value)
+            if mine != theirs:
+                return (mine > theirs) != desc
+        desc = bool(self.__order) and self.__order[0][1]
+        return pair[0] != cursor_key and (pair[0] > cursor_key) != desc
+
+    def __iter__(self):
+        """Run the query, yielding the objects it gives back.
+
+        Raises:
+            ValueError: If the query has a cursor storage does not hold.
+        """
+        cursor = None if self.__after is None else self.__cursor()
+        plan = self.plan()
+        residual = [c for c in self.__conditions if c not in plan.covers]
+        found = ((key, obj) for key, obj in plan.fetch()
+                 if matches(obj, residual))
+        if plan.ordered:
+            if cursor is not None:
+                # Only ties with the cursor are left to skip.
+                found = dropwhile(
+                    lambda pair: not self.__follows(pair, cursor), found)
+        elif self.__order or cursor is not None:
+            found = self.__sorted(found, cursor)
+        end = None if self.__limit is None else self.__offset + self.__limit
+        return (obj for _, obj in islice(found, self.__offset, end))
+
+    def all(self):
+        """Run the query and give back its objects as a list."""
+        return list(self)
+
+    def first(self):
+        """Run the query and give back its first object, or None."""
+        return next(iter(self.limit(1)), None)
+
+    def count(self):
+        """Number of objects the query gives back."""
+        return sum(1 for _ in self)
+
+    def aggregate(self, *aggregates):
+        """Fold the objects the query gives back into aggregates.
+
+        Args:
+            *aggregates (str): "count", "count(attr)", "sum(attr)",
+                "avg(attr)", "min(attr)" or "max(attr)"; count if none.
+
+        Returns:
+            dict: aggregate -> value, e.g. {"avg(price_by_night)": 92.5}.
+        """
+        totals = Totals([parse_aggregate(text)
+                         for text in aggregates or ("count",)])
+        for obj in self:
+            totals.add(obj)
+        return totals.results()
+
+    def group_by(self, attr, *aggregates):
+        """Aggregate the objects the query gives back per value of attr.
+
+        With no conditions, limit or offset, and a hash index on attr, the
+        groups are read from the index instead of from every object, and
+        bare counts take the size of each group without reading it.
+
+        Args:
+            attr (str): Attribute whose values make the groups.
+            *aggregates (str): As for aggregate().
+
+        Returns:
+            dict: value of attr -> {aggregate: value}, ordered by value
+                when the values can be compared.
+        """
+        specs = [parse_aggregate(text) for text in aggregates or ("count",)]
+        groups = {}
+        index = self.__index(attr, HashIndex)
+        if index is not None and not self.__conditions and \
+                self.__limit is None and not self.__offset and \
+                self.__after is None:
+            counts_only = all(a is None for _, a in specs)
+            for value, objects in index.groups():
+                totals = groups[value] = Totals(specs)
+                if counts_only:
+                    totals.add_count(len(objects))
+                else:
+                    for obj in objects:
+                        totals.add(obj)
+        else:
+            for obj in self:
+                value = getattr(obj, attr, None)
+                value = tuple(value) if isinstance(value, list) else value
+                totals = groups.get(value)
+                if totals is None:
+                    totals = groups[value] = Totals(specs)
+                totals.add(obj)
+        try:
+            values = sorted(groups, key=sort_key)
+        except TypeError:
+            values = list(groups)
+        return {value: groups[value].results() for value in values}
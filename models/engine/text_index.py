@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+"""Full-text search over the text attributes of stored objects.
+
+TextIndex is an inverted index: each word maps to the keys of the objects
+whose text holds it, with the number of times it appears there. It plugs
+into FileStorage.add_index() like the indexes of models.engine.indexes,
+and can dump its contents so storage can keep them next to the file
+instead of reading every text again on each start.
+"""
+import re
+from collections import Counter
+
+_word = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split text into lowercase words."""
+    return _word.findall(text.lower())
+
+
+class TextIndex:
+    """Inverted index over the words of one or more text attributes.
+
+    Parts:
+        attr (str or tuple): Attribute, or attributes, holding the text.
+        __postings (dict): Word -> {key: times the word appears}.
+        __terms (dict): Key -> {word: times it appears} for every key.
+        __objects (dict): Key -> object for every indexed key.
+    """
+
+    def __init__(self, attr):
+        """Set up an empty index on one attribute or a tuple of them."""
+        self.attr = attr
+        self.clear()
+
+    def __len__(self):
+        """Number of objects in the index."""
+        return len(self.__terms)
+
+    def __count(self, obj):
+        """Times each word appears in the indexed text of obj."""
+        attrs = (self.attr,) if isinstance(self.attr, str) else self.attr
+        counts = Counter()
+        for attr in attrs:
+            text = getattr(obj, attr, None)
+            if isinstance(text, str):
+                counts.update(tokenize(text))
+        return dict(counts)
+
+    def __store(self, key, obj, counts):
+        """File obj under the words in counts."""
+        self.__terms[key] = counts
+        self.__objects[key] = obj
+        for term, count in counts.items():
+            self.__postings.setdefault(term, {})[key] = count
+
+    def add(self, key, obj):
+        """Index the text of obj, replacing what was indexed for key."""
+        counts = self.__count(obj)
+        if self.__terms.get(key) == counts:
+            self.__objects[key] = obj
+            return
+        self.discard(key)
+        if counts:
+            self.__store(key, obj, counts)
+
+    def discard(self, key):
+        """Remove the object stored under key, if it is indexed."""
+        if key not in self.__terms:
+            return
+        del self.__objects[key]
+        for term in self.__terms.pop(key):
+            postings = self.__postings[term]
+            del postings[key]
+            if not postings:
+                del self.__postings[term]
+
+    def clear(self):
+        """Forget every object."""
+        self.__postings = {}
+        self.__terms = {}
+        self.__objects = {}
+
+    def rebuild(self, items):
+        """Index exactly the (key, object) pairs in items."""
+        self.clear()
+        for key, obj in items:
+            self.add(key, obj)
+
+    def dump(self):
+        """Give back the words of every key as a JSON-ready dict."""
+        return self.__terms
+
+    def load(self, terms, items):
+        """Index the (key, object) pairs in items, taking words from terms.
+
+        terms comes from an earlier dump() of the same objects; keys it
+        does not know are read from their objects instead.
+        """
+        self.clear()
+        for key, obj in items:
+            counts = terms.get(key)
+            if counts is None:
+                self.add(key, obj)
+            elif counts:
+                self.__store(key, obj, counts)
+
+    def search(self, query, mode="and", limit=None):
+        """Give back the objects matching the words of query.
+
+        Args:
+            query (str): Words to look for.
+            mode (str): "and" to need every word, "or" to need any.
+            limit (int): Most objects to give back, None for all.
+
+        Returns:
+            dict: key -> object, the most occurrences of the words first.
+        """
+        if mode not in ("and", "or"):
+            raise ValueError("unknown search mode: {}".format(mode))
+        postings = [self.__postings.get(term, {})
+                    for term in set(tokenize(query))]
+        if not postings:
+            return {}
+        postings.sort(key=len)
+        if mode == "and":
+            keys = set(postings[0]).intersection(*postings[1:])
+        else:
+            keys = set().union(*postings)
+        ranked = sorted(keys, key=lambda key: (
+            -sum(found.get(key, 0) for found in postings), key))
+        return {key: self.__objects[key] for key in ranked[:limit]}
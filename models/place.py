@@ -1,6 +1,8 @@
 #!/usr/bin/python3
 """Module that introduces the Place class."""
+import models
 from models.base_model import BaseModel
+from models.review import Review
 
 class Place(BaseModel):
     """Describes the characteristics of a lodging place.
@@ -30,3 +32,8 @@ class Place(BaseModel):
     latitude = 0.0
     longitude = 0.0
     amenity_ids = []
+
+    @property
+    def reviews(self):
+        """List the reviews of this place."""
+        return list(models.storage.find(Review, "place_id", self.id).values())
@@ -0,0 +1,18 @@
+#!/usr/bin/python3
+"""Registry of the model classes, by class name.
+
+Storage turns stored records back into objects, and the console checks
+and instantiates the classes named on its command line, by looking the
+name up in classes instead of running it through eval(). A record or a
+command can therefore only ever name one of these classes.
+"""
+from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.amenity import Amenity
+from models.review import Review
+
+classes = {cls.__name__: cls for cls in (
+    BaseModel, User, State, City, Place, Amenity, Review)}
@@ -1,7 +1,9 @@
 #!/usr/bin/python3
 """State class definition."""
 
+import models
 from models.base_model import BaseModel
+from models.city import City
 
 class State(BaseModel):
     """This class is for states.
@@ -11,3 +13,8 @@ class State(BaseModel):
     """
 
     name = ""  # Name of the state
+
+    @property
+    def cities(self):
+        """List the cities of this state."""
+        return list(models.storage.find(City, "state_id", self.id).values())
@@ -1,7 +1,10 @@
 #!/usr/bin/python3
 """User class file."""
 
+import models
 from models.base_model import BaseModel
+from models.place import Place
+from models.review import Review
 
 class User(BaseModel):
     """Class for user info.
@@ -17,3 +20,13 @@ class User(BaseModel):
     password = ""    # Secret code for account
     first_name = ""  # Given name
     last_name = ""   # Family name
+
+    @property
+    def places(self):
+        """List the places this user owns."""
+        return list(models.storage.find(Place, "user_id", self.id).values())
+
+    @property
+    def reviews(self):
+        """List the reviews this user wrote."""
+        return list(models.storage.find(Review, "user_id", self.id).values())
@@ -11,12 +11,21 @@ Classes included for testing:
     - TestHBNBCommandAll
     - TestHBNBCommandDestroy
     - TestHBNBCommandUpdate
+    - TestHBNBCommandNear
+    - TestHBNBCommandEmail
+    - TestHBNBCommandWhere
+    - TestHBNBCommandAllPages
+    - TestHBNBCommandCountTotals
+    - TestHBNBCommandGroupBy
 """
 
 import os
 import sys
 import unittest
 from models import storage
+from models.place import Place
+from models.state import State
+from models.user import User
 from models.engine.file_storage import FileStorage
 from console import HBNBCommand
 from io import StringIO
@@ -101,7 +110,8 @@ class TestHBNBCommandHelp(unittest.TestCase):
     def test_general_help(self):
         expected_output = ("Documented commands (type help <topic>):\n"
                            "========================================\n"
-                           "EOF  all  count  create  destroy  help  quit  show  update")
+                           "EOF  count   destroy  group_by  near  show    where\n"
+                           "all  create  email    help      quit  update")
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertFalse(HBNBCommand().onecmd("help"))
             self.assertEqual(expected_output, output.getvalue().strip())
@@ -119,6 +129,359 @@ class TestHBNBCommandExit(unittest.TestCase):
             self.assertTrue(HBNBCommand().onecmd("EOF"))
 
 
+class TestHBNBCommandNear(unittest.TestCase):
+    """Tests for the near command in the AirBnB clone command interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.ids = []
+        for lat, lon in ((48.8566, 2.3522), (48.8049, 2.1204),
+                         (51.5074, -0.1278)):
+            place = Place()
+            place.latitude, place.longitude = lat, lon
+            self.ids.append(place.id)
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def listed(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return [line.split(" ", 2)[1][1:-1]
+                for line in eval(output.getvalue())]
+
+    def test_near_within_radius(self):
+        self.assertEqual(self.listed("near Place 48.85 2.35 km=30"),
+                         self.ids[:2])
+        self.assertEqual(self.listed("Place.near(51.5, -0.12, km=5)"),
+                         self.ids[2:])
+
+    def test_near_count(self):
+        self.assertEqual(self.listed("near Place 51.5 -0.12 n=2"),
+                         [self.ids[2], self.ids[1]])
+        self.assertEqual(self.listed("near Place 0 0"),
+                         [self.ids[1], self.ids[0], self.ids[2]])
+
+    def test_near_errors(self):
+        for command, expected in (
+                ("near", "** Missing model name **"),
+                ("near MyModel 0 0", "** Model does not exist **"),
+                ("near User 0 0", "** Model has no coordinates **"),
+                ("near Place 0", "** Missing coordinates **"),
+                ("near Place north 0", "** Missing coordinates **"),
+                ("near Place 0 0 miles=3", "** Missing coordinates **")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command))
+                self.assertEqual(expected, output.getvalue().strip())
+
+
+class TestHBNBCommandEmail(unittest.TestCase):
+    """Tests for the email command and unique emails in the console."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.user = User()
+        self.user.email = "a@b.c"
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_email(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("email a@b.c"))
+            self.assertEqual(str(self.user), output.getvalue().strip())
+        for command, expected in (("email", "** Missing email address **"),
+                                  ("email x@b.c",
+                                   "** No user with that email **")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command))
+                self.assertEqual(expected, output.getvalue().strip())
+
+    def test_update_to_used_email(self):
+        other = User()
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                'update User {} email "a@b.c"'.format(other.id)))
+            self.assertIn("already used", output.getvalue())
+        self.assertEqual(other.email, "")
+
+    def test_update_read_only_attribute(self):
+        state = State()
+        for command in ('update State {} cities "x"',
+                        'update State {} {{"name": "CA", "save": 1}}'):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(
+                    command.format(state.id)))
+                self.assertIn("cannot be updated", output.getvalue())
+        self.assertEqual(state.cities, [])
+        self.assertEqual(state.name, "")
+
+
+class TestHBNBCommandWhere(unittest.TestCase):
+    """Tests for filtering, sorting and limiting listings in the console."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.ids = []
+        for price, guests, name in ((80, 2, "Loft"), (120, 4, "Barn"),
+                                    (60, 5, "Hut"), (90, 6, "10")):
+            place = Place()
+            place.price_by_night = price
+            place.max_guest = guests
+            place.name = name
+            self.ids.append(place.id)
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def listed(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return [line.split(" ", 2)[1][1:-1]
+                for line in eval(output.getvalue())]
+
+    def test_where(self):
+        expected = sorted([self.ids[2], self.ids[3]])
+        for command in ("Place.where(price_by_night<100, max_guest>=4)",
+                        "where Place price_by_night < 100,max_guest>=4",
+                        "all Place --where price_by_night<100, max_guest>=4"):
+            self.assertEqual(sorted(self.listed(command)), expected)
+
+    def test_string_values(self):
+        self.assertEqual(self.listed('Place.where(name="Hut")'),
+                         [self.ids[2]])
+        self.assertEqual(self.listed("Place.where(name=10)"), [self.ids[3]])
+        self.assertEqual(len(self.listed("Place.where(name!=Hut)")), 3)
+
+    def test_sort_and_limit(self):
+        self.assertEqual(
+            self.listed("all Place --sort price_by_night --limit 2"),
+            [self.ids[2], self.ids[0]])
+        self.assertEqual(
+            self.listed("all Place --where 'max_guest>2' "
+                        "--sort -price_by_night --limit 2"),
+            [self.ids[1], self.ids[3]])
+
+    def test_where_errors(self):
+        for command, expected in (
+                ("where", "** Missing model name **"),
+                ("all --sort name", "** Missing model name **"),
+                ("where MyModel a=1", "** Model does not exist **"),
+                ("all Place --where price_by_night<cheap",
+                 "** Invalid condition: price_by_night<cheap **"),
+                ("all Place --where max_guest", "** Invalid condition: "
+                 "max_guest **"),
+                ("all Place --limit many", "** Invalid limit **"),
+                ("all Place --page 2", "** Unknown option: --page **")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command))
+                self.assertEqual(expected, output.getvalue().strip())
+
+
+class TestHBNBCommandAllPages(unittest.TestCase):
+    """Tests for streamed and paged listings in the console."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.places = [Place() for _ in range(5)]
+        self.user = User()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def output(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return output.getvalue()
+
+    def test_list_output_is_unchanged(self):
+        self.assertEqual(self.output("all Place"),
+                         "{}\n".format([str(p) for p in self.places]))
+        self.assertEqual(self.output("all"), "{}\n".format(
+            [str(p) for p in self.places + [self.user]]))
+        self.assertEqual(self.output("all Amenity"), "[]\n")
+
+    def test_lines(self):
+        self.assertEqual(self.output("all Place --lines --limit 2"),
+                         "".join("{}\n".format(p) for p in self.places[:2]))
+
+    def test_limit_offset_after(self):
+        ids = [p.id for p in self.places]
+        sids = sorted(ids)
+        for command, expected in (
+                ("all Place --limit 2", ids[:2]),
+                ("all Place --offset 3", ids[3:]),
+                ("all Place --offset 1 --limit 2", ids[1:3]),
+                ("all Place --sort id --after {} --limit 2".format(sids[1]),
+                 sids[2:4]),
+                ("all --after {}".format(self.user.id),
+                 [i for i in ids if "Place." + i > "User." + self.user.id])):
+            self.assertEqual([line.split(" ", 2)[1][1:-1]
+                              for line in eval(self.output(command))],
+                             expected)
+        self.assertEqual(self.output("all Place --after nowhere"),
+                         "** no Place with id nowhere to resume after **\n")
+
+    def test_page_errors(self):
+        self.assertEqual(self.output("all Place --offset x"),
+                         "** Invalid offset **\n")
+        self.assertEqual(self.output("all --where id=1"),
+                         "** Missing model name **\n")
+
+
+class TestHBNBCommandCountTotals(unittest.TestCase):
+    """Tests for counting from storage's per-class totals."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.places = [Place() for _ in range(3)]
+        User()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def output(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return output.getvalue().strip()
+
+    def test_count_class(self):
+        self.assertEqual(self.output("Place.count()"), "3")
+        self.assertEqual(self.output("count User"), "1")
+        self.assertEqual(self.output("MyModel.count()"), "0")
+        storage.delete(self.places[0])
+        self.assertEqual(self.output("count Place"), "2")
+
+    def test_count_every_class(self):
+        self.assertEqual(eval(self.output("count")), {
+            "Amenity": 0, "BaseModel": 0, "City": 0, "Place": 3,
+            "Review": 0, "State": 0, "User": 1})
+
+    def test_count_does_not_copy_objects(self):
+        with patch.object(FileStorage, "all") as all_objects:
+            self.assertEqual(self.output("count Place"), "3")
+        all_objects.assert_not_called()
+
+
+class TestHBNBCommandGroupBy(unittest.TestCase):
+    """Tests for aggregates per value in the console."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        for price, city_id in ((80, "a"), (120, "a"), (60, "b"), (90, "b")):
+            place = Place()
+            place.price_by_night = price
+            place.city_id = city_id
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def groups(self, command):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return eval(output.getvalue())
+
+    def test_group_by(self):
+        self.assertEqual(
+            self.groups("Place.group_by(city_id, avg(price_by_night))"),
+            {"a": {"avg(price_by_night)": 100.0},
+             "b": {"avg(price_by_night)": 75.0}})
+        self.assertEqual(self.groups("group_by Place city_id"),
+                         {"a": {"count": 2}, "b": {"count": 2}})
+
+    def test_group_by_where(self):
+        self.assertEqual(
+            self.groups("group_by Place city_id count, max(price_by_night) "
+                        "--where price_by_night>70"),
+            {"a": {"count": 2, "max(price_by_night)": 120},
+             "b": {"count": 1, "max(price_by_night)": 90}})
+
+    def test_group_by_errors(self):
+        for command, expected in (
+                ("group_by", "** Missing model name **"),
+                ("group_by MyModel id", "** Model does not exist **"),
+                ("group_by Place", "** Missing attribute name **"),
+                ("Place.group_by(city_id, median(price_by_night))",
+                 "** unknown aggregate: median(price_by_night) **"),
+                ("Place.group_by(city_id, sum())",
+                 "** sum needs an attribute **")):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command))
+                self.assertEqual(expected, output.getvalue().strip())
+
+
 class TestHBNBCommandCreate(unittest.TestCase):
     """Tests for the create command in the AirBnB clone command interpreter."""
 
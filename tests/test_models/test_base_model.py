@@ -6,6 +6,8 @@ Tests included:
     TestBaseModelCreation
     TestBaseModelUpdate
     TestBaseModelDictConversion
+    TestBaseModelFromDict
+    TestBaseModelLazyTimestamps
 """
 import os
 import models
@@ -13,6 +15,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.base_model import BaseModel
+from models.user import User
 
 class TestBaseModelCreation(unittest.TestCase):
     """Tests for verifying the creation of BaseModel instances."""
@@ -185,5 +188,102 @@ class TestBaseModelDictConversion(unittest.TestCase):
             base_model.to_dict(None)
 
 
+class TestBaseModelFromDict(unittest.TestCase):
+    """Tests for building instances from to_dict() output."""
+
+    def test_round_trip(self):
+        user = User()
+        user.email = "a@b.c"
+        copy = User.from_dict(user.to_dict())
+        self.assertIs(type(copy), User)
+        self.assertEqual(copy.to_dict(), user.to_dict())
+        self.assertEqual(str(copy), str(user))
+        self.assertEqual(copy.__dict__, user.__dict__)
+
+    def test_matches_constructor(self):
+        data = BaseModel().to_dict()
+        built = BaseModel.from_dict(data)
+        self.assertEqual(data["__class__"], "BaseModel")
+        del data["__class__"]
+        self.assertEqual(str(built), str(BaseModel(**data)))
+
+    def test_timestamp_without_microseconds(self):
+        model = BaseModel.from_dict({"id": "1",
+                                     "created_at": "2024-05-20T20:50:30",
+                                     "updated_at": "2024-05-20T20:50:30.5"})
+        self.assertEqual(model.created_at, datetime(2024, 5, 20, 20, 50, 30))
+        self.assertEqual(model.updated_at.microsecond, 500000)
+
+    def test_missing_fields_are_generated(self):
+        model = BaseModel.from_dict({"name": "x"})
+        self.assertIsInstance(model.id, str)
+        self.assertIsInstance(model.created_at, datetime)
+        self.assertEqual(model.name, "x")
+
+    def test_not_added_to_storage(self):
+        model = BaseModel.from_dict(BaseModel().to_dict() | {"id": "fresh"})
+        self.assertNotIn(model, models.storage.all().values())
+
+    def test_invalid_timestamp(self):
+        model = BaseModel.from_dict({"id": "1", "created_at": "yesterday"})
+        with self.assertRaises(ValueError):
+            model.created_at
+
+
+
+class TestBaseModelLazyTimestamps(unittest.TestCase):
+    """Tests for timestamps parsed only when first read."""
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+
+    def setUp(self):
+        self.data = BaseModel().to_dict()
+        self.model = BaseModel.from_dict(self.data)
+
+    def test_text_until_read(self):
+        self.assertIsInstance(self.model.__dict__["created_at"], str)
+        self.assertEqual(self.model.created_at.isoformat(),
+                         self.data["created_at"])
+        self.assertIsInstance(self.model.__dict__["created_at"], datetime)
+        self.assertIsInstance(self.model.__dict__["updated_at"], str)
+
+    def test_to_dict_passes_text_through(self):
+        self.assertEqual(self.model.to_dict(), self.data)
+        self.assertIsInstance(self.model.__dict__["updated_at"], str)
+
+    def test_set_replaces_text(self):
+        now = datetime.now()
+        self.model.updated_at = now
+        self.assertIs(self.model.updated_at, now)
+        self.assertEqual(self.model.to_dict()["updated_at"], now.isoformat())
+
+    def test_str_shows_datetimes(self):
+        self.assertIn("'created_at': datetime.datetime(", str(self.model))
+
+    def test_reload_keeps_text(self):
+        model = BaseModel()
+        models.storage.save()
+        models.storage.reload()
+        reloaded = models.storage.get(BaseModel, model.id)
+        self.assertIsInstance(reloaded.__dict__["created_at"], str)
+        self.assertEqual(reloaded.created_at, model.created_at)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -6,6 +6,7 @@ Test cases included:
     TestCityCreation
     TestCityUpdate
     TestCityDictRepresentation
+    TestCityPlaces
 """
 import os
 import models
@@ -13,6 +14,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.city import City
+from models.place import Place
 
 
 class TestCityCreation(unittest.TestCase):
@@ -191,5 +193,18 @@ class TestCityDictRepresentation(unittest.TestCase):
             city.to_dict(None)
 
 
+class TestCityPlaces(unittest.TestCase):
+    """Tests for the places of a City."""
+
+    def test_places(self):
+        city = City()
+        place = Place()
+        self.assertEqual(city.places, [])
+        place.city_id = city.id
+        self.assertEqual(city.places, [place])
+        models.storage.delete(place)
+        self.assertEqual(city.places, [])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+"""
+This script includes tests for batching.py in the models/engine directory.
+
+Test classes included:
+    TestBatching
+"""
+import os
+import unittest
+from unittest.mock import patch
+from models.engine.batching import Batching
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+class TestBatching(unittest.TestCase):
+    """Tests for coalescing saves with storage.batch()."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+        patcher = patch.object(FileStorage, "_FileStorage__write_file",
+                               autospec=True)
+        self.write = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_storages_support_batching(self):
+        self.assertIsInstance(self.storage, Batching)
+
+    def test_saves_inside_batch_write_once_on_exit(self):
+        with self.storage.batch():
+            for _ in range(10):
+                Place()
+                self.storage.save()
+            self.write.assert_not_called()
+        self.assertEqual(self.write.call_count, 1)
+
+    def test_batch_without_saves_does_not_write(self):
+        with self.storage.batch():
+            Place()
+        self.write.assert_not_called()
+
+    def test_flush_without_changes_does_not_write(self):
+        Place()
+        self.storage.save()
+        with self.storage.batch():
+            self.storage.save()
+        self.storage.flush()
+        self.assertEqual(self.write.call_count, 1)
+
+    def test_nested_batches_write_once(self):
+        with self.storage.batch():
+            with self.storage.batch():
+                self.storage.save()
+            self.storage.save()
+        self.assertEqual(self.write.call_count, 1)
+
+    def test_flush_every_n_saves(self):
+        with self.storage.batch(max_pending=3):
+            for _ in range(7):
+                Place()
+                self.storage.save()
+            self.assertEqual(self.write.call_count, 2)
+        self.assertEqual(self.write.call_count, 3)
+
+    @patch("models.engine.batching.monotonic")
+    def test_flush_after_delay(self, monotonic):
+        monotonic.return_value = 100.0
+        with self.storage.batch(max_delay_ms=50):
+            self.storage.save()
+            self.write.assert_not_called()
+            monotonic.return_value = 100.06
+            self.storage.save()
+            self.assertEqual(self.write.call_count, 1)
+            self.storage.save()
+            self.assertEqual(self.write.call_count, 1)
+
+    def test_flush_inside_batch(self):
+        with self.storage.batch():
+            self.storage.save()
+            self.storage.flush()
+            self.assertEqual(self.write.call_count, 1)
+        self.assertEqual(self.write.call_count, 1)
+
+    def test_batch_writes_on_exception(self):
+        with self.assertRaises(RuntimeError):
+            with self.storage.batch():
+                self.storage.save()
+                raise RuntimeError
+        self.assertEqual(self.write.call_count, 1)
+
+    def test_save_outside_batch_writes_immediately(self):
+        self.storage.save()
+        self.assertEqual(self.write.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
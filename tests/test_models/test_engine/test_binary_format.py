@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+"""
+This script includes tests for binary_format.py in the models/engine directory.
+
+Test classes included:
+    TestBinaryFormatEncoding
+    TestBinaryFormatConvert
+"""
+import io
+import json
+import os
+import unittest
+from models.engine import binary_format
+
+
+class TestBinaryFormatEncoding(unittest.TestCase):
+    """Tests for writing and reading binary storage documents."""
+
+    records = [
+        {"id": "1", "created_at": "2024-05-20T20:30:00.000000",
+         "__class__": "User", "email": "a@b.c"},
+        {"id": "2", "created_at": "2024-05-20T20:30:00.000000",
+         "__class__": "User", "email": "d@e.f"},
+        {"id": "3", "__class__": "Place", "price_by_night": 120,
+         "latitude": 37.77, "amenity_ids": ["a", "b"], "name": "é"},
+        {"id": "4", "__class__": "User", "email": "g@h.i", "first_name": "Bo"},
+    ]
+
+    def read(self, data, chunk_size=1 << 20):
+        return list(binary_format.iter_records(io.BytesIO(data), chunk_size))
+
+    def test_round_trip(self):
+        data = binary_format.document(map(binary_format.encode, self.records))
+        self.assertEqual(self.read(data), self.records)
+
+    def test_round_trip_with_tiny_chunks(self):
+        data = binary_format.document(map(binary_format.encode, self.records))
+        self.assertEqual(self.read(data, 3), self.records)
+
+    def test_round_trip_across_blocks(self):
+        records = [{"id": str(i), "__class__": "Review", "text": "t" * (i % 7)}
+                   for i in range(binary_format.BLOCK * 2 + 3)]
+        data = binary_format.document(map(binary_format.encode, records))
+        self.assertEqual(self.read(data, 64), records)
+
+    def test_field_names_written_once_per_schema(self):
+        data = binary_format.document(map(binary_format.encode, self.records))
+        self.assertEqual(data.count(b'"email"'), 2)
+        self.assertTrue(data.startswith(binary_format.MAGIC))
+
+    def test_empty_document(self):
+        self.assertEqual(self.read(binary_format.document([])), [])
+
+    def test_truncated_document_raises(self):
+        data = binary_format.document(map(binary_format.encode, self.records))
+        with self.assertRaises(ValueError):
+            self.read(data[:-3])
+
+    def test_missing_magic_raises(self):
+        with self.assertRaises(ValueError):
+            self.read(b'{"User.1": {}}')
+
+
+class TestBinaryFormatConvert(unittest.TestCase):
+    """Tests for converting storage files between formats."""
+
+    document = {"User.1": {"id": "1", "__class__": "User", "email": "a@b.c"},
+                "State.2": {"id": "2", "__class__": "State", "name": "CA"}}
+
+    def setUp(self):
+        with open("convert.json", "w") as file:
+            json.dump(self.document, file)
+
+    def tearDown(self):
+        for name in ("convert.json", "convert.bin", "convert.back.json"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def test_convert_both_ways(self):
+        self.assertEqual(binary_format.convert("convert.json", "convert.bin"),
+                         "binary")
+        self.assertTrue(binary_format.is_binary("convert.bin"))
+        self.assertEqual(binary_format.convert("convert.bin", "convert.back.json"),
+                         "json")
+        self.assertFalse(binary_format.is_binary("convert.back.json"))
+        with open("convert.back.json", "r") as file:
+            self.assertEqual(json.load(file), self.document)
+
+    def test_binary_file_is_smaller(self):
+        binary_format.convert("convert.json", "convert.bin")
+        self.assertLess(os.path.getsize("convert.bin"),
+                        os.path.getsize("convert.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
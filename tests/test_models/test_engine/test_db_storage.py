@@ -0,0 +1,258 @@
+#!/usr/bin/python3
+"""
+This script includes tests for db_storage.py in the models/engine directory.
+
+Test classes included:
+    TestDBStorageCreation
+    TestDBStorageFunctions
+"""
+import os
+import sqlite3
+import unittest
+from models.engine.db_storage import DBStorage
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+
+
+class TestDBStorageCreation(unittest.TestCase):
+    """Tests to check the creation of DBStorage instances."""
+
+    def tearDown(self):
+        try:
+            os.remove("test.db")
+        except IOError:
+            pass
+
+    def test_creation_with_path(self):
+        self.assertIsInstance(DBStorage("test.db"), DBStorage)
+
+    def test_reload_creates_table(self):
+        storage = DBStorage("test.db")
+        storage.reload()
+        storage.close()
+        connection = sqlite3.connect("test.db")
+        tables = connection.execute("SELECT name FROM sqlite_master").fetchall()
+        connection.close()
+        self.assertIn(("objects",), tables)
+
+
+class TestDBStorageFunctions(unittest.TestCase):
+    """Tests for the functions in the DBStorage class."""
+
+    def setUp(self):
+        self.storage = DBStorage("test.db")
+        self.storage.reload()
+
+    def tearDown(self):
+        self.storage.close()
+        for name in ("test.db", "test.db-wal", "test.db-shm"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def restart(self):
+        """Close the database and open it again with nothing loaded."""
+        self.storage.close()
+        self.storage = DBStorage("test.db")
+        self.storage.reload()
+
+    def rows(self):
+        connection = sqlite3.connect("test.db")
+        rows = connection.execute("SELECT cls, id FROM objects").fetchall()
+        connection.close()
+        return sorted(rows)
+
+    def test_new_and_all(self):
+        user = User()
+        self.storage.new(user)
+        self.assertIn("User." + user.id, self.storage.all())
+        self.assertIn("User." + user.id, self.storage.all(User))
+        self.assertEqual(self.storage.all(State), {})
+
+    def test_find(self):
+        state, city = State(), City()
+        city.state_id = state.id
+        self.storage.new(city)
+        self.storage.save()
+        self.restart()
+        found = self.storage.find(City, "state_id", state.id)
+        self.assertEqual(list(found), ["City." + city.id])
+        self.assertEqual(self.storage.find(City, "state_id", "other"), {})
+
+    def test_count(self):
+        users = [User() for _ in range(3)]
+        for user in users:
+            self.storage.new(user)
+        self.storage.new(State())
+        self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.count(User), 3)
+        self.assertEqual(self.storage.count("State"), 1)
+        self.assertEqual(self.storage.count(City), 0)
+        self.assertEqual(self.storage.count(), 4)
+        self.storage.delete(self.storage.get(User, users[0].id))
+        self.assertEqual(self.storage.count(User), 2)
+        self.storage.new(User())
+        self.storage.new(City())
+        self.assertEqual(self.storage.count(User), 3)
+        self.assertEqual(self.storage.count(), 5)
+
+    def test_query(self):
+        state, city = State(), City()
+        city.state_id = state.id
+        self.storage.new(city)
+        self.storage.save()
+        self.restart()
+        query = self.storage.query(City).where(state_id=state.id)
+        self.assertTrue(query.plan().access.startswith("scan"))
+        self.assertEqual([c.id for c in query], [city.id])
+
+    def test_find_range_and_near(self):
+        near = Place.from_dict({"latitude": 48.85, "longitude": 2.35,
+                                "price_by_night": 80})
+        far = Place.from_dict({"latitude": 40.71, "longitude": -74.0,
+                               "price_by_night": 120})
+        for place in (near, far):
+            self.storage.new(place)
+        self.storage.save()
+        self.restart()
+        self.assertEqual(list(self.storage.find_range(Place, "price_by_night",
+                                                      100)),
+                         ["Place." + far.id])
+        self.assertEqual(list(self.storage.find_near(Place, 48.86, 2.35,
+                                                     n=1)),
+                         ["Place." + near.id])
+        self.assertEqual(list(self.storage.find_box(Place, 40, -75, 41, -73)),
+                         ["Place." + far.id])
+
+    def test_unique_email(self):
+        user = User.from_dict({"email": "a@b.c"})
+        self.storage.new(user)
+        self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.get_user_by_email("a@b.c").id, user.id)
+        self.assertIsNone(self.storage.get_user_by_email("x@b.c"))
+        with self.assertRaises(ValueError):
+            self.storage.new(User.from_dict({"email": "a@b.c"}))
+        other = User.from_dict({"email": "x@b.c"})
+        self.storage.new(other)
+        other.__dict__["email"] = "a@b.c"
+        with self.assertRaises(ValueError):
+            self.storage.touch(other)
+        other.__dict__["email"] = "x@b.c"
+        self.storage.touch(self.storage.get(User, user.id))
+
+    def test_email_lookups_read_one_row(self):
+        users = [User.from_dict({"email": "{}@b.c".format(i)})
+                 for i in range(3)]
+        for user in users:
+            self.storage.new(user)
+        self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.get_user_by_email("1@b.c").id,
+                         users[1].id)
+        with self.assertRaises(ValueError):
+            self.storage.new(User.from_dict({"email": "2@b.c"}))
+        self.assertEqual(list(self.storage._DBStorage__objects),
+                         ["User." + users[1].id])
+
+    def test_users_may_swap_emails(self):
+        a = User.from_dict({"email": "a@b.c"})
+        b = User.from_dict({"email": "b@b.c"})
+        self.storage.new(a)
+        self.storage.new(b)
+        self.storage.save()
+        for user, email in ((a, "tmp@b.c"), (b, "a@b.c"), (a, "b@b.c")):
+            user.__dict__["email"] = email
+            self.storage.touch(user, ("email",))
+        self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.get_user_by_email("a@b.c").id, b.id)
+        self.assertIsNone(self.storage.get_user_by_email("tmp@b.c"))
+
+    def test_duplicates_saved_earlier_are_reported(self):
+        self.storage.close()
+        connection = sqlite3.connect("test.db")
+        connection.execute("DROP INDEX user_email")
+        for id in ("1", "2"):
+            connection.execute(
+                "INSERT INTO objects VALUES ('User', ?, ?)",
+                (id, '{"id": "%s", "email": "a@b.c"}' % id))
+        connection.commit()
+        connection.close()
+        with self.assertWarnsRegex(UserWarning, "sharing an email"):
+            self.restart()
+        with self.assertWarnsRegex(UserWarning, "left out of the index"):
+            self.assertEqual(len(self.storage.all(User)), 2)
+        user = self.storage.get(User, "2")
+        self.storage.touch(user, ("first_name",))
+        self.storage.save()
+
+    def test_save_writes_rows(self):
+        user, state = User(), State()
+        self.storage.new(user)
+        self.storage.new(state)
+        self.storage.save()
+        self.assertEqual(self.rows(), sorted([("User", user.id),
+                                              ("State", state.id)]))
+
+    def test_reload_reads_rows_back(self):
+        place = Place()
+        place.price_by_night = 150
+        self.storage.new(place)
+        self.storage.save()
+        self.restart()
+        stored = self.storage.get(Place, place.id)
+        self.assertIsNot(stored, place)
+        self.assertEqual(stored.to_dict(), place.to_dict())
+
+    def test_get_reads_single_row(self):
+        user, state = User(), State()
+        self.storage.new(user)
+        self.storage.new(state)
+        self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.get("User", user.id).id, user.id)
+        self.assertIsNone(self.storage.get(User, "missing"))
+        self.assertEqual(list(self.storage._DBStorage__objects),
+                         ["User." + user.id])
+
+    def test_update_rewrites_only_its_row(self):
+        user = User()
+        self.storage.new(user)
+        self.storage.save()
+        self.restart()
+        stored = self.storage.get(User, user.id)
+        stored.email = "a@b.c"
+        self.storage.touch(stored)
+        self.assertEqual(list(self.storage._DBStorage__dirty), ["User." + user.id])
+        self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.get(User, user.id).email, "a@b.c")
+
+    def test_delete_removes_row(self):
+        user = User()
+        self.storage.new(user)
+        self.storage.save()
+        self.restart()
+        self.storage.delete(self.storage.get(User, user.id))
+        self.assertIsNone(self.storage.get(User, user.id))
+        self.assertEqual(self.storage.all(User), {})
+        self.storage.save()
+        self.assertEqual(self.rows(), [])
+
+    def test_unsaved_objects_survive_class_load(self):
+        user, other = User(), User()
+        self.storage.new(user)
+        self.storage.save()
+        self.restart()
+        self.storage.new(other)
+        self.assertEqual(len(self.storage.all(User)), 2)
+        self.assertIs(self.storage.all()["User." + other.id], other)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,14 +5,35 @@ This script includes tests for file_storage.py in the models/engine directory.
 Test classes included:
     TestFileStorageCreation
     TestFileStorageFunctions
+    TestFileStorageJournal
+    TestFileStorageDirtyTracking
+    TestFileStorageAtomicSave
+    TestFileStorageSharded
+    TestFileStorageParallelReload
+    TestFileStorageBinaryFormat
+    TestFileStorageAsyncWrites
+    TestFileStorageClassIndex
+    TestFileStorageSecondaryIndexes
+    TestFileStorageRangeIndexes
+    TestFileStorageGeoIndex
+    TestFileStorageTextIndex
+    TestFileStorageUniqueEmail
+    TestFileStorageQuery
 """
 import os
 import json
+import shutil
+import time
 import models
 import unittest
 from datetime import datetime
+from unittest.mock import patch
 from models.base_model import BaseModel
+from console import HBNBCommand
+from models.engine import binary_format
 from models.engine.file_storage import FileStorage
+from models.engine.indexes import GridIndex, SortedIndex
+from models.engine.text_index import TextIndex
 from models.user import User
 from models.state import State
 from models.place import Place
@@ -66,9 +87,22 @@ class TestFileStorageFunctions(unittest.TestCase):
     def test_all_returns_dict(self):
         self.assertIsInstance(models.storage.all(), dict)
 
-    def test_all_with_argument_raises_error(self):
+    def test_all_with_class_returns_only_that_class(self):
+        user, state = User(), State()
+        users = models.storage.all(User)
+        self.assertIn("User." + user.id, users)
+        self.assertNotIn("State." + state.id, users)
+        self.assertEqual(users, models.storage.all("User"))
+
+    def test_all_with_too_many_arguments_raises_error(self):
         with self.assertRaises(TypeError):
-            models.storage.all(None)
+            models.storage.all(None, None)
+
+    def test_get_returns_object_or_none(self):
+        user = User()
+        self.assertIs(models.storage.get(User, user.id), user)
+        self.assertIs(models.storage.get("User", user.id), user)
+        self.assertIsNone(models.storage.get(State, user.id))
 
     def test_new_adds_objects(self):
         # Create one instance of each model
@@ -116,6 +150,16 @@ class TestFileStorageFunctions(unittest.TestCase):
         for instance in instances:
             self.assertIn(f"{instance.__class__.__name__}.{instance.id}", objects)
 
+    def test_reload_rejects_unknown_class(self):
+        with open("file.json", "w") as f:
+            json.dump({"os.1": {"__class__": "os", "id": "1"}}, f)
+        try:
+            with self.assertRaises(ValueError):
+                FileStorage().reload()
+        finally:
+            os.remove("file.json")
+            FileStorage._FileStorage__objects = {}
+
     def test_reload_without_file_raises_error(self):
         self.assertRaises(FileNotFoundError, models.storage.reload())
 
@@ -124,5 +168,1047 @@ class TestFileStorageFunctions(unittest.TestCase):
             models.storage.reload(None)
 
 
+class TestFileStorageJournal(unittest.TestCase):
+    """Tests for the append-only journal mode of FileStorage."""
+
+    def setUp(self):
+        for name in ("file.json", "file.json.log"):
+            try:
+                os.rename(name, name + ".temp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(journal=True)
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.log"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename(name + ".temp", name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_appends_to_journal_only(self):
+        user = User()
+        self.storage.save()
+        self.assertFalse(os.path.exists("file.json"))
+        with open("file.json.log", "r") as file:
+            lines = file.readlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["key"], "User." + user.id)
+
+    def test_save_writes_only_changed_objects(self):
+        User()
+        self.storage.save()
+        place = Place()
+        self.storage.save()
+        with open("file.json.log", "r") as file:
+            lines = file.readlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1])["key"], "Place." + place.id)
+
+    def test_reload_replays_updates_and_deletes(self):
+        user = User()
+        state = State()
+        self.storage.save()
+        user.email = "a@b.c"
+        user.save()
+        self.storage.delete(state)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        objects = self.storage.all()
+        self.assertEqual(objects["User." + user.id].email, "a@b.c")
+        self.assertNotIn("State." + state.id, objects)
+
+    def test_reload_ignores_torn_last_record(self):
+        user = User()
+        self.storage.save()
+        with open("file.json.log", "a") as file:
+            file.write('{"op": "set", "key": "User.x", "obj"')
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertIn("User." + user.id, self.storage.all())
+        self.assertIn("User." + user.id, open("file.json").read())
+        self.assertFalse(os.path.exists("file.json.log"))
+
+    def test_compact_folds_journal_into_file(self):
+        user = User()
+        self.storage.save()
+        self.storage.compact()
+        self.assertFalse(os.path.exists("file.json.log"))
+        with open("file.json", "r") as file:
+            self.assertIn("User." + user.id, file.read())
+
+
+class TestFileStorageDirtyTracking(unittest.TestCase):
+    """Tests for saving only the objects changed since the last save."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty = {}
+        self.storage = FileStorage()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_attribute_assignment_marks_dirty(self):
+        user = User()
+        self.storage.save()
+        user.first_name = "Betty"
+        self.assertEqual(FileStorage._FileStorage__dirty, {"User." + user.id: "set"})
+
+    def test_delete_marks_dirty(self):
+        user = User()
+        self.storage.save()
+        self.storage.delete(user)
+        self.assertEqual(FileStorage._FileStorage__dirty, {"User." + user.id: "del"})
+
+    def test_save_serializes_only_dirty_objects(self):
+        instances = [User() for _ in range(5)]
+        self.storage.save()
+        instances[0].first_name = "Betty"
+        with patch.object(User, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            self.storage.save()
+        self.assertEqual(to_dict.call_count, 1)
+
+    def test_save_without_changes_writes_nothing(self):
+        User()
+        self.storage.save()
+        self.storage.reload()
+        with patch.object(FileStorage, "_FileStorage__replace") as replace:
+            self.storage.save()
+            with self.storage.batch():
+                self.storage.save()
+        replace.assert_not_called()
+
+    def test_first_save_after_reload_serializes_only_dirty_objects(self):
+        instances = [User() for _ in range(5)]
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        user = self.storage.get(User, instances[0].id)
+        user.first_name = "Betty"
+        self.storage.delete(self.storage.get(User, instances[1].id))
+        with patch.object(User, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            self.storage.save()
+        self.assertEqual(to_dict.call_count, 1)
+        with open("file.json", "r") as file:
+            content = json.load(file)
+        kept = instances[:1] + instances[2:]
+        self.assertEqual(set(content), {"User." + i.id for i in kept})
+        self.assertEqual(content["User." + user.id]["first_name"], "Betty")
+
+    def test_save_writes_updates_and_deletes(self):
+        user, state = User(), State()
+        self.storage.save()
+        user.first_name = "Betty"
+        self.storage.delete(state)
+        self.storage.save()
+        with open("file.json", "r") as file:
+            content = json.load(file)
+        self.assertEqual(content["User." + user.id]["first_name"], "Betty")
+        self.assertNotIn("State." + state.id, content)
+
+    def test_untracked_objects_are_not_marked(self):
+        user = User(id="1", created_at=datetime.now().isoformat(),
+                    updated_at=datetime.now().isoformat())
+        user.first_name = "Betty"
+        self.assertEqual(FileStorage._FileStorage__dirty, {})
+
+
+class TestFileStorageAtomicSave(unittest.TestCase):
+    """Tests for the write-to-temp, fsync and rename save path."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_leaves_no_temporary_files(self):
+        User()
+        FileStorage().save()
+        self.assertEqual([n for n in os.listdir(".") if n.endswith(".tmp")], [])
+
+    def test_failed_replace_keeps_old_file(self):
+        user = User()
+        models.storage.save()
+        with open("file.json", "r") as file:
+            before = file.read()
+        user.first_name = "Betty"
+        with patch("os.replace", side_effect=OSError):
+            with self.assertRaises(OSError):
+                models.storage.save()
+        with open("file.json", "r") as file:
+            self.assertEqual(before, file.read())
+        self.assertEqual([n for n in os.listdir(".") if n.endswith(".tmp")], [])
+
+    def test_save_keeps_file_permissions(self):
+        User()
+        models.storage.save()
+        os.chmod("file.json", 0o640)
+        User()
+        models.storage.save()
+        self.assertEqual(os.stat("file.json").st_mode & 0o777, 0o640)
+
+    def test_save_with_directory_fsync(self):
+        user = User()
+        FileStorage(fsync_dir=True).save()
+        with open("file.json", "r") as file:
+            self.assertIn("User." + user.id, file.read())
+
+
+class TestFileStorageSharded(unittest.TestCase):
+    """Tests for the one-file-per-class layout with lazy loading."""
+
+    def setUp(self):
+        for name in ("file.json", "file.json.d"):
+            try:
+                os.rename(name, name + ".temp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(sharded=True)
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        shutil.rmtree("file.json.d", ignore_errors=True)
+        for name in ("file.json", "file.json.d"):
+            try:
+                os.rename(name + ".temp", name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__unloaded = set()
+
+    def restart(self):
+        """Drop everything in memory and reload from the shards."""
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+
+    def test_save_writes_one_file_per_class(self):
+        user, state = User(), State()
+        self.storage.save()
+        self.assertEqual(sorted(os.listdir("file.json.d")),
+                         ["State.json", "User.json"])
+        with open("file.json.d/User.json", "r") as file:
+            self.assertIn("User." + user.id, file.read())
+
+    def test_save_rewrites_only_changed_shards(self):
+        user, state = User(), State()
+        self.storage.save()
+        before = os.stat("file.json.d/State.json").st_ino
+        user.first_name = "Betty"
+        self.storage.save()
+        self.assertEqual(before, os.stat("file.json.d/State.json").st_ino)
+
+    def test_reload_loads_shards_lazily(self):
+        user, state = User(), State()
+        self.storage.save()
+        self.restart()
+        self.assertEqual(FileStorage._FileStorage__objects, {})
+        self.assertEqual(self.storage.get(User, user.id).id, user.id)
+        self.assertNotIn("State." + state.id, FileStorage._FileStorage__objects)
+        self.assertIn("State." + state.id, self.storage.all())
+
+    def test_new_object_keeps_unloaded_objects(self):
+        user = User()
+        self.storage.save()
+        self.restart()
+        other = User()
+        self.storage.save()
+        self.restart()
+        self.assertEqual(len(self.storage.all(User)), 2)
+        self.assertIsNotNone(self.storage.get(User, other.id))
+
+    def test_delete_is_persisted(self):
+        user = User()
+        self.storage.save()
+        self.storage.delete(user)
+        self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.all(User), {})
+
+    def test_reload_splits_single_file(self):
+        user = User()
+        FileStorage().save()
+        self.restart()
+        self.assertTrue(os.path.exists("file.json.d/User.json"))
+        self.assertIn("User." + user.id, self.storage.all())
+
+    def test_journal_and_sharded_are_exclusive(self):
+        with self.assertRaises(ValueError):
+            FileStorage(journal=True, sharded=True)
+
+
+class TestFileStorageParallelReload(unittest.TestCase):
+    """Tests for building reloaded objects in a process pool."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.instances = [cls() for cls in (BaseModel, User, State, Place,
+                                            City, Amenity, Review) * 20]
+        self.instances[0].name = "line\nbreak, {with} \"quotes\""
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_writes_one_record_per_line(self):
+        with open("file.json", "r") as file:
+            lines = file.read().splitlines()
+        self.assertEqual(len(lines), len(self.instances) + 2)
+
+    @patch.object(FileStorage, "CHUNK_MIN", 256)
+    def test_parallel_reload_matches_serial_reload(self):
+        FileStorage(workers=4).reload()
+        parallel = {k: v.to_dict() for k, v in models.storage.all().items()}
+        FileStorage._FileStorage__objects = {}
+        FileStorage().reload()
+        serial = {k: v.to_dict() for k, v in models.storage.all().items()}
+        self.assertEqual(len(parallel), len(self.instances))
+        self.assertEqual(parallel, serial)
+        self.assertEqual(list(parallel), list(serial))
+
+    @patch.object(FileStorage, "CHUNK_MIN", 256)
+    def test_save_after_parallel_reload_keeps_file(self):
+        with open("file.json", "r") as file:
+            text = file.read()
+        storage = FileStorage(workers=4)
+        storage.reload()
+        storage.get(User, self.instances[1].id).first_name = "Betty"
+        storage.save()
+        with open("file.json", "r") as file:
+            lines = file.read().splitlines()
+        changed = [line for line in lines if line not in text.splitlines()]
+        self.assertEqual(len(lines), len(self.instances) + 2)
+        self.assertEqual(len(changed), 1)
+        self.assertIn("Betty", changed[0])
+
+    @patch.object(FileStorage, "CHUNK_MIN", 256)
+    def test_parallel_reload_of_indented_file(self):
+        with open("file.json", "r") as file:
+            content = json.load(file)
+        with open("file.json", "w") as file:
+            json.dump(content, file, indent=2)
+        FileStorage(workers=2).reload()
+        self.assertEqual(set(models.storage.all()), set(content))
+
+    @patch.object(FileStorage, "CHUNK_MIN", 256)
+    def test_parallel_reload_of_single_line_file(self):
+        with open("file.json", "r") as file:
+            content = json.load(file)
+        with open("file.json", "w") as file:
+            json.dump(content, file)
+        FileStorage(workers=4).reload()
+        self.assertEqual(set(models.storage.all()), set(content))
+
+    @patch.object(FileStorage, "CHUNK_MIN", 256)
+    def test_parallel_reload_rejects_mismatched_keys(self):
+        with open("file.json", "r") as file:
+            text = file.read()
+        with open("file.json", "w") as file:
+            file.write(text.replace('"BaseModel.', '"User.', 1))
+        with self.assertRaises(ValueError):
+            FileStorage(workers=2).reload()
+
+
+class TestFileStorageBinaryFormat(unittest.TestCase):
+    """Tests for saving and reloading the binary storage format."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(fmt="binary")
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def restart(self, storage):
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        return storage.all()
+
+    def test_save_writes_binary_file(self):
+        User()
+        self.storage.save()
+        self.assertTrue(binary_format.is_binary("file.json"))
+
+    def test_reload_binary_file(self):
+        user, place = User(), Place()
+        user.email = "a@b.c"
+        place.price_by_night = 90
+        self.storage.save()
+        before = {k: v.to_dict() for k, v in self.storage.all().items()}
+        objects = self.restart(FileStorage())
+        self.assertEqual({k: v.to_dict() for k, v in objects.items()}, before)
+
+    def test_incremental_binary_saves(self):
+        user, state = User(), State()
+        self.storage.save()
+        user.email = "a@b.c"
+        self.storage.delete(state)
+        self.storage.save()
+        objects = self.restart(self.storage)
+        self.assertEqual(objects["User." + user.id].email, "a@b.c")
+        self.assertNotIn("State." + state.id, objects)
+
+    def test_binary_storage_reads_json_file(self):
+        user = User()
+        FileStorage().save()
+        self.assertIn("User." + user.id, self.restart(self.storage))
+        self.storage.save()
+        self.assertTrue(binary_format.is_binary("file.json"))
+
+    def test_invalid_formats_raise(self):
+        with self.assertRaises(ValueError):
+            FileStorage(fmt="xml")
+        with self.assertRaises(ValueError):
+            FileStorage(fmt="binary", sharded=True)
+
+
+class TestFileStorageAsyncWrites(unittest.TestCase):
+    """Tests for saves written by a background thread."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(async_writes=True)
+        replace = FileStorage._FileStorage__replace
+
+        def slow_replace(storage, path, text):
+            time.sleep(0.05)
+            replace(storage, path, text)
+        patcher = patch.object(FileStorage, "_FileStorage__replace",
+                               slow_replace)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.storage.close()
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def stored_keys(self):
+        with open("file.json") as f:
+            return set(json.load(f))
+
+    def test_save_returns_before_writing(self):
+        User()
+        self.storage.save()
+        self.assertFalse(os.path.exists("file.json"))
+        self.storage.flush()
+        self.assertTrue(os.path.exists("file.json"))
+
+    def test_flush_writes_every_save(self):
+        users = []
+        for _ in range(5):
+            users.append(User())
+            self.storage.save()
+        self.storage.delete(users[0])
+        self.storage.save()
+        self.storage.flush()
+        self.assertEqual(self.stored_keys(),
+                         {"User." + user.id for user in users[1:]})
+
+    def test_snapshot_is_taken_at_save(self):
+        user = User()
+        user.email = "saved@b.c"
+        self.storage.save()
+        user.email = "unsaved@b.c"
+        self.storage._FileStorage__queue.join()
+        with open("file.json") as f:
+            self.assertEqual(json.load(f)["User." + user.id]["email"],
+                             "saved@b.c")
+
+    def test_close_stops_writer(self):
+        User()
+        self.storage.save()
+        writer = self.storage._FileStorage__writer
+        self.storage.close()
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(len(self.stored_keys()), 1)
+        state = State()
+        self.storage.save()
+        self.assertIn("State." + state.id, self.stored_keys())
+
+    def test_close_unregisters_exit_hook(self):
+        with patch("atexit.unregister") as unregister:
+            self.storage.close()
+        unregister.assert_called_once_with(
+            self.storage._FileStorage__stop_writer)
+
+    def test_exit_hook_writes_only_queued_saves(self):
+        User()
+        self.storage.save()
+        state = State()
+        self.storage._FileStorage__stop_writer()
+        self.assertNotIn("State." + state.id, self.stored_keys())
+        self.assertEqual(len(self.stored_keys()), 1)
+
+    def test_writer_error_is_raised(self):
+        with patch.object(FileStorage, "_FileStorage__write_file",
+                          side_effect=OSError("disk full")):
+            User()
+            self.storage.save()
+            with self.assertRaises(OSError):
+                self.storage.flush()
+        self.storage.flush()
+
+    def check_exit_command(self, command):
+        with patch("console.storage", self.storage), patch("sys.stdout"):
+            for _ in range(3):
+                HBNBCommand().onecmd("create Place")
+            HBNBCommand().onecmd("create User")
+            self.assertTrue(HBNBCommand().onecmd(command))
+        self.assertEqual(self.stored_keys(), set(self.storage.all()))
+        self.assertEqual(len(self.stored_keys()), 4)
+
+    def test_quit_loses_no_data(self):
+        self.check_exit_command("quit")
+
+    def test_eof_loses_no_data(self):
+        self.check_exit_command("EOF")
+
+
+class TestFileStorageClassIndex(unittest.TestCase):
+    """Tests for the per-class index behind all(cls)."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_all_cls_follows_new_and_delete(self):
+        users = [User() for _ in range(3)]
+        state = State()
+        self.storage.delete(users[0])
+        self.assertEqual(set(self.storage.all(User)),
+                         {"User." + user.id for user in users[1:]})
+        self.assertEqual(list(self.storage.all("State")), ["State." + state.id])
+        self.storage.delete(state)
+        self.assertEqual(self.storage.all(State), {})
+        self.assertEqual(self.storage.all(Review), {})
+
+    def test_all_cls_returns_a_copy(self):
+        user = User()
+        self.storage.all(User).clear()
+        self.assertIn("User." + user.id, self.storage.all(User))
+
+    def test_index_rebuilt_when_objects_replaced(self):
+        User()
+        user = User()
+        FileStorage._FileStorage__objects = {"User." + user.id: user}
+        self.assertEqual(list(self.storage.all(User)), ["User." + user.id])
+
+    def test_index_after_reload_with_journal(self):
+        storage = FileStorage(journal=True)
+        user, state = User(), State()
+        storage.save()
+        storage.delete(user)
+        storage.save()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(storage.all(User), {})
+        self.assertEqual(list(storage.all(State)), ["State." + state.id])
+        os.remove(storage.journal_path)
+
+
+class TestFileStorageSecondaryIndexes(unittest.TestCase):
+    """Tests for indexes declared with add_index()."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+        self.state = State()
+        self.city = City()
+        self.city.state_id = self.state.id
+        self.index = self.storage.add_index(City, "state_id")
+
+    def tearDown(self):
+        self.storage.drop_index(City, "state_id")
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def key(self, obj):
+        return "{}.{}".format(type(obj).__name__, obj.id)
+
+    def test_add_index_fills_from_existing_objects(self):
+        self.assertEqual(self.storage.find(City, "state_id", self.state.id),
+                         {self.key(self.city): self.city})
+        self.assertIs(self.storage.add_index("City", "state_id"), self.index)
+        self.assertIs(self.storage.index(City, "state_id"), self.index)
+        self.assertIsNone(self.storage.index(City, "name"))
+
+    def test_index_follows_new_update_and_delete(self):
+        other = City()
+        self.assertIn(self.key(other), self.storage.find(City, "state_id", ""))
+        other.state_id = self.state.id
+        self.assertEqual(len(self.storage.find(City, "state_id",
+                                               self.state.id)), 2)
+        self.assertNotIn(self.key(other),
+                         self.storage.find(City, "state_id", ""))
+        self.storage.delete(self.city)
+        self.assertEqual(self.storage.find(City, "state_id", self.state.id),
+                         {self.key(other): other})
+
+    def test_index_follows_console_update(self):
+        state = State()
+        with patch("sys.stdout"):
+            HBNBCommand().onecmd('update City {} state_id "{}"'.format(
+                self.city.id, state.id))
+        self.assertEqual(self.storage.find(City, "state_id", state.id),
+                         {self.key(self.city): self.city})
+        self.assertEqual(self.storage.find(City, "state_id", self.state.id),
+                         {})
+
+    def test_index_rebuilt_on_reload(self):
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual(self.storage.find(City, "state_id", self.state.id),
+                         {})
+        self.storage.reload()
+        found = self.storage.find(City, "state_id", self.state.id)
+        self.assertEqual(list(found), [self.key(self.city)])
+        self.assertIsNot(found[self.key(self.city)], self.city)
+
+    def test_nested_values_are_indexed(self):
+        self.city.state_id = {"id": [self.state.id, ["x"]]}
+        self.assertEqual(self.storage.find(City, "state_id",
+                                           {"id": [self.state.id, ["x"]]}),
+                         {self.key(self.city): self.city})
+        self.assertEqual(self.storage.find(City, "state_id", self.state.id),
+                         {})
+
+    def test_failed_index_update_is_rolled_back(self):
+        with patch.object(type(self.index), "add",
+                          side_effect=TypeError("unhashable")):
+            with self.assertRaises(TypeError):
+                self.city.state_id = "other"
+        self.assertEqual(self.city.state_id, self.state.id)
+
+    def test_find_without_index_scans(self):
+        self.assertEqual(self.storage.find(State, "id", self.state.id),
+                         {self.key(self.state): self.state})
+
+
+class TestFileStorageRangeIndexes(unittest.TestCase):
+    """Tests for range queries on Place's numeric attributes."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+        self.places = []
+        for price in (80, 120, 190, 250):
+            place = Place()
+            place.price_by_night = price
+            self.places.append(place)
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def prices(self, *args, **kwargs):
+        return [place.price_by_night for place in self.storage.find_range(
+            Place, "price_by_night", *args, **kwargs).values()]
+
+    def test_place_attributes_are_indexed(self):
+        for attr in ("price_by_night", "number_rooms", "number_bathrooms",
+                     "max_guest"):
+            self.assertIsInstance(
+                self.storage.index(Place, attr, SortedIndex), SortedIndex)
+
+    def test_range_and_top_n(self):
+        self.assertEqual(self.prices(100, 200), [120, 190])
+        self.assertEqual(self.prices(reverse=True, limit=2), [250, 190])
+
+    def test_range_follows_updates(self):
+        self.places[0].price_by_night = 150
+        self.storage.delete(self.places[1])
+        self.assertEqual(self.prices(100, 200), [150, 190])
+        with patch("sys.stdout"):
+            HBNBCommand().onecmd("update Place {} price_by_night 110".format(
+                self.places[3].id))
+        self.assertEqual(self.prices(100, 200), [110, 150, 190])
+
+    def test_range_after_reload(self):
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.prices(100, 200), [120, 190])
+
+    def test_range_without_index_sorts(self):
+        self.assertIsNone(self.storage.index(Place, "latitude", SortedIndex))
+        self.places[2].latitude = -3.5
+        found = self.storage.find_range(Place, "latitude", hi=0.0)
+        self.assertEqual(list(found), ["Place." + self.places[2].id])
+
+
+class TestFileStorageGeoIndex(unittest.TestCase):
+    """Tests for bounding box and radius queries on Place coordinates."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+        self.paris, self.london = Place(), Place()
+        self.paris.latitude, self.paris.longitude = 48.8566, 2.3522
+        self.london.latitude, self.london.longitude = 51.5074, -0.1278
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_place_coordinates_are_indexed(self):
+        self.assertIsInstance(self.storage.index(
+            Place, GridIndex.COORDINATES, GridIndex), GridIndex)
+
+    def test_find_near_and_box(self):
+        self.assertEqual(list(self.storage.find_near(Place, 51.5, -0.1, 10)),
+                         ["Place." + self.london.id])
+        self.assertEqual(list(self.storage.find_near(Place, 49, 2, n=2)),
+                         ["Place." + self.paris.id, "Place." + self.london.id])
+        self.assertEqual(list(self.storage.find_box(Place, 48, 2, 49, 3)),
+                         ["Place." + self.paris.id])
+
+    def test_index_follows_updates_and_reload(self):
+        self.london.latitude, self.london.longitude = 48.85, 2.35
+        self.assertEqual(len(self.storage.find_near(Place, 48.85, 2.35, 5)),
+                         2)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(len(self.storage.find_near(Place, 48.85, 2.35, 5)),
+                         2)
+
+    def test_find_near_without_index(self):
+        user = User()
+        user.latitude, user.longitude = 0.0, 0.0
+        self.assertEqual(list(self.storage.find_near(User, 0.1, 0.1, 50)),
+                         ["User." + user.id])
+
+
+class TestFileStorageTextIndex(unittest.TestCase):
+    """Tests for full-text search and the saved index file."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+        self.place = Place()
+        self.place.name = "Sunny loft"
+        self.place.description = "A quiet loft near the park"
+        self.review = Review()
+        self.review.text = "Quiet, clean and sunny"
+
+    def tearDown(self):
+        for path in ("file.json", "file.json.idx"):
+            try:
+                os.remove(path)
+            except IOError:
+                pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__saved = {}
+
+    def test_search(self):
+        self.assertEqual(list(self.storage.search(Place, "loft quiet")),
+                         ["Place." + self.place.id])
+        self.assertEqual(list(self.storage.search(Review, "sunny")),
+                         ["Review." + self.review.id])
+        self.assertEqual(self.storage.search(Review, "loft"), {})
+        with self.assertRaises(ValueError):
+            self.storage.search(User, "loft")
+
+    def test_search_follows_updates(self):
+        self.review.text = "Noisy"
+        self.assertEqual(self.storage.search(Review, "quiet"), {})
+        self.assertEqual(len(self.storage.search(Review, "noisy")), 1)
+        self.storage.delete(self.place)
+        self.assertEqual(self.storage.search(Place, "loft"), {})
+
+    def test_close_saves_index_for_reload(self):
+        self.storage.close()
+        self.assertTrue(os.path.exists("file.json.idx"))
+        FileStorage._FileStorage__objects = {}
+        with patch.object(TextIndex, "rebuild") as rebuild:
+            self.storage.reload()
+        rebuild.assert_not_called()
+        found = self.storage.search(Place, "park")
+        self.assertEqual(list(found), ["Place." + self.place.id])
+        self.assertIsNot(found["Place." + self.place.id], self.place)
+
+    def test_stale_index_file_is_rebuilt(self):
+        self.storage.close()
+        self.review.text = "Noisy"
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        with patch.object(TextIndex, "load") as load:
+            self.storage.reload()
+        load.assert_not_called()
+        self.assertEqual(self.storage.search(Review, "quiet"), {})
+        self.assertEqual(len(self.storage.search(Review, "noisy")), 1)
+
+    def test_close_without_changes_writes_nothing(self):
+        self.storage.close()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.storage.search(Place, "park")
+        with patch.object(FileStorage, "_FileStorage__replace") as replace:
+            self.storage.close()
+        replace.assert_not_called()
+
+
+class TestFileStorageUniqueEmail(unittest.TestCase):
+    """Tests for the unique index on User.email."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+        self.user = User()
+        self.user.email = "a@b.c"
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_get_user_by_email(self):
+        self.assertIs(self.storage.get_user_by_email("a@b.c"), self.user)
+        self.assertIsNone(self.storage.get_user_by_email("x@b.c"))
+        self.assertIsNone(self.storage.get_user_by_email(""))
+
+    def test_duplicate_update_is_refused_and_reverted(self):
+        other = User()
+        with self.assertRaises(ValueError):
+            other.email = "a@b.c"
+        self.assertEqual(other.email, "")
+        self.assertNotIn("email", other.__dict__)
+        other.email = "x@b.c"
+        with self.assertRaises(ValueError):
+            other.email = "a@b.c"
+        self.assertEqual(other.email, "x@b.c")
+        self.assertIs(self.storage.get_user_by_email("x@b.c"), other)
+
+    def test_duplicate_new_is_refused(self):
+        copy = User(**self.user.to_dict())
+        copy.id = "other"
+        with self.assertRaises(ValueError):
+            self.storage.new(copy)
+        self.assertIsNone(self.storage.get(User, "other"))
+        self.assertIs(self.storage.get_user_by_email("a@b.c"), self.user)
+
+    def test_delete_frees_the_email(self):
+        self.storage.delete(self.user)
+        self.assertIsNone(self.storage.get_user_by_email("a@b.c"))
+        User().email = "a@b.c"
+
+    def test_lookup_after_reload(self):
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.get_user_by_email("a@b.c").id,
+                         self.user.id)
+
+    def test_duplicates_saved_earlier_stay_usable(self):
+        self.storage.save()
+        with open("file.json", "r") as file:
+            content = json.load(file)
+        content["User.other"] = dict(content["User." + self.user.id],
+                                     id="other")
+        with open("file.json", "w") as file:
+            json.dump(content, file)
+        FileStorage._FileStorage__objects = {}
+        with self.assertWarnsRegex(UserWarning, "left out of the index"):
+            self.storage.reload()
+        copy = self.storage.get(User, "other")
+        copy.first_name = "Betty"
+        copy.email = "a@b.c"
+        copy.save()
+        copy.email = "x@b.c"
+        self.assertIs(self.storage.get_user_by_email("x@b.c"), copy)
+        with self.assertRaises(ValueError):
+            copy.email = "a@b.c"
+
+
+class TestFileStorageQuery(unittest.TestCase):
+    """Tests for queries planned over the declared indexes."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "temp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+        self.places = []
+        for price, city_id in ((80, "a"), (120, "a"), (190, "b"), (60, "b")):
+            place = Place()
+            place.price_by_night = price
+            place.city_id = city_id
+            self.places.append(place)
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("temp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_count(self):
+        self.assertEqual(self.storage.count(Place), 4)
+        self.assertEqual(self.storage.count("User"), 0)
+        self.assertEqual(self.storage.count(), 4)
+
+    def test_query_uses_indexes(self):
+        query = self.storage.query(Place).where(
+            price_by_night__lt=150, city_id="a").order_by("-price_by_night")
+        self.assertIn("HashIndex on city_id = 'a'", query.explain())
+        self.assertEqual(query.all(), [self.places[1], self.places[0]])
+        query = self.storage.query(Place).order_by("price_by_night").limit(2)
+        self.assertTrue(query.plan().ordered)
+        self.assertEqual([p.price_by_night for p in query], [60, 80])
+
+    def test_query_sees_changes(self):
+        query = self.storage.query(Place).where(price_by_night__ge=100)
+        self.places[0].price_by_night = 100
+        self.storage.delete(self.places[2])
+        self.assertEqual(sorted(p.price_by_night for p in query), [100, 120])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,252 @@
+#!/usr/bin/python3
+"""
+This script includes tests for indexes.py in the models/engine directory.
+
+Test classes included:
+    TestHashIndex
+    TestSortedIndex
+    TestGridIndex
+    TestUniqueIndex
+"""
+import unittest
+from models.engine.indexes import GridIndex, HashIndex, SortedIndex, \
+    UniqueIndex, distance_km
+
+
+class Thing:
+    """Plain object to index."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class TestHashIndex(unittest.TestCase):
+    """Tests for the attribute value -> objects index."""
+
+    def setUp(self):
+        self.index = HashIndex("city_id")
+        self.a, self.b = Thing(city_id="x"), Thing(city_id="x")
+        self.index.add("Place.a", self.a)
+        self.index.add("Place.b", self.b)
+
+    def test_find(self):
+        self.assertEqual(self.index.find("x"),
+                         {"Place.a": self.a, "Place.b": self.b})
+        self.assertEqual(self.index.find("y"), {})
+        self.assertEqual(len(self.index), 2)
+
+    def test_add_moves_changed_value(self):
+        self.a.city_id = "y"
+        self.index.add("Place.a", self.a)
+        self.assertEqual(self.index.find("x"), {"Place.b": self.b})
+        self.assertEqual(self.index.find("y"), {"Place.a": self.a})
+        self.assertEqual(len(self.index), 2)
+
+    def test_discard(self):
+        self.index.discard("Place.a")
+        self.index.discard("Place.missing")
+        self.assertEqual(self.index.find("x"), {"Place.b": self.b})
+        self.index.discard("Place.b")
+        self.assertEqual(self.index.find("x"), {})
+        self.assertEqual(len(self.index), 0)
+
+    def test_missing_attribute_is_none(self):
+        other = Thing()
+        self.index.add("Place.c", other)
+        self.assertEqual(self.index.find(None), {"Place.c": other})
+
+    def test_list_values(self):
+        index = HashIndex("amenity_ids")
+        thing = Thing(amenity_ids=["1", "2"])
+        index.add("Place.a", thing)
+        self.assertEqual(index.find(["1", "2"]), {"Place.a": thing})
+
+    def test_find_returns_a_copy(self):
+        self.index.find("x").clear()
+        self.assertEqual(len(self.index.find("x")), 2)
+
+    def test_clear(self):
+        self.index.clear()
+        self.assertEqual(self.index.find("x"), {})
+        self.assertEqual(len(self.index), 0)
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Tests for the ordered index on a numeric attribute."""
+
+    def setUp(self):
+        self.index = SortedIndex("price")
+        self.things = {"Place.{}".format(i): Thing(price=price)
+                       for i, price in enumerate([50, 100, 150, 100, 200])}
+        for key, thing in self.things.items():
+            self.index.add(key, thing)
+
+    def keys(self, *args, **kwargs):
+        return list(self.index.range(*args, **kwargs))
+
+    def test_range_bounds(self):
+        self.assertEqual(self.keys(100, 200),
+                         ["Place.1", "Place.3", "Place.2"])
+        self.assertEqual(self.keys(100, 200, include_lo=False),
+                         ["Place.2"])
+        self.assertEqual(self.keys(100, 200, include_hi=True),
+                         ["Place.1", "Place.3", "Place.2", "Place.4"])
+        self.assertEqual(self.keys(hi=100), ["Place.0"])
+        self.assertEqual(self.keys(150), ["Place.2", "Place.4"])
+        self.assertEqual(self.keys(300), [])
+
+    def test_top_n(self):
+        self.assertEqual(self.keys(limit=2), ["Place.0", "Place.1"])
+        self.assertEqual(self.keys(reverse=True, limit=2),
+                         ["Place.4", "Place.2"])
+
+    def test_add_moves_changed_value(self):
+        self.things["Place.4"].price = 10
+        self.index.add("Place.4", self.things["Place.4"])
+        self.assertEqual(self.keys(limit=1), ["Place.4"])
+        self.assertEqual(self.keys(200), [])
+        self.assertEqual(len(self.index), 5)
+
+    def test_discard(self):
+        self.index.discard("Place.1")
+        self.index.discard("Place.missing")
+        self.assertEqual(self.keys(100, 101), ["Place.3"])
+        self.assertEqual(len(self.index), 4)
+
+    def test_non_numbers_are_left_out(self):
+        self.index.add("Place.5", Thing(price="cheap"))
+        self.index.add("Place.6", Thing(price=True))
+        self.index.add("Place.7", Thing())
+        self.assertEqual(len(self.index), 5)
+        self.things["Place.0"].price = "free"
+        self.index.add("Place.0", self.things["Place.0"])
+        self.assertEqual(len(self.index), 4)
+
+    def test_equal_non_number_is_left_out(self):
+        thing = Thing(price=1)
+        self.index.add("Place.5", thing)
+        thing.price = True
+        self.index.add("Place.5", thing)
+        self.assertNotIn("Place.5", self.keys(0, 10))
+        self.assertEqual(len(self.index), 5)
+
+    def test_rebuild_matches_adds(self):
+        index = SortedIndex("price")
+        index.rebuild(reversed(list(self.things.items())))
+        self.assertEqual(list(index.range()), self.keys())
+        self.assertEqual(len(index), 5)
+
+
+class TestGridIndex(unittest.TestCase):
+    """Tests for the latitude/longitude grid index."""
+
+    points = {"Place.paris": (48.8566, 2.3522),
+              "Place.versailles": (48.8049, 2.1204),
+              "Place.london": (51.5074, -0.1278),
+              "Place.fiji": (-17.7134, 178.065),
+              "Place.samoa": (-13.759, -172.1046),
+              "Place.pole": (89.9, 10.0)}
+
+    def setUp(self):
+        self.index = GridIndex()
+        self.things = {key: Thing(latitude=lat, longitude=lon)
+                       for key, (lat, lon) in self.points.items()}
+        for key, thing in self.things.items():
+            self.index.add(key, thing)
+
+    def test_distance_km(self):
+        self.assertAlmostEqual(distance_km(48.8566, 2.3522, 51.5074, -0.1278),
+                               343.6, delta=0.5)
+        self.assertEqual(distance_km(10, 20, 10, 20), 0)
+
+    def test_box(self):
+        self.assertEqual(set(self.index.box(48, 2, 49, 3)),
+                         {"Place.paris", "Place.versailles"})
+        self.assertEqual(set(self.index.box(-20, 170, -10, -170)),
+                         {"Place.fiji", "Place.samoa"})
+        self.assertEqual(len(self.index.box(-90, -180, 90, 180)), 6)
+
+    def test_near_radius(self):
+        self.assertEqual(list(self.index.near(48.86, 2.35, km=50)),
+                         ["Place.paris", "Place.versailles"])
+        self.assertEqual(list(self.index.near(-15.0, 180.0, km=1000)),
+                         ["Place.fiji", "Place.samoa"])
+        self.assertEqual(list(self.index.near(89.9, -170.0, km=50)),
+                         ["Place.pole"])
+        self.assertEqual(self.index.near(0, 0, km=100), {})
+
+    def test_near_count(self):
+        self.assertEqual(list(self.index.near(51.5, 0, n=2)),
+                         ["Place.london", "Place.versailles"])
+        self.assertEqual(len(self.index.near(0, 0, n=100)), 6)
+        with self.assertRaises(ValueError):
+            self.index.near(0, 0)
+
+    def test_add_moves_changed_position(self):
+        self.things["Place.london"].latitude = 48.85
+        self.things["Place.london"].longitude = 2.35
+        self.index.add("Place.london", self.things["Place.london"])
+        self.assertEqual(list(self.index.near(48.85, 2.35, km=1)),
+                         ["Place.london", "Place.paris"])
+        self.assertEqual(self.index.box(51, -1, 52, 0), {})
+
+    def test_discard_and_invalid_positions(self):
+        self.index.discard("Place.paris")
+        self.index.add("Place.nowhere", Thing(latitude=95.0, longitude=0.0))
+        self.index.add("Place.text", Thing(latitude="north", longitude=0.0))
+        self.assertEqual(len(self.index), 5)
+        self.assertNotIn("Place.paris", self.index.near(48.86, 2.35, km=50))
+
+
+class TestUniqueIndex(unittest.TestCase):
+    """Tests for the index allowing one object per value."""
+
+    def setUp(self):
+        self.index = UniqueIndex("email")
+        self.a = Thing(email="a@b.c")
+        self.index.add("User.a", self.a)
+
+    def test_get_and_find(self):
+        self.assertIs(self.index.get("a@b.c"), self.a)
+        self.assertIsNone(self.index.get("x@b.c"))
+        self.assertEqual(self.index.find("a@b.c"), {"User.a": self.a})
+        self.assertEqual(self.index.find("x@b.c"), {})
+
+    def test_duplicates_are_refused(self):
+        with self.assertRaises(ValueError):
+            self.index.check("User.b", Thing(email="a@b.c"))
+        with self.assertRaises(ValueError):
+            self.index.add("User.b", Thing(email="a@b.c"))
+        self.index.check("User.a", self.a)
+        self.assertEqual(len(self.index), 1)
+
+    def test_empty_values_are_not_indexed(self):
+        self.index.add("User.b", Thing(email=""))
+        self.index.add("User.c", Thing(email=""))
+        self.index.add("User.d", Thing())
+        self.assertEqual(len(self.index), 1)
+        self.assertIsNone(self.index.get(""))
+
+    def test_changed_value_frees_the_old_one(self):
+        self.a.email = "new@b.c"
+        self.index.add("User.a", self.a)
+        self.index.add("User.b", Thing(email="a@b.c"))
+        self.assertIs(self.index.get("new@b.c"), self.a)
+        self.index.discard("User.a")
+        self.assertIsNone(self.index.get("new@b.c"))
+
+    def test_nested_values(self):
+        self.index.add("User.n", Thing(email={"a": [1, {2}]}))
+        self.assertEqual(self.index.get({"a": [1, {2}]}).email,
+                         {"a": [1, {2}]})
+
+    def test_rebuild_keeps_first_duplicate(self):
+        b = Thing(email="a@b.c")
+        with self.assertWarnsRegex(UserWarning, "User.b is left out"):
+            self.index.rebuild([("User.a", self.a), ("User.b", b)])
+        self.assertIs(self.index.get("a@b.c"), self.a)
+        self.assertEqual(len(self.index), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
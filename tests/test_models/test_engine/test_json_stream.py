@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""
+This script includes tests for json_stream.py in the models/engine directory.
+
+Test classes included:
+    TestIterItems
+"""
+import io
+import json
+import unittest
+from models.engine.json_stream import iter_items
+
+
+class TestIterItems(unittest.TestCase):
+    """Tests for reading a JSON object one record at a time."""
+
+    document = {"User.{}".format(i): {"id": str(i), "name": "x" * i,
+                                      "list": [i, None, {"k": 1.5}]}
+                for i in range(50)}
+
+    def test_matches_json_load_for_any_chunk_size(self):
+        text = json.dumps(self.document)
+        for chunk_size in (1, 3, 17, 1 << 16):
+            items = dict(iter_items(io.StringIO(text), chunk_size))
+            self.assertEqual(items, self.document)
+
+    def test_reads_indented_documents(self):
+        text = json.dumps(self.document, indent=4)
+        self.assertEqual(dict(iter_items(io.StringIO(text), 5)), self.document)
+
+    def test_yields_records_in_file_order(self):
+        text = json.dumps(self.document)
+        keys = [key for key, _ in iter_items(io.StringIO(text), 7)]
+        self.assertEqual(keys, list(self.document))
+
+    def test_raw_text(self):
+        text = json.dumps(self.document, indent=2)
+        for key, value, raw in iter_items(io.StringIO(text), 9, raw=True):
+            self.assertEqual(json.loads(raw), value)
+            self.assertEqual(raw, json.dumps(value, indent=2).replace(
+                "\n", "\n  "))
+
+    def test_escaped_keys(self):
+        text = json.dumps({'a"b\\c': 1, "é": 2})
+        self.assertEqual(dict(iter_items(io.StringIO(text), 2)),
+                         {'a"b\\c': 1, "é": 2})
+
+    def test_numbers_cut_by_chunk_boundary(self):
+        text = '{"a": 123456, "b": 7}'
+        self.assertEqual(dict(iter_items(io.StringIO(text), 8)),
+                         {"a": 123456, "b": 7})
+
+    def test_empty_inputs(self):
+        self.assertEqual(list(iter_items(io.StringIO(""))), [])
+        self.assertEqual(list(iter_items(io.StringIO(" { } "), 1)), [])
+
+    def test_invalid_documents_raise(self):
+        for text in ('{"a": 1', '{"a": 1,}', '[1]', '{"a" 1}', '{"a": 1} x'):
+            with self.assertRaises(ValueError):
+                list(iter_items(io.StringIO(text), 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,275 @@
+#!/usr/bin/python3
+"""
+This script includes tests for query.py in the models/engine directory.
+
+Test classes included:
+    TestQuery
+    TestQueryPlanner
+    TestQueryAggregates
+"""
+import unittest
+from models.engine.indexes import HashIndex, SortedIndex, UniqueIndex
+from models.engine.query import Query, parse_aggregate
+
+
+class Thing:
+    """Plain object to query."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class Store:
+    """Smallest storage a Query can read: all(), index(), count(), get()."""
+
+    def __init__(self, things, indexes=()):
+        self.objects = {"Thing.{}".format(i): thing
+                        for i, thing in enumerate(things)}
+        self.indexes = {}
+        for kind, attr in indexes:
+            index = kind(attr)
+            index.rebuild(self.objects.items())
+            self.indexes[(kind, attr)] = index
+        self.scans = 0
+
+    def all(self, cls=None):
+        self.scans += 1
+        return dict(self.objects)
+
+    def count(self, cls=None):
+        return len(self.objects)
+
+    def index(self, cls, attr, kind=HashIndex):
+        return self.indexes.get((kind, attr))
+
+    def get(self, cls, id):
+        return self.objects.get("{}.{}".format(cls, id))
+
+
+def things():
+    return [Thing(price=price, city=city, guests=guests, code=code)
+            for price, city, guests, code in (
+                (80, "a", 2, "x1"), (120, "b", 4, "x2"), (190, "a", 6, ""),
+                (250, "b", 4, "x4"), (60, "c", 8, "x5"))]
+
+
+class TestQuery(unittest.TestCase):
+    """Tests for the results of queries, whatever the plan."""
+
+    def setUp(self):
+        self.store = Store(things())
+
+    def prices(self, query):
+        return [thing.price for thing in query]
+
+    def test_where_operators(self):
+        query = Query(self.store, "Thing")
+        self.assertEqual(sorted(self.prices(query.where(price__lt=120))),
+                         [60, 80])
+        self.assertEqual(sorted(self.prices(query.where(price__ge=190))),
+                         [190, 250])
+        self.assertEqual(sorted(self.prices(query.where(city__ne="a"))),
+                         [60, 120, 250])
+        self.assertEqual(sorted(self.prices(query.where(city__in="bc"))),
+                         [60, 120, 250])
+        self.assertEqual(self.prices(query.where(city="a", guests=6)), [190])
+
+    def test_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            Query(self.store, "Thing").where(price__about=100)
+
+    def test_incomparable_values_do_not_match(self):
+        self.store.objects["Thing.9"] = Thing(price="free")
+        query = Query(self.store, "Thing").where(price__lt=100)
+        self.assertEqual(sorted(self.prices(query)), [60, 80])
+
+    def test_order_offset_limit(self):
+        query = Query(self.store, "Thing").order_by("price")
+        self.assertEqual(self.prices(query), [60, 80, 120, 190, 250])
+        self.assertEqual(self.prices(query.limit(2)), [60, 80])
+        self.assertEqual(self.prices(query.offset(1).limit(2)), [80, 120])
+        self.assertEqual(self.prices(query.order_by("-price").limit(2)),
+                         [250, 190])
+        self.assertEqual(
+            self.prices(query.order_by("-guests", "price")),
+            [60, 190, 120, 250, 80])
+
+    def test_order_mixed_types(self):
+        self.store.objects["Thing.8"] = Thing(price="free")
+        self.store.objects["Thing.9"] = Thing(price=99.5)
+        query = Query(self.store, "Thing").order_by("price")
+        self.assertEqual(self.prices(query),
+                         [60, 80, 99.5, 120, 190, 250, "free"])
+        self.assertEqual(self.prices(query.limit(2)), [60, 80])
+        self.store.objects["Thing.7"] = Thing(price={"per": "night"})
+        self.assertEqual(len(query.all()), 8)
+        for thing in self.store.objects.values():
+            thing.price = {"per": thing.price}
+        self.assertEqual(len(query.limit(3).all()), 3)
+
+    def test_after(self):
+        for key, thing in self.store.objects.items():
+            thing.id = key.split(".")[1]
+        query = Query(self.store, "Thing").order_by("price")
+        cursor = query.all()[1]
+        self.assertEqual(self.prices(query.after(cursor.id).limit(2)),
+                         [120, 190])
+        self.assertEqual(self.prices(query.after(cursor.id).offset(2)),
+                         [250])
+        with self.assertRaises(ValueError):
+            query.after("nowhere").all()
+
+    def test_after_deleted_cursor(self):
+        for key, thing in self.store.objects.items():
+            thing.id = key.split(".")[1]
+        query = Query(self.store, "Thing").order_by("-price")
+        cursor = query.all()[1]
+        del self.store.objects["Thing." + cursor.id]
+        with self.assertRaises(ValueError):
+            query.after(cursor.id).all()
+
+    def test_after_ties(self):
+        for key, thing in self.store.objects.items():
+            thing.id = key.split(".")[1]
+            thing.price = 10
+        query = Query(self.store, "Thing").order_by("price")
+        ids = [thing.id for thing in query]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual([t.id for t in query.after(ids[1])], ids[2:])
+
+    def test_every_class(self):
+        self.assertEqual(Query(self.store, None).count(), 5)
+        self.assertIn("scan of every class", Query(self.store, None).explain())
+
+    def test_queries_are_immutable(self):
+        query = Query(self.store, "Thing")
+        query.where(city="a").limit(1)
+        self.assertEqual(query.count(), 5)
+
+    def test_first_and_count(self):
+        query = Query(self.store, "Thing").where(city="b")
+        self.assertEqual(query.count(), 2)
+        self.assertEqual(query.order_by("price").first().price, 120)
+        self.assertIsNone(query.where(city="z").first())
+
+
+class TestQueryPlanner(unittest.TestCase):
+    """Tests for the choice of access path."""
+
+    def setUp(self):
+        self.store = Store(things(), [(HashIndex, "city"),
+                                      (SortedIndex, "price"),
+                                      (UniqueIndex, "code")])
+        self.query = Query(self.store, "Thing")
+
+    def test_scan_without_index(self):
+        plan = self.query.where(guests=4).plan()
+        self.assertTrue(plan.access.startswith("scan"))
+
+    def test_hash_index_for_equality(self):
+        query = self.query.where(city="a", price__lt=100)
+        self.assertEqual(query.plan().access, "HashIndex on city = 'a'")
+        self.assertEqual([t.price for t in query], [80])
+        self.assertEqual(self.store.scans, 0)
+
+    def test_unique_index(self):
+        query = self.query.where(code="x4")
+        self.assertEqual(query.plan().access, "UniqueIndex on code = 'x4'")
+        self.assertEqual([t.price for t in query], [250])
+
+    def test_unique_index_skips_empty_values(self):
+        query = self.query.where(code="")
+        self.assertNotIn("UniqueIndex", query.plan().access)
+        self.assertEqual([t.price for t in query], [190])
+
+    def test_range_index_for_comparisons(self):
+        query = self.query.where(price__gt=80, price__le=190)
+        plan = query.plan()
+        self.assertEqual(plan.rows, 2)
+        self.assertTrue(plan.access.startswith("SortedIndex"))
+        self.assertEqual(sorted(t.price for t in query), [120, 190])
+        self.assertEqual(self.store.scans, 0)
+
+    def test_index_order_with_limit(self):
+        query = self.query.order_by("-price").limit(2)
+        plan = query.plan()
+        self.assertTrue(plan.ordered)
+        self.assertEqual(plan.cost, 2)
+        self.assertEqual([t.price for t in query], [250, 190])
+        self.assertEqual(self.store.scans, 0)
+
+    def test_index_order_starts_at_cursor(self):
+        for key, thing in self.store.objects.items():
+            thing.id = key.split(".")[1]
+        cursor = self.query.order_by("-price").all()[1]
+        query = self.query.order_by("-price").after(cursor.id)
+        plan = query.plan()
+        self.assertTrue(plan.ordered)
+        self.assertEqual(plan.rows, 4)
+        self.assertEqual([t.price for t in query], [120, 80, 60])
+        self.assertEqual(self.store.scans, 0)
+
+    def test_index_order_needs_every_object(self):
+        self.store.objects["Thing.9"] = Thing(price=None)
+        plan = self.query.order_by("price").plan()
+        self.assertTrue(plan.access.startswith("scan"))
+
+    def test_explain(self):
+        text = self.query.where(city="a", guests__ge=2) \
+            .order_by("price").limit(3).explain()
+        self.assertEqual(text.splitlines()[:5], [
+            "Query on Thing",
+            "  read:   HashIndex on city = 'a' (~2 objects)",
+            "  filter: guests >= 2",
+            "  order:  price",
+            "  limit:  3"])
+        self.assertIn("skipped: scan of Thing (~5 objects)", text)
+
+
+class TestQueryAggregates(unittest.TestCase):
+    """Tests for aggregate() and group_by()."""
+
+    def setUp(self):
+        self.store = Store(things() + [Thing(price=None, city="c")])
+        self.query = Query(self.store, "Thing")
+
+    def test_parse_aggregate(self):
+        self.assertEqual(parse_aggregate("count"), ("count", None))
+        self.assertEqual(parse_aggregate("count()"), ("count", None))
+        self.assertEqual(parse_aggregate(" avg( price ) "), ("avg", "price"))
+        for text in ("median(price)", "sum", "max()", "avg(price"):
+            with self.assertRaises(ValueError):
+                parse_aggregate(text)
+
+    def test_aggregate(self):
+        self.assertEqual(
+            self.query.aggregate("count", "count(price)", "sum(price)",
+                                 "avg(price)", "min(price)", "max(price)"),
+            {"count": 6, "count(price)": 5, "sum(price)": 700,
+             "avg(price)": 140, "min(price)": 60, "max(price)": 250})
+        self.assertEqual(self.query.where(city="z").aggregate(
+            "count", "sum(price)", "avg(price)", "max(price)"),
+            {"count": 0, "sum(price)": 0, "avg(price)": None,
+             "max(price)": None})
+
+    def test_group_by(self):
+        self.assertEqual(
+            self.query.group_by("city", "count", "avg(price)"),
+            {"a": {"count": 2, "avg(price)": 135},
+             "b": {"count": 2, "avg(price)": 185},
+             "c": {"count": 2, "avg(price)": 60}})
+        self.assertEqual(self.query.where(price__lt=100).group_by("city"),
+                         {"a": {"count": 1}, "c": {"count": 1}})
+
+    def test_group_by_hash_index(self):
+        self.store = Store(things(), [(HashIndex, "city")])
+        query = Query(self.store, "Thing")
+        self.assertEqual(query.group_by("city", "count", "max(guests)"),
+                         {"a": {"count": 2, "max(guests)": 6},
+                          "b": {"count": 2, "max(guests)": 4},
+                          "c": {"count": 1, "max(guests)": 8}})
+        self.assertEqual(self.store.scans, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""
+This script includes tests for text_index.py in the models/engine directory.
+
+Test classes included:
+    TestTokenize
+    TestTextIndex
+"""
+import unittest
+from models.engine.text_index import TextIndex, tokenize
+
+
+class Thing:
+    """Plain object to index."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class TestTokenize(unittest.TestCase):
+    """Tests for splitting text into words."""
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Quiet, SUNNY loft; quiet street!"),
+                         ["quiet", "sunny", "loft", "quiet", "street"])
+        self.assertEqual(tokenize(""), [])
+
+
+class TestTextIndex(unittest.TestCase):
+    """Tests for the inverted index over text attributes."""
+
+    def setUp(self):
+        self.index = TextIndex(("name", "description"))
+        self.things = {
+            "Place.a": Thing(name="Sunny loft", description="Quiet and quiet"),
+            "Place.b": Thing(name="Quiet room", description="Sunny view"),
+            "Place.c": Thing(name="Loft", description=None)}
+        for key, thing in self.things.items():
+            self.index.add(key, thing)
+
+    def keys(self, *args, **kwargs):
+        return list(self.index.search(*args, **kwargs))
+
+    def test_and_search_ranked_by_frequency(self):
+        self.assertEqual(self.keys("quiet sunny"), ["Place.a", "Place.b"])
+        self.assertEqual(self.keys("LOFT"), ["Place.a", "Place.c"])
+        self.assertEqual(self.keys("loft view"), [])
+        self.assertEqual(self.keys(""), [])
+
+    def test_or_search(self):
+        self.assertEqual(self.keys("view loft", mode="or"),
+                         ["Place.a", "Place.b", "Place.c"])
+        self.assertEqual(self.keys("view loft", mode="or", limit=1),
+                         ["Place.a"])
+        with self.assertRaises(ValueError):
+            self.index.search("loft", mode="xor")
+
+    def test_add_reindexes_changed_text(self):
+        self.things["Place.c"].name = "Quiet quiet quiet cabin"
+        self.index.add("Place.c", self.things["Place.c"])
+        self.assertEqual(self.keys("quiet"),
+                         ["Place.c", "Place.a", "Place.b"])
+        self.assertEqual(self.keys("loft"), ["Place.a"])
+
+    def test_discard(self):
+        self.index.discard("Place.a")
+        self.index.discard("Place.missing")
+        self.assertEqual(self.keys("quiet"), ["Place.b"])
+        self.assertEqual(len(self.index), 2)
+
+    def test_objects_without_text_are_left_out(self):
+        self.index.add("Place.d", Thing(name="", description=""))
+        self.assertEqual(len(self.index), 3)
+
+    def test_dump_and_load(self):
+        index = TextIndex(("name", "description"))
+        dump = {key: dict(terms) for key, terms in self.index.dump().items()}
+        dump.pop("Place.c")
+        index.load(dump, self.things.items())
+        for query in ("quiet", "loft", "sunny view"):
+            self.assertEqual(list(index.search(query)), self.keys(query))
+        self.assertEqual(len(index), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
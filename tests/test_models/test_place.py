@@ -6,6 +6,7 @@ Test cases included:
     TestPlaceCreation
     TestPlaceUpdate
     TestPlaceDictRepresentation
+    TestPlaceReviews
 """
 import os
 import models
@@ -13,6 +14,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.place import Place
+from models.review import Review
 
 
 class TestPlaceCreation(unittest.TestCase):
@@ -245,5 +247,18 @@ class TestPlaceDictRepresentation(unittest.TestCase):
             place.to_dict(None)
 
 
+class TestPlaceReviews(unittest.TestCase):
+    """Tests for the reviews of a Place."""
+
+    def test_reviews(self):
+        place = Place()
+        reviews = [Review(), Review()]
+        for review in reviews:
+            review.place_id = place.id
+        self.assertEqual(place.reviews, reviews)
+        reviews[0].place_id = ""
+        self.assertEqual(place.reviews, reviews[1:])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+"""
+This script contains tests for the class registry in models/registry.py.
+
+Test groups:
+    TestRegistry
+"""
+import models
+import unittest
+from models.base_model import BaseModel
+from models.registry import classes
+from models.user import User
+from models.review import Review
+
+
+class TestRegistry(unittest.TestCase):
+    """Tests for looking model classes up by name."""
+
+    def test_every_model_is_registered(self):
+        self.assertEqual(sorted(classes), ["Amenity", "BaseModel", "City",
+                                           "Place", "Review", "State",
+                                           "User"])
+        for name, cls in classes.items():
+            self.assertEqual(cls.__name__, name)
+            self.assertTrue(issubclass(cls, BaseModel))
+        self.assertIs(classes["User"], User)
+        self.assertIs(classes["Review"], Review)
+
+    def test_exported_by_models(self):
+        self.assertIs(models.classes, classes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,6 +6,7 @@ Test cases:
     TestStateCreation
     TestStateUpdate
     TestStateDictConversion
+    TestStateCities
 """
 import os
 import models
@@ -13,6 +14,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.state import State
+from models.city import City
 
 
 class TestStateCreation(unittest.TestCase):
@@ -185,5 +187,22 @@ class TestStateDictConversion(unittest.TestCase):
             state.to_dict(None)
 
 
+class TestStateCities(unittest.TestCase):
+    """Tests for the cities of a State."""
+
+    def test_cities(self):
+        state, other = State(), State()
+        cities = [City(), City()]
+        for city in cities:
+            city.state_id = state.id
+        self.assertEqual(state.cities, cities)
+        self.assertEqual(other.cities, [])
+        cities[0].state_id = other.id
+        self.assertEqual(state.cities, cities[1:])
+        self.assertEqual(other.cities, cities[:1])
+        models.storage.delete(cities[1])
+        self.assertEqual(state.cities, [])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -6,6 +6,7 @@ Test cases:
     TestUserCreation
     TestUserUpdate
     TestUserDictConversion
+    TestUserRelations
 """
 import os
 import models
@@ -13,6 +14,8 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.user import User
+from models.place import Place
+from models.review import Review
 
 
 class TestUserCreation(unittest.TestCase):
@@ -191,5 +194,18 @@ class TestUserDictConversion(unittest.TestCase):
             user.to_dict(None)
 
 
+class TestUserRelations(unittest.TestCase):
+    """Tests for the places and reviews of a User."""
+
+    def test_places_and_reviews(self):
+        user = User()
+        place, review = Place(), Review()
+        self.assertEqual(user.places, [])
+        self.assertEqual(user.reviews, [])
+        place.user_id = review.user_id = user.id
+        self.assertEqual(user.places, [place])
+        self.assertEqual(user.reviews, [review])
+
+
 if __name__ == "__main__":
     unittest.main()